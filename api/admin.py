@@ -2,7 +2,7 @@
 from django.contrib import admin
 from rest_framework.authtoken.admin import TokenAdmin
 
-from .models import Harvester
+from .models import HarvestAdmission, Harvester, HarvesterSchedule
 
 __author__ = "Jan Frömberg"
 __copyright__ = "Copyright 2018, GeRDI Project"
@@ -15,3 +15,5 @@ TokenAdmin.raw_id_fields = ('user',)
 
 # Register your models here.
 admin.site.register(Harvester)
+admin.site.register(HarvesterSchedule)
+admin.site.register(HarvestAdmission)
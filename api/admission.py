@@ -0,0 +1,192 @@
+"""
+This module holds the admission control of harvests. With
+settings.HARVEST_MAX_CONCURRENT (in total) or
+settings.HARVEST_MAX_CONCURRENT_PER_HOST (per host of the harvester urls)
+set, starts from the GUI, the API and the HCC scheduler pass through a
+queue in the database (HarvestAdmission), so "start all" or a crontab
+firing at midnight do not saturate the search index and the bandwidth.
+
+A started harvester holds its slot until it is no longer harvesting. The
+slots are checked with the status snapshots (api/snapshots.py) where these
+still show a harvest and with a status call otherwise, whenever a start is
+queued, the status or progress poller of the dashboard sees a harvester
+with a slot being done or "python manage.py runscheduler" checks the queue.
+"""
+import datetime
+import logging
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from api import snapshots
+from api.constants import HCCJSONConstants as HCCJC
+from api.executor import run_concurrently
+from api.harvester_api import InitHarvester
+from api.models import HarvestAdmission
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+LOGGER = logging.getLogger(__name__)
+
+
+def enabled():
+    """True if a limit of concurrent harvests is set"""
+    return bool(settings.HARVEST_MAX_CONCURRENT or settings.HARVEST_MAX_CONCURRENT_PER_HOST)
+
+
+def host_of(harvester):
+    """the host the limit per host counts a harvester for"""
+    return urlsplit(harvester.url).netloc.lower()
+
+
+def _start(harvester):
+    return InitHarvester(harvester).get_harvester_api().start_harvest()
+
+
+def _status(harvester):
+    return InitHarvester(harvester).get_harvester_api().harvester_status()
+
+
+def _grace():
+    """harvesters started before may be done, later ones may not harvest yet"""
+    return timezone.now() - datetime.timedelta(seconds=settings.HARVEST_START_GRACE)
+
+
+def _admissions():
+    """all admissions in queue order, locked on databases with row locks"""
+    return list(HarvestAdmission.objects.select_for_update().select_related('harvester'))
+
+
+def _queued(harvester, position):
+    return Response({harvester.name: {
+        HCCJC.HEALTH: 'queued, {} harvesters start before'.format(position)}},
+                    status=status.HTTP_202_ACCEPTED)
+
+
+def start(harvesters):
+    """
+    Start the harvesters or, with a limit set, queue them and start as many
+    as the limit allows. Returns the responses in the order of harvesters:
+    the start response or 202 Accepted for the queued ones.
+    """
+    harvesters = list(harvesters)
+    if not enabled():
+        return run_concurrently(_start, harvesters)
+    admitted = set(HarvestAdmission.objects.filter(
+        harvester__in=harvesters).values_list('harvester_id', flat=True))
+    HarvestAdmission.objects.bulk_create(
+        [HarvestAdmission(harvester=harvester, host=host_of(harvester))
+         for harvester in harvesters
+         if harvester.enabled and harvester.pk not in admitted],
+        ignore_conflicts=True)
+    started = dispatch()
+    queue = list(HarvestAdmission.objects.filter(
+        date_started__isnull=True).values_list('harvester_id', flat=True))
+    # disabled harvesters and the ones harvesting already answer themselves
+    direct = [harvester for harvester in harvesters
+              if harvester.name not in started and harvester.pk not in queue]
+    responses = {harvester.name: response
+                 for harvester, response in zip(direct, run_concurrently(_start, direct))}
+    return [started.get(harvester.name) or responses.get(harvester.name)
+            or _queued(harvester, queue.index(harvester.pk))
+            for harvester in harvesters]
+
+
+def dispatch():
+    """
+    Free the slots of finished harvests and start the queued harvesters
+    while the limits allow. Returns the start responses keyed by name.
+
+    Every admission is claimed with a conditional UPDATE, so of several
+    dispatchers (runscheduler, pollers in other workers) that read the
+    same queue only one starts a harvester, even without row locks (SQLite).
+    """
+    if not enabled():
+        return {}
+    release_finished()
+    with transaction.atomic():
+        admissions = _admissions()
+        running = Counter(admission.host for admission in admissions if admission.date_started)
+        total = sum(running.values())
+        admitted = []
+        for admission in admissions:
+            if admission.date_started:
+                continue
+            if settings.HARVEST_MAX_CONCURRENT and total >= settings.HARVEST_MAX_CONCURRENT:
+                break
+            if settings.HARVEST_MAX_CONCURRENT_PER_HOST \
+                    and running[admission.host] >= settings.HARVEST_MAX_CONCURRENT_PER_HOST:
+                continue
+            admitted.append(admission)
+            running[admission.host] += 1
+            total += 1
+        # admissions claimed by another dispatcher since the read are left to it
+        now = timezone.now()
+        admitted = [admission for admission in admitted
+                    if HarvestAdmission.objects.filter(
+                        pk=admission.pk, date_started__isnull=True).update(date_started=now)]
+    waiting = len(admissions) - total
+    if waiting:
+        LOGGER.info("%d harvesters wait for a harvest slot.", waiting)
+
+    harvesters = [admission.harvester for admission in admitted]
+    responses = {}
+    for harvester, response in zip(harvesters, run_concurrently(_start, harvesters)):
+        responses[harvester.name] = response
+        if status.is_success(response.status_code):
+            LOGGER.info("%s harvester admitted to harvest.", harvester.name)
+        else:
+            LOGGER.warning("%s harvester could not be started: %s",
+                           harvester.name, response.data)
+    failed = [name for name, response in responses.items()
+              if not status.is_success(response.status_code)]
+    if failed:
+        HarvestAdmission.objects.filter(harvester__name__in=failed).delete()
+    return responses
+
+
+def release_finished():
+    """
+    Free the slots of the started harvesters that are not harvesting anymore.
+    A snapshot showing a harvest is trusted, the others are asked for their
+    status, as a snapshot taken right after the start may still show idle.
+    """
+    harvesters = [admission.harvester for admission in HarvestAdmission.objects.filter(
+        date_started__lte=_grace()).select_related('harvester')]
+    known = snapshots.states([harvester.name for harvester in harvesters])
+    unknown = [harvester for harvester in harvesters
+               if not snapshots.is_busy(known.get(harvester.name))]
+    done = []
+    for harvester, response in zip(unknown, run_concurrently(_status, unknown)):
+        feedback = response.data.get(harvester.name) \
+            if isinstance(response.data, dict) else None
+        if not snapshots.is_busy(snapshots.state_of(feedback)):
+            done.append(harvester.name)
+    if done:
+        HarvestAdmission.objects.filter(harvester__name__in=done).delete()
+        LOGGER.info("harvests done: %s", ', '.join(done))
+    return done
+
+
+def statuses_polled(statuses):
+    """
+    Dispatch queued starts if a polled harvester (statuses keyed by name)
+    that holds a harvest slot is done.
+    """
+    if not enabled():
+        return
+    done = [name for name, feedback in statuses.items()
+            if not snapshots.is_busy(snapshots.state_of(feedback))]
+    if HarvestAdmission.objects.filter(harvester__name__in=done,
+                                       date_started__lte=_grace()).exists():
+        dispatch()
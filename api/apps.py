@@ -1,7 +1,12 @@
 """ app module """
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     """Django app config"""
     name = 'api'
+
+    def ready(self):
+        from api.db import configure_connection
+        connection_created.connect(configure_connection, dispatch_uid='api.db')
@@ -0,0 +1,139 @@
+"""
+This module parses crontabs ("0 0 * * *") and computes when they fire next.
+
+Supported are the five fields minute, hour, day of month, month and day of
+week with *, lists (1,15), ranges (1-5), steps (*/15, 0-30/10), month and
+day names (jan, mon) and the shortcuts @hourly, @daily, @weekly, @monthly
+and @yearly. As in cron, a job whose day of month and day of week are both
+restricted fires on either of them.
+"""
+import datetime
+
+from django.core.exceptions import ValidationError
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+SHORTCUTS = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+}
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+          'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+WEEKDAYS = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+# name, lowest and highest value, names of the values
+FIELDS = (
+    ('minute', 0, 59, None),
+    ('hour', 0, 23, None),
+    ('day', 1, 31, None),
+    ('month', 1, 12, MONTHS),
+    ('weekday', 0, 7, WEEKDAYS),
+)
+
+# a crontab that does not fire within this many days never does (30 feb)
+MAX_DAYS = 366 * 5
+
+
+class CronTab:
+    """A parsed crontab, see the module docstring for the syntax."""
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        fields = SHORTCUTS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != len(FIELDS):
+            raise ValueError(
+                'A crontab has five fields (minute hour day month weekday): {}'.format(expression))
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(value, *field) for value, field in zip(fields, FIELDS))
+        # 7 is sunday as well
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def __str__(self):
+        return self.expression
+
+    def __repr__(self):
+        return 'CronTab({!r})'.format(self.expression)
+
+    def matches_day(self, date):
+        """True if the crontab fires on this date"""
+        in_days = date.day in self.days
+        # isoweekday: monday 1 ... sunday 7, cron: sunday 0
+        in_weekdays = date.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment):
+        """
+        The first time after moment (a naive or aware datetime, taken as
+        wall clock time) at which the crontab fires.
+        """
+        moment = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = moment + datetime.timedelta(days=MAX_DAYS)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = _first_of_next_month(moment)
+            elif not self.matches_day(moment):
+                moment = moment.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + datetime.timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError('The crontab never fires: {}'.format(self.expression))
+
+
+def _first_of_next_month(moment):
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1, day=1, hour=0, minute=0)
+    return moment.replace(month=moment.month + 1, day=1, hour=0, minute=0)
+
+
+def _parse_field(value, name, lowest, highest, names):
+    """the set of values of one crontab field"""
+    values = set()
+    for part in value.lower().split(','):
+        part, _, step = part.partition('/')
+        try:
+            step = int(step) if step else 1
+            if part == '*':
+                start, end = lowest, highest
+            else:
+                start, _, end = part.partition('-')
+                start = _parse_value(start, names)
+                end = _parse_value(end, names) if end else (highest if step > 1 else start)
+        except ValueError:
+            raise ValueError('Invalid {} in crontab: {}'.format(name, value))
+        if step < 1 or not lowest <= start <= end <= highest:
+            raise ValueError('Invalid {} in crontab: {}'.format(name, value))
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def _parse_value(value, names):
+    if names and value in names:
+        return names.index(value) + (1 if names is MONTHS else 0)
+    return int(value)
+
+
+def validate_crontab(value):
+    """model field validator for crontabs"""
+    try:
+        CronTab(value).next_after(datetime.datetime(2000, 1, 1))
+    except ValueError as _e:
+        raise ValidationError(str(_e))
@@ -0,0 +1,36 @@
+"""
+This module tunes the database connections of HCC.
+
+SQLite connections get their pragmas (settings.SQLITE_PRAGMAS) right after
+they are opened: WAL lets gunicorn workers read while the poller writes,
+the busy timeout makes writers wait instead of failing with
+"database is locked".
+"""
+import logging
+
+from django.conf import settings
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+# Get an instance of a logger
+LOGGER = logging.getLogger(__name__)
+
+
+def apply_pragmas(cursor, pragmas):
+    """set the given SQLite pragmas (name -> value) on a DB-API cursor"""
+    for name, value in pragmas.items():
+        cursor.execute("PRAGMA {} = {}".format(name, value))
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created receiver, tunes new SQLite connections"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+    LOGGER.debug("sqlite connection tuned: %s", settings.SQLITE_PRAGMAS)
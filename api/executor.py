@@ -0,0 +1,56 @@
+"""
+This module runs harvester API calls concurrently.
+
+HCC mostly waits on the harvesters, so views that address several harvesters
+hand their calls to a shared thread pool instead of calling one after the
+other. The context of the calling thread (current request timings, trace span)
+is copied into every task, so metrics and traces still belong to the request.
+Tasks must not use the database: the calling view loads the harvesters first.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor():
+    """the process wide pool of settings.HARVESTER_MAX_WORKERS threads"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=settings.HARVESTER_MAX_WORKERS,
+                    thread_name_prefix='hcc-harvester')
+    return _EXECUTOR
+
+
+def run_concurrently(function, items):
+    """
+    Call function(item) for every item in the pool and return the results
+    in the order of items. The first exception raised by a call is re-raised
+    after all calls have finished.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [function(item) for item in items]
+    executor = get_executor()
+    futures = [executor.submit(contextvars.copy_context().run, function, item)
+               for item in items]
+    # wait for all calls before raising, no call is left running unnoticed
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return [future.result() for future in futures]
@@ -0,0 +1,67 @@
+"""
+This module filters and projects the harvester lists of the v1 API.
+
+Registry filters run in the database:
+    ?enabled=true  ?prefix=oai_  ?owner=username
+Status filters need the live status of a harvester and are applied per page:
+    ?state=harvesting  ?gui_status=warning
+A projection limits the returned fields:
+    ?fields=name,progress_cur
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from api.constants import HCCJSONConstants as HCCJC
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+BOOLEANS = {'true': True, '1': True, 'false': False, '0': False}
+
+
+def requested_fields(request, allowed=None):
+    """
+    The field names of ?fields=a,b as list, None without projection.
+    Raises ValidationError for names not in allowed.
+    """
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    if allowed is not None:
+        unknown = [field for field in fields if field not in allowed]
+        if unknown:
+            raise ValidationError(
+                {'fields': 'Unknown fields: {}'.format(', '.join(unknown))})
+    return fields
+
+
+class HarvesterFilterBackend(BaseFilterBackend):
+    """Filters the harvester registry by enabled, name prefix and owner."""
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        if 'enabled' in params:
+            enabled = BOOLEANS.get(params['enabled'].lower())
+            if enabled is None:
+                raise ValidationError({'enabled': 'Must be true or false.'})
+            queryset = queryset.filter(enabled=enabled)
+        if params.get('prefix'):
+            queryset = queryset.filter(name__startswith=params['prefix'])
+        if params.get('owner'):
+            queryset = queryset.filter(owner__username=params['owner'])
+        return queryset
+
+
+def status_matches(request, harvester_status):
+    """True if a live harvester status passes ?state= and ?gui_status="""
+    params = request.query_params
+    for key in (HCCJC.STATE, HCCJC.GUI_STATUS):
+        wanted = params.get(key)
+        if wanted and str(harvester_status.get(key, '')).lower() != wanted.lower():
+            return False
+    return True
@@ -1,12 +1,15 @@
 """
 The forms module.
 """
+from functools import lru_cache
+
 from crispy_forms.bootstrap import FieldWithButtons, FormActions, PrependedText
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
 
+from api.crontab import validate_crontab
 from api.models import Harvester
 
 __author__ = "Jan Frömberg, Laura Höhle"
@@ -46,12 +49,53 @@ class HarvesterForm(forms.ModelForm):
 
 class ConfigForm(forms.Form):
     """
-    This class represents a dynamic Harvester Configuration Form. It is created every
-    time create_config_form is called.
+    This class represents a dynamic Harvester Configuration Form. A subclass is
+    created once per config schema, see config_form_class.
     """
     pass
 
 
+# form field and value of an unset parameter per parameter type
+CONFIG_PARAMETERS = {
+    "IntegerParameter": (forms.IntegerField, {}, 0),
+    "StringParameter": (forms.CharField, {}, ""),
+    "BooleanParameter": (forms.BooleanField, {}, False),
+    "PasswordParameter": (forms.CharField, {"widget": forms.PasswordInput}, ""),
+}
+UNKNOWN_PARAMETER = (forms.CharField, {}, None)
+
+
+def config_schema(config_data):
+    """
+    The schema of a harvester configuration: a tuple of field names
+    ("<category>.<key>") and parameter types. Harvesters of the same kind
+    share their schema.
+    """
+    return tuple(
+        ("{}.{}".format(key, field["key"]), field["type"])
+        for key in config_data.keys()
+        for field in config_data[key]["parameters"])
+
+
+def config_values(config_data):
+    """the current values of a harvester configuration, keyed by field name"""
+    data = {}
+    for key in config_data.keys():
+        for field in config_data[key]["parameters"]:
+            # set default values, if value is not set
+            default = CONFIG_PARAMETERS.get(field["type"], UNKNOWN_PARAMETER)[2]
+            data["{}.{}".format(key, field["key"])] = field.get("value", default)
+    return data
+
+
+def _config_fields(schema):
+    fields = {}
+    for name, parameter_type in schema:
+        field_class, options, _ = CONFIG_PARAMETERS.get(parameter_type, UNKNOWN_PARAMETER)
+        fields[name] = field_class(required=False, **options)
+    return fields
+
+
 def create_config_fields(config_data):
     """
     This function validates the input data to data and fields used for
@@ -62,54 +106,23 @@ def create_config_fields(config_data):
      - fields : dictionary of field names with fields type
      - data : dictionary of field names with current value
     """
-    fields = {}
-    data = {}
+    return _config_fields(config_schema(config_data)), config_values(config_data)
 
-    for key in config_data.keys():
-        for field in config_data[key]["parameters"]:
-            if field["type"] == "IntegerParameter":
-                fields["{}.{}".format(key, field["key"])
-                       ] = forms.IntegerField(required=False)
-                field_type = "integer"
-            elif field["type"] == "StringParameter":
-                fields["{}.{}".format(key, field["key"])
-                       ] = forms.CharField(required=False)
-                field_type = "string"
-            elif field["type"] == "BooleanParameter":
-                fields["{}.{}".format(key, field["key"])
-                       ] = forms.BooleanField(required=False)
-                field_type = "boolean"
-            elif field["type"] == "PasswordParameter":
-                fields["{}.{}".format(key, field["key"])] = forms.CharField(
-                    required=False, widget=forms.PasswordInput())
-                field_type = "password"
-            else:
-                fields["{}.{}".format(key, field["key"])
-                       ] = forms.CharField(required=False)
-
-            if "value" in field:
-                data["{}.{}".format(key, field["key"])] = field["value"]
-            else:  # set default values, if value is not set
-                if field_type == "integer":
-                    data["{}.{}".format(key, field["key"])] = 0
-                elif field_type == "string":
-                    data["{}.{}".format(key, field["key"])] = ""
-                elif field_type == "boolean":
-                    data["{}.{}".format(key, field["key"])] = False
-                elif field_type == "password":
-                    data["{}.{}".format(key, field["key"])] = ""
-                else:
-                    data["{}.{}".format(key, field["key"])] = None
-    return fields, data
+
+@lru_cache(maxsize=128)
+def config_form_class(schema):
+    """
+    The ConfigForm class of a config schema. Memoized by the schema, so the
+    form class of a kind of harvester is built once, not per request.
+    """
+    return type('DynamicConfigForm', (ConfigForm,), _config_fields(schema))
 
 
 def create_config_form(config_data):
     """
     This function creates a ConfigForm: a dynamic Form for Harvester Configuration.
     """
-    fields, data = create_config_fields(config_data)
-    DynamicConfigForm = type('DynamicConfigForm', (ConfigForm,), fields)
-    return DynamicConfigForm(data)
+    return config_form_class(config_schema(config_data))(config_values(config_data))
 
 
 class LoginForm(AuthenticationForm):
@@ -147,8 +160,9 @@ class SchedulerForm(forms.Form):
     A helper property had to  be called in order to use crispy forms styling.
     """
     cronTab = forms.CharField(label="Scheduling Plan:",
-                              max_length=14,
-                              required=False)
+                              max_length=100,
+                              required=False,
+                              validators=[validate_crontab])
 
     @property
     def helper(self):
@@ -178,3 +192,14 @@ class ValidateFileForm(forms.ModelForm):
     class Meta:
         model = Harvester
         fields = ['name', 'notes', 'url', 'enabled']
+
+
+class BulkValidateFileForm(ValidateFileForm):
+    """
+    ValidateFileForm for bulk imports. Uniqueness of name and url is
+    checked in memory by api.harvester_import instead of one query
+    per field and entry.
+    """
+
+    def validate_unique(self):
+        """skip the database lookups of ModelForm.validate_unique"""
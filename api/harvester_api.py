@@ -3,15 +3,16 @@ This module initiaized a harvester and determines its version to decide the prot
 """
 import json
 
-import requests
 from requests.exceptions import RequestException
 from rest_framework import status
 from rest_framework.response import Response
 
+from api import metrics, snapshots, tracing
 from api.constants import HarvesterApiConstants as HAC
 from api.harvester_api_strategy import (BaseStrategy, HarvesterApiStrategy,
                                         VersionBased6Strategy,
-                                        VersionBased7Strategy)
+                                        VersionBased7Strategy,
+                                        harvester_request)
 
 __author__ = "Jan Frömberg"
 __copyright__ = "Copyright 2018, GeRDI Project"
@@ -34,36 +35,49 @@ class InitHarvester:
         self.harvester = harvester
 
         if harvester.enabled:
-            try:
-                response = requests.get(harvester.url + HAC.G_VERSIONS,
-                                        timeout=5)
-            except RequestException as _e:
-                response = Response(
-                    "A Connection Error. Harvester initialization failed. " +
-                    str(_e),
-                    status=status.HTTP_408_REQUEST_TIMEOUT)
-
-            if response.status_code == status.HTTP_401_UNAUTHORIZED:
-                response = Response('Authentication required.',
-                                    status=status.HTTP_401_UNAUTHORIZED)
-            if response.status_code == status.HTTP_404_NOT_FOUND:
-                response = Response('Resource on server not found. Check URL.',
-                                    status=status.HTTP_404_NOT_FOUND)
-
-            if response.status_code == status.HTTP_200_OK:
-                harvester_json = json.loads(response.text)
-                version_string = harvester_json["value"][1]
-                lib_version = version_string.split("-")[2]
-
-                if int(lib_version.split(".")[0]) >= 7:
-                    self._harvester_version = 7
-                else:
-                    self._harvester_version = 6
-            else:
-                self._harvester_version = "not supported"
+            self._harvester_version = snapshots.get_library_version(harvester)
+            if self._harvester_version is None:
+                self._harvester_version = self._request_version()
+                snapshots.set_library_version(harvester, self._harvester_version)
         else:
             self._harvester_version = "harvester disabled"
 
+    def _request_version(self):
+        """
+        ask the harvester for its library version: 6, 7 or "not supported".
+        """
+        harvester = self.harvester
+        token = metrics.CURRENT_CALL.set(
+            metrics.HarvesterCall(harvester.name, "unknown", "versions"))
+        try:
+            with tracing.span('harvester.versions', **{'hcc.harvester': harvester.name}):
+                response = harvester_request('GET', harvester.url + HAC.G_VERSIONS,
+                                             timeout=5)
+        except RequestException as _e:
+            response = Response(
+                "A Connection Error. Harvester initialization failed. " +
+                str(_e),
+                status=status.HTTP_408_REQUEST_TIMEOUT)
+        finally:
+            metrics.CURRENT_CALL.reset(token)
+
+        if response.status_code == status.HTTP_401_UNAUTHORIZED:
+            response = Response('Authentication required.',
+                                status=status.HTTP_401_UNAUTHORIZED)
+        if response.status_code == status.HTTP_404_NOT_FOUND:
+            response = Response('Resource on server not found. Check URL.',
+                                status=status.HTTP_404_NOT_FOUND)
+
+        if response.status_code == status.HTTP_200_OK:
+            harvester_json = json.loads(response.text)
+            version_string = harvester_json["value"][1]
+            lib_version = version_string.split("-")[2]
+
+            if int(lib_version.split(".")[0]) >= 7:
+                return 7
+            return 6
+        return "not supported"
+
     def get_version(self):
         """
         get the harvester Version.
@@ -5,12 +5,16 @@ import abc
 import datetime
 import json
 import logging
+import time
+from urllib.parse import urlsplit
 
 import requests
+from django.conf import settings
 from requests.exceptions import RequestException
 from rest_framework import status
 from rest_framework.response import Response
 
+from api import metrics, snapshots, tracing
 from api.constants import HarvesterApiConstantsV6, HarvesterApiConstantsV7
 from api.constants import HCCJSONConstants as HCCJC
 
@@ -32,6 +36,8 @@ class Strategy(metaclass=abc.ABCMeta):
     ConcreteStrategy.
     Each method must return a Response with a JSON Body (see HCC Constants)
     """
+    # label of the strategy in metrics
+    api_version = "unknown"
 
     @abc.abstractmethod
     def get_harvester_status(self, harvester):
@@ -96,58 +102,126 @@ class HarvesterApiStrategy:
         """returns the harvester"""
         return self.harvester
 
+    def _call(self, operation, method, *args):
+        """
+        Run a strategy method in the call context of this harvester, so that
+        every HTTP call to the harvester is measured with its operation.
+        """
+        call = metrics.HarvesterCall(
+            self.harvester.name, self._strategy.api_version, operation)
+        token = metrics.CURRENT_CALL.set(call)
+        start = time.perf_counter()
+        try:
+            with tracing.span('harvester.' + operation, **{
+                    'hcc.harvester': call.harvester,
+                    'hcc.strategy_version': call.version}):
+                return method(self.harvester, *args)
+        finally:
+            metrics.HARVESTER_OPERATION_SECONDS.observe(
+                time.perf_counter() - start, **call._asdict())
+            metrics.CURRENT_CALL.reset(token)
+
     def harvester_status(self):
         """return the status of a harvester"""
-        return self._strategy.get_harvester_status(self.harvester)
+        response = self._call('status', self._strategy.get_harvester_status)
+        feedback = response.data.get(self.harvester.name) \
+            if isinstance(response.data, dict) else None
+        if isinstance(feedback, dict):
+            metrics.observe_documents(self.harvester.name,
+                                      feedback.get(HCCJC.CACHED_DOCS),
+                                      feedback.get(HCCJC.MAX_DOCUMENTS))
+            snapshots.record(self.harvester.name, snapshots.STATUS, feedback)
+        return response
 
     def start_harvest(self):
         """start a single harvester"""
         LOGGER.info("%s harvester started by user.", self.harvester.name)
-        return self._strategy.post_start_harvest(self.harvester)
+        snapshots.forget([self.harvester.name])
+        return self._call('start', self._strategy.post_start_harvest)
 
     def stop_harvest(self):
         """stop a single harvester"""
         LOGGER.info("%s harvester stopped by user.", self.harvester.name)
-        return self._strategy.post_stop_harvest(self.harvester)
+        snapshots.forget([self.harvester.name])
+        return self._call('stop', self._strategy.post_stop_harvest)
 
     def reset_harvest(self):
         """reset a single harvester"""
         LOGGER.info("%s harvester resetted by user.", self.harvester.name)
-        return self._strategy.post_reset_harvest(self.harvester)
+        snapshots.forget([self.harvester.name])
+        return self._call('reset', self._strategy.post_reset_harvest)
 
     def harvester_log(self):
         """get the harvester logfile of today"""
-        return self._strategy.get_harvester_log(self.harvester)
+        return self._call('log', self._strategy.get_harvester_log)
 
     def add_schedule(self, crontab):
         """set a crontab for a harvester"""
         LOGGER.info("%s harvester schedule added by user.",
                     self.harvester.name)
-        return self._strategy.post_add_harvester_schedule(
-            self.harvester, crontab)
+        return self._call('add_schedule',
+                          self._strategy.post_add_harvester_schedule, crontab)
 
     def delete_schedule(self, crontab):
         """del all schedules of a harvester"""
         LOGGER.info("%s harvester schedule deleted by user.",
                     self.harvester.name)
-        return self._strategy.post_delete_harvester_schedule(
-            self.harvester, crontab)
+        return self._call('delete_schedule',
+                          self._strategy.post_delete_harvester_schedule, crontab)
 
     def harvester_progress(self):
         """get harvesting progress"""
-        return self._strategy.get_harvester_progress(self.harvester)
+        response = self._call('progress', self._strategy.get_harvester_progress)
+        feedback = response.data.get(self.harvester.name) \
+            if isinstance(response.data, dict) else None
+        if isinstance(feedback, dict):
+            metrics.observe_documents(self.harvester.name,
+                                      feedback.get(HCCJC.PROGRESS),
+                                      feedback.get(HCCJC.MAX_DOCUMENTS))
+            snapshots.record(self.harvester.name, snapshots.PROGRESS, feedback)
+        return response
 
     def get_harvester_config_data(self):
         """get configuration data"""
-        return self._strategy.get_harvester_config(self.harvester)
+        response = self._call('get_config', self._strategy.get_harvester_config)
+        if response.status_code == status.HTTP_200_OK:
+            snapshots.record_config(self.harvester.name,
+                                    response.data[self.harvester.name][HCCJC.HEALTH])
+        return response
 
     def save_harvester_config_data(self, changes):
         """set configuration data"""
-        return self._strategy.set_harvester_config(self.harvester, changes)
+        snapshots.forget_config(self.harvester.name)
+        return self._call('set_config', self._strategy.set_harvester_config, changes)
 
     def status_history(self):
         """get the status history of a harvester"""
-        return self._strategy.get_status_history(self.harvester)
+        return self._call('status_history', self._strategy.get_status_history)
+
+
+def harvester_request(method, url, **kwargs):
+    """
+    Send an HTTP request to a harvester, like requests.request.
+    All calls from HCC to harvesters go through here to be measured and traced.
+    """
+    call = metrics.CURRENT_CALL.get()
+    with tracing.span('HTTP ' + method, **{
+            'http.method': method,
+            'url.path': urlsplit(url).path,
+            'hcc.harvester': call.harvester if call else '',
+            'hcc.strategy_version': call.version if call else ''}) as span:
+        start = time.perf_counter()
+        try:
+            response = requests.request(method, url, **kwargs)
+        except RequestException as _e:
+            metrics.observe_harvester_request(time.perf_counter() - start, exception=_e)
+            raise
+        metrics.observe_harvester_request(time.perf_counter() - start,
+                                          status_code=response.status_code)
+        if span is not None:
+            span.set_attribute('http.status_code', response.status_code)
+            span.set_attribute('http.response_content_length', len(response.content))
+    return response
 
 
 def a_response(harvester_name, url, method):
@@ -161,13 +235,13 @@ def a_response(harvester_name, url, method):
     try:
 
         if method == 'Get':
-            response = requests.get(url, timeout=5)
+            response = harvester_request('GET', url, timeout=5)
         elif method == 'Put':
-            response = requests.put(url, timeout=5)
+            response = harvester_request('PUT', url, timeout=5)
         elif method == 'Post':
-            response = requests.post(url, timeout=9)
+            response = harvester_request('POST', url, timeout=9)
         elif method == 'Delete':
-            response = requests.delete(url, timeout=5)
+            response = harvester_request('DELETE', url, timeout=5)
 
         try:
             harvester_json = json.loads(response.text)
@@ -208,6 +282,7 @@ class BaseStrategy(Strategy):
     Fallback strategy alorithm for basic harvester support.
     Just UP/DOWN information.
     """
+    api_version = "base"
 
     def get_harvester_status(self, harvester):
         feedback = {}
@@ -215,7 +290,7 @@ class BaseStrategy(Strategy):
         if harvester.enabled:
             try:
                 feedback[harvester.name] = {}
-                response = requests.get(harvester.url, timeout=5)
+                response = harvester_request('GET', harvester.url, timeout=5)
 
                 if response.status_code == status.HTTP_401_UNAUTHORIZED:
                     feedback[harvester.name][
@@ -311,6 +386,7 @@ class VersionBased6Strategy(Strategy):
     The algorithm implemented using the Strategy interface.
     For old/legacy harvesters prior to library version v7
     """
+    api_version = "6"
 
     def a_response(self, harvester_name, url, method):
         """
@@ -322,7 +398,7 @@ class VersionBased6Strategy(Strategy):
         if method == 'Get':
             try:
                 feedback[harvester_name] = {}
-                response = requests.get(url, timeout=5)
+                response = harvester_request('GET', url, timeout=5)
                 feedback[harvester_name] = response.text
             except RequestException as _e:
                 feedback[harvester_name][HCCJC.HEALTH] = str(_e)
@@ -335,7 +411,7 @@ class VersionBased6Strategy(Strategy):
         if method == 'Put':
             try:
                 feedback[harvester_name] = {}
-                response = requests.put(url, timeout=5)
+                response = harvester_request('PUT', url, timeout=5)
                 feedback[harvester_name] = response.text
             except RequestException as _e:
                 feedback[harvester_name][HCCJC.HEALTH] = str(_e)
@@ -348,7 +424,7 @@ class VersionBased6Strategy(Strategy):
         if method == 'Post':
             try:
                 feedback[harvester_name] = {}
-                response = requests.post(url, timeout=9)
+                response = harvester_request('POST', url, timeout=9)
                 feedback[harvester_name] = response.text
             except RequestException as _e:
                 feedback[harvester_name][HCCJC.HEALTH] = str(_e)
@@ -368,7 +444,7 @@ class VersionBased6Strategy(Strategy):
             try:
                 feedback[harvester.name] = {}
                 stat_url = harvester.url + HarvesterApiConstantsV6.G_STATUS
-                response = requests.get(stat_url, timeout=5)
+                response = harvester_request('GET', stat_url, timeout=5)
 
                 if response.status_code == status.HTTP_401_UNAUTHORIZED:
                     feedback[harvester.name][
@@ -386,22 +462,22 @@ class VersionBased6Strategy(Strategy):
                     return Response(feedback, status=status.HTTP_404_NOT_FOUND)
 
                 feedback[harvester.name][HCCJC.STATUS] = response.text
-                response = requests.get(
-                    harvester.url + HarvesterApiConstantsV6.G_HARVESTED_DOCS,
+                response = harvester_request(
+                    'GET', harvester.url + HarvesterApiConstantsV6.G_HARVESTED_DOCS,
                     timeout=5)
                 feedback[harvester.name][HCCJC.CACHED_DOCS] = response.text
 
-                response = requests.get(
-                    harvester.url + HarvesterApiConstantsV6.G_DATA_PROVIDER,
+                response = harvester_request(
+                    'GET', harvester.url + HarvesterApiConstantsV6.G_DATA_PROVIDER,
                     timeout=5)
                 feedback[harvester.name][HCCJC.DATA_PROVIDER] = response.text
 
                 maxdoc_url = harvester.url + HarvesterApiConstantsV6.G_MAX_DOCS
-                response = requests.get(maxdoc_url, timeout=5)
+                response = harvester_request('GET', maxdoc_url, timeout=5)
                 feedback[harvester.name][HCCJC.MAX_DOCUMENTS] = response.text
 
                 health_url = harvester.url + HarvesterApiConstantsV6.G_HEALTH
-                response = requests.get(health_url, timeout=5)
+                response = harvester_request('GET', health_url, timeout=5)
                 feedback[harvester.name][HCCJC.HEALTH] = response.text
 
                 if feedback[harvester.name][
@@ -420,7 +496,7 @@ class VersionBased6Strategy(Strategy):
                     feedback[harvester.name][HCCJC.GUI_STATUS] = HCCJC.INFO
 
                 progress_url = harvester.url + HarvesterApiConstantsV6.G_PROGRESS
-                response = requests.get(progress_url, timeout=5)
+                response = harvester_request('GET', progress_url, timeout=5)
                 feedback[harvester.name][HCCJC.PROGRESS] = response.text
                 if response.status_code != status.HTTP_500_INTERNAL_SERVER_ERROR:
                     feedback[harvester.name][
@@ -437,7 +513,7 @@ class VersionBased6Strategy(Strategy):
                              int(response.text.split("/")[1])) * 100)
 
                 cron_url = harvester.url + HarvesterApiConstantsV6.GD_HARVEST_CRON
-                response = requests.get(cron_url, timeout=5)
+                response = harvester_request('GET', cron_url, timeout=5)
                 crontab = "Schedules:"
                 cron = response.text.find(crontab)
                 cronstring = response.text[cron + 11:cron + 11 + 9]
@@ -499,11 +575,11 @@ class VersionBased6Strategy(Strategy):
     def post_add_harvester_schedule(self, harvester, crontab):
         feedback = {}
         feedback[harvester.name] = {}
-        del_response = requests.delete(harvester.url +
-                                       HarvesterApiConstantsV6.GD_HARVEST_CRON,
-                                       timeout=5)
-        response = requests.post(
-            harvester.url + HarvesterApiConstantsV6.PD_HARVEST_CRON + crontab,
+        del_response = harvester_request('DELETE', harvester.url +
+                                         HarvesterApiConstantsV6.GD_HARVEST_CRON,
+                                         timeout=5)
+        response = harvester_request(
+            'POST', harvester.url + HarvesterApiConstantsV6.PD_HARVEST_CRON + crontab,
             timeout=5)
         feedback[harvester.name][
             HCCJC.HEALTH] = del_response.text + ', ' + response.text
@@ -513,21 +589,21 @@ class VersionBased6Strategy(Strategy):
         feedback = {}
         feedback[harvester.name] = {}
         if crontab:
-            response = requests.delete(
-                harvester.url + HarvesterApiConstantsV6.PD_HARVEST_CRON +
+            response = harvester_request(
+                'DELETE', harvester.url + HarvesterApiConstantsV6.PD_HARVEST_CRON +
                 crontab,
                 timeout=5)
             feedback[harvester.name][HCCJC.HEALTH] = response.text
         else:
-            response = requests.delete(harvester.url +
-                                       HarvesterApiConstantsV6.GD_HARVEST_CRON,
-                                       timeout=5)
+            response = harvester_request('DELETE', harvester.url +
+                                         HarvesterApiConstantsV6.GD_HARVEST_CRON,
+                                         timeout=5)
             feedback[harvester.name][HCCJC.HEALTH] = response.text
         return Response(feedback, status=response.status_code)
 
     def get_harvester_config(self, harvester):
         get_url = harvester.url + HarvesterApiConstantsV7.G_HARVEST_CONFIG
-        response = requests.get(get_url)
+        response = harvester_request('GET', get_url)
         feedback = {}
         feedback[harvester.name] = {}
         if response.status_code == status.HTTP_200_OK:
@@ -539,7 +615,7 @@ class VersionBased6Strategy(Strategy):
 
     def set_harvester_config(self, harvester, changes):
         set_url = harvester.url + HarvesterApiConstantsV7.P_HARVEST_CONFIG
-        response = requests.post(set_url, json=changes)
+        response = harvester_request('POST', set_url, json=changes)
         feedback = {}
         feedback[harvester.name] = {}
         if response.status_code == status.HTTP_200_OK:
@@ -559,6 +635,7 @@ class VersionBased7Strategy(Strategy):
     The algorithm/strategy implementation for the harvester
     library v7.x.x using the strategy interface.
     """
+    api_version = "7"
 
     def get_harvester_status(self, harvester):
         feedback, harvester_json = {}, {}
@@ -645,17 +722,18 @@ class VersionBased7Strategy(Strategy):
                         feedback[harvester.name][HCCJC.REMAIN_HARVEST_TIME] = \
                             harvester_json[HCCJC.REMAIN_HARVEST_TIME]
 
-                    # schedules
-                    cron_url = harvester.url + HarvesterApiConstantsV7.G_HARVEST_CRON
-                    response, harvester_json = a_response(
-                        harvester.name, cron_url, 'Get')
+                    # schedules, the ones stored in HCC (HCC_SCHEDULER) are set by the views
+                    if not settings.HCC_SCHEDULER:
+                        cron_url = harvester.url + HarvesterApiConstantsV7.G_HARVEST_CRON
+                        response, harvester_json = a_response(
+                            harvester.name, cron_url, 'Get')
 
-                    tasks = harvester_json.values()
-                    cronlist = list(tasks)[0]
-                    if not cronlist:
-                        feedback[harvester.name][HCCJC.CRONTAB] = HCCJC.NO_CRONTAB
-                    else:
-                        feedback[harvester.name][HCCJC.CRONTAB] = cronlist
+                        tasks = harvester_json.values()
+                        cronlist = list(tasks)[0]
+                        if not cronlist:
+                            feedback[harvester.name][HCCJC.CRONTAB] = HCCJC.NO_CRONTAB
+                        else:
+                            feedback[harvester.name][HCCJC.CRONTAB] = cronlist
 
             except RequestException as _e:
 
@@ -735,7 +813,7 @@ class VersionBased7Strategy(Strategy):
                 # Call etls instead of harvester_json["lastHarvestDate"],
                 # because it is updated faster.
                 get_url = harvester.url + HarvesterApiConstantsV7.STATE_HISTORY
-                etls = requests.get(get_url, timeout=5)
+                etls = harvester_request('GET', get_url, timeout=5)
                 if etls.status_code == status.HTTP_200_OK:
                     etls_data = json.loads(etls.text)
                     last = etls_data["overallInfo"]["stateHistory"][-1]
@@ -763,9 +841,9 @@ class VersionBased7Strategy(Strategy):
         feedback = {}
         feedback[harvester.name] = {}
         post_url = harvester.url + HarvesterApiConstantsV7.P_HARVEST_CRON
-        response = requests.post(post_url,
-                                 json={HCCJC.POSTCRONTAB: crontab},
-                                 timeout=5)
+        response = harvester_request('POST', post_url,
+                                     json={HCCJC.POSTCRONTAB: crontab},
+                                     timeout=5)
         harvester_response = json.loads(response.text)
         LOGGER.info("created schedule for %s with crontab %s", harvester.name,
                     crontab)
@@ -777,15 +855,15 @@ class VersionBased7Strategy(Strategy):
         feedback[harvester.name] = {}
         if not crontab:
             delall_cron_url = harvester.url + HarvesterApiConstantsV7.DALL_HARVEST_CRON
-            response = requests.post(delall_cron_url, timeout=5)
+            response = harvester_request('POST', delall_cron_url, timeout=5)
             harvester_response = json.loads(response.text)
             LOGGER.info("deleted all schedules for %s", harvester.name)
             feedback[harvester.name][HCCJC.HEALTH] = harvester_response
         else:
             delcron_url = harvester.url + HarvesterApiConstantsV7.D_HARVEST_CRON
-            response = requests.post(delcron_url,
-                                     json={HCCJC.POSTCRONTAB: crontab},
-                                     timeout=5)
+            response = harvester_request('POST', delcron_url,
+                                         json={HCCJC.POSTCRONTAB: crontab},
+                                         timeout=5)
             harvester_response = json.loads(response.text)
             LOGGER.info(
                 "deleted cron %s for harvester %s",
@@ -796,7 +874,7 @@ class VersionBased7Strategy(Strategy):
 
     def get_harvester_config(self, harvester):
         get_url = harvester.url + HarvesterApiConstantsV7.G_HARVEST_CONFIG
-        response = requests.get(get_url, timeout=5)
+        response = harvester_request('GET', get_url, timeout=5)
         feedback = {}
         feedback[harvester.name] = {}
         if response.status_code == status.HTTP_200_OK:
@@ -808,7 +886,7 @@ class VersionBased7Strategy(Strategy):
 
     def set_harvester_config(self, harvester, changes):
         set_url = harvester.url + HarvesterApiConstantsV7.P_HARVEST_CONFIG
-        response = requests.post(set_url, json=changes, timeout=5)
+        response = harvester_request('POST', set_url, json=changes, timeout=5)
         feedback = {}
         feedback[harvester.name] = {}
         feedback[harvester.name][HCCJC.HEALTH] = json.loads(response.text)
@@ -817,7 +895,7 @@ class VersionBased7Strategy(Strategy):
     def get_status_history(self, harvester):
         get_url = harvester.url + HarvesterApiConstantsV7.STATE_HISTORY
         try:
-            response = requests.get(get_url, timeout=5)
+            response = harvester_request('GET', get_url, timeout=5)
         except requests.exceptions.ReadTimeout:
             feedback = "server is not responding for harvester {}".format(harvester.name)
             return Response(feedback, status=response.status_code)
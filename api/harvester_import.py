@@ -0,0 +1,298 @@
+"""
+This module imports harvester definitions (e.g. an uploaded file) in bulk.
+"""
+import codecs
+import collections.abc
+import json
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.forms import BulkValidateFileForm
+from api.models import Harvester
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+# Get an instance of a logger
+LOGGER = logging.getLogger(__name__)
+
+REQUIRED_KEYS = ('name', 'notes', 'url', 'enabled')
+
+STRUCTURE_ERROR = (
+    'Upload failed. '
+    'File content was either wrong formatted or empty. '
+    'Must be a JSON array of objects with harvester data.'
+)
+
+
+class HarvesterImportError(Exception):
+    """An entry of the import could not be handled, nothing is saved."""
+
+
+def iter_json_array(file, read_size=64 * 1024, max_element_size=1024 * 1024):
+    """
+    Yield the elements of a JSON array from a (binary or text) file one by
+    one, reading only read_size characters at a time. Memory stays bounded
+    by the largest element (at most max_element_size characters), not by
+    the file. Raises HarvesterImportError as soon as the structure is broken.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer, position, eof = '', 0, False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = file.read(read_size)
+        if isinstance(chunk, bytes):
+            chunk = text_decoder.decode(chunk, final=not chunk)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def next_char():
+        """skip whitespace, return the next character or '' at the end"""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\n\r':
+                position += 1
+            if position < len(buffer) or eof:
+                return buffer[position:position + 1]
+            fill()
+
+    def error(reason):
+        return HarvesterImportError('{} ({})'.format(STRUCTURE_ERROR, reason))
+
+    fill()
+    if buffer.startswith('\ufeff'):
+        position = 1
+    if next_char() != '[':
+        raise error('expected "[" at the start')
+    position += 1
+    if next_char() == ']':
+        position += 1
+    else:
+        while True:
+            next_char()
+            while True:
+                try:
+                    element, end = decoder.raw_decode(buffer, position)
+                except ValueError as _e:
+                    if eof or len(buffer) - position > max_element_size:
+                        raise error(str(_e))
+                    fill()
+                    continue
+                # a number may continue in the next chunk
+                if end == len(buffer) and not eof:
+                    fill()
+                    continue
+                break
+            position = end
+            yield element
+            separator = next_char()
+            position += 1
+            if separator == ']':
+                break
+            if separator != ',':
+                raise error('expected "," or "]" after element')
+    if next_char() != '':
+        raise error('unexpected content after the array')
+
+
+class HarvesterImport:
+    """
+    Resolves harvester entries against the registry and saves them at once.
+
+    The registered harvesters that a list of entries names or whose urls
+    it uses are loaded with one query (see lookup), every entry is resolved
+    in memory (updates, renames to <name>_<n>, skips) and validated before
+    anything is written. save() writes all changes with bulk_create and
+    bulk_update in one transaction, run() does the same chunk by chunk for
+    a stream of entries, so memory is bounded by the chunk size and not by
+    the registry or the file.
+
+    Rules per entry (name and url are unique):
+    - known name, same url and enabled: skipped
+    - known name, same url: enabled is updated, notes never change
+    - known name, new url: created as <name>_<n> with the first free n,
+      skipped if the url is already taken
+    - new name, known url: skipped
+    - new name, new url: created
+    """
+
+    def __init__(self, owner, batch_size=500):
+        self.owner = owner
+        self.batch_size = batch_size
+        # the known harvesters of the current entries by name and their urls
+        self.harvesters = {}
+        self.urls = set()
+        self.to_create = []
+        self.to_update = {}
+        self.skipped = 0
+        self._created = 0
+        self._updated = 0
+        # base name -> names <base>_<n> in the database, loaded on the first rename
+        self._renamed = {}
+        # base name -> next suffix to try, names are only ever added
+        self._suffix_hints = {}
+
+    def lookup(self, entries):
+        """
+        Load the registered harvesters with the names or urls of entries,
+        replacing the ones loaded for earlier entries. Pending changes
+        have to be flushed before.
+        """
+        entries = [entry for entry in entries if isinstance(entry, collections.abc.Mapping)]
+        names = [entry['name'] for entry in entries if isinstance(entry.get('name'), str)]
+        urls = [entry['url'] for entry in entries if isinstance(entry.get('url'), str)]
+        harvesters = Harvester.objects.filter(Q(name__in=names) | Q(url__in=urls)) \
+            .only('id', 'name', 'url', 'enabled', 'notes') if names or urls else []
+        self.harvesters = {harvester.name: harvester for harvester in harvesters}
+        self.urls = {harvester.url for harvester in self.harvesters.values()}
+        self._renamed = {}
+        self._suffix_hints = {}
+
+    def add_all(self, entries):
+        """look up and resolve and validate a list of entries, see add"""
+        entries = list(entries)
+        self.lookup(entries)
+        for entry in entries:
+            self.add(entry)
+
+    def run(self, entries, chunk_size=500):
+        """
+        Resolve, validate and write entries (e.g. from iter_json_array)
+        chunk by chunk. Yields the number of processed entries after each
+        chunk. Run it inside transaction.atomic to keep the import
+        all-or-nothing.
+        """
+        processed = 0
+        chunk = []
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) == chunk_size:
+                processed += self._run_chunk(chunk)
+                chunk = []
+                yield processed
+        if chunk or not processed:
+            processed += self._run_chunk(chunk)
+            yield processed
+
+    def _run_chunk(self, chunk):
+        self.add_all(chunk)
+        self.flush()
+        return len(chunk)
+
+    def add(self, harvester_data):
+        """
+        Resolve and validate one entry.
+        Raises HarvesterImportError if the entry is malformed or invalid.
+        """
+        # the content should be a list of dictionaries
+        if not isinstance(harvester_data, collections.abc.Mapping):
+            raise HarvesterImportError(
+                'Validation failed. '
+                'File content could not been handled.'
+                'Should be a list of dictionaries!')
+
+        # each entry should contain the required harvester data
+        if not all(key in harvester_data for key in REQUIRED_KEYS):
+            raise HarvesterImportError(
+                'Validation failed. '
+                'Key missmatch! Required: name, notes, url, enabled')
+
+        data = {key: harvester_data[key] for key in REQUIRED_KEYS}
+        harvester = self.harvesters.get(data['name'])
+        if harvester is not None:
+            # Notes should not be updated
+            data['notes'] = harvester.notes
+            if harvester.url == data['url']:
+                if harvester.enabled == data['enabled']:
+                    self.skipped += 1
+                    return
+            elif data['url'] in self.urls:
+                # The url should be unique. Leave the existing harvester data
+                # and ignore the new one.
+                self.skipped += 1
+                return
+            else:
+                # Create new Harvester with new url and a free name
+                data['name'] = self._free_name(data['name'])
+                harvester = None
+        elif data['url'] in self.urls:
+            # The url should be unique. Leave the existing harvester data
+            # and ignore the new one
+            self.skipped += 1
+            return
+
+        is_new = harvester is None
+        if is_new:
+            harvester = Harvester(owner=self.owner)
+        form = BulkValidateFileForm(data, instance=harvester)
+        if not form.is_valid():
+            LOGGER.info("harvester import rejected %s: %s", data['name'], form.errors.as_text())
+            raise HarvesterImportError(
+                'Validation failed. '
+                'Content data could not been saved.')
+
+        # form.instance carries the cleaned values now
+        self.harvesters[harvester.name] = harvester
+        self.urls.add(harvester.url)
+        if is_new:
+            self.to_create.append(harvester)
+        elif harvester.pk is not None:
+            self.to_update[harvester.pk] = harvester
+        # else: created earlier in this import, the pending instance was updated
+
+    def _free_name(self, name):
+        taken = self._renamed.get(name)
+        if taken is None:
+            taken = self._renamed[name] = set(Harvester.objects.filter(
+                name__startswith=name + '_').values_list('name', flat=True))
+        counter = self._suffix_hints.get(name, 1)
+        candidate = '{}_{}'.format(name, counter)
+        while candidate in taken or candidate in self.harvesters:
+            counter += 1
+            candidate = '{}_{}'.format(name, counter)
+        self._suffix_hints[name] = counter + 1
+        return candidate
+
+    @property
+    def created(self):
+        """number of harvesters created so far"""
+        return self._created + len(self.to_create)
+
+    @property
+    def updated(self):
+        """number of harvester updates so far"""
+        return self._updated + len(self.to_update)
+
+    def flush(self):
+        """write the pending created and updated harvesters"""
+        now = timezone.now()
+        for harvester in self.to_update.values():
+            # bulk_update does not apply auto_now
+            harvester.date_modified = now
+        Harvester.objects.bulk_create(self.to_create, batch_size=self.batch_size)
+        Harvester.objects.bulk_update(
+            list(self.to_update.values()),
+            ['name', 'notes', 'url', 'enabled', 'date_modified'],
+            batch_size=self.batch_size)
+        self._created += len(self.to_create)
+        self._updated += len(self.to_update)
+        self.to_create = []
+        self.to_update = {}
+
+    def save(self):
+        """write all created and updated harvesters in one transaction"""
+        with transaction.atomic():
+            self.flush()
+        LOGGER.info("harvester import: %d created, %d updated, %d skipped",
+                    self.created, self.updated, self.skipped)
@@ -0,0 +1,130 @@
+"""
+Verify the third party assets of the GUI in api/static/vendor/ against the
+sha256 of settings.STATIC_VENDOR, fetch missing ones from their pinned
+origin (Google Fonts imports of fetched stylesheets are replaced by the
+vendored fonts of settings.STATIC_FONTS), and write the minified bundles
+(settings.STATIC_BUNDLES) into api/static/bundles/.
+
+Usage: python manage.py buildstatic
+       python manage.py collectstatic --no-input
+"""
+import hashlib
+import os
+import posixpath
+import re
+import urllib.request
+from urllib.error import URLError
+from urllib.parse import unquote_plus
+
+import rcssmin
+import rjsmin
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+SOURCE_MAP = re.compile(r'^\s*(//|/\*)# sourceMappingURL=.*$', re.MULTILINE)
+GOOGLE_FONTS = re.compile(
+    rb'@import url\(["\']?https://fonts\.googleapis\.com/css2?\?family=([^:&"\')]+)[^)]*\);?')
+FONT_FACE = ('@font-face{{font-family:"{family}";font-style:{style};font-weight:{weight};'
+             'font-display:swap;src:url({path}.woff2) format("woff2"),url({path}.woff) format("woff")}}')
+
+
+def local_fonts(name, content):
+    """
+    Replace the Google Fonts imports of the stylesheet name by @font-face
+    rules for the vendored fonts, with urls relative to the stylesheet.
+    """
+    def font_faces(match):
+        family = unquote_plus(match.group(1).decode())
+        if family not in settings.STATIC_FONTS:
+            raise CommandError('{} imports {} from Google Fonts, vendor it in STATIC_FONTS.'.format(
+                name, family))
+        return ''.join(
+            FONT_FACE.format(family=family, style=style, weight=weight,
+                             path=posixpath.relpath(path, posixpath.dirname(name)))
+            for style, weight, path in settings.STATIC_FONTS[family]).encode()
+    return GOOGLE_FONTS.sub(font_faces, content)
+
+
+def _fetch(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as target:
+        target.write(content)
+
+
+class Command(BaseCommand):
+    help = "Fetch the vendored static files and build the minified bundles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-download', action='store_true',
+                            help='do not fetch missing vendored files')
+        parser.add_argument('--output', default=os.path.join(apps.get_app_config('api').path, 'static'),
+                            help='static directory to write to (default: api/static)')
+
+    def handle(self, *args, **options):
+        self.output = options['output']
+        for name, (url, sha256) in settings.STATIC_VENDOR.items():
+            if self.vendor(name, url, sha256, download=not options['no_download']) \
+                    and options['verbosity']:
+                self.stdout.write('Fetched {}'.format(name))
+        for name, sources in settings.STATIC_BUNDLES.items():
+            self.bundle(name, sources)
+            if options['verbosity']:
+                self.stdout.write('Bundled {}'.format(name))
+
+    def vendor(self, name, url, sha256, download=True):
+        """
+        verify the vendored file name, fetch it from url if it is missing;
+        True if it was fetched
+        """
+        path = os.path.join(self.output, name)
+        fetched = not os.path.exists(path)
+        if not fetched:
+            with open(path, 'rb') as file:
+                content = file.read()
+        elif not download:
+            raise CommandError('{} is missing, fetch it from {}.'.format(name, url))
+        else:
+            try:
+                content = _fetch(url)
+            except (URLError, OSError) as _e:
+                raise CommandError('Could not fetch {}: {}'.format(url, _e))
+            if name.endswith('.css'):
+                content = local_fonts(name, content)
+        if hashlib.sha256(content).hexdigest() != sha256:
+            raise CommandError('{} of {} does not match its sha256.'.format(
+                name, url if fetched else path))
+        if fetched:
+            _write(path, content)
+        return fetched
+
+    def bundle(self, name, sources):
+        """concatenate and minify the sources of a bundle"""
+        parts = []
+        for source in sources:
+            path = finders.find(source)
+            if path is None:
+                path = os.path.join(self.output, source)
+            if not os.path.exists(path):
+                raise CommandError('{} of {} not found, fetch it first.'.format(source, name))
+            with open(path, encoding='utf-8') as file:
+                content = SOURCE_MAP.sub('', file.read())
+            if name.endswith('.css'):
+                parts.append(rcssmin.cssmin(content))
+            else:
+                # terminate every script, some do not end with a semicolon
+                parts.append(rjsmin.jsmin(content).rstrip().rstrip(';') + ';')
+        _write(os.path.join(self.output, name), '\n'.join(parts).encode('utf-8'))
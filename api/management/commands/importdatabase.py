@@ -0,0 +1,57 @@
+"""
+Copy all HCC data (users, tokens, harvesters, ...) from another database,
+e.g. the former db/db.sqlite3, into the configured database (DATABASE_URL).
+
+Usage: python manage.py migrate
+       python manage.py importdatabase sqlite:///db/db.sqlite3
+"""
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models.signals import post_save
+
+from api.models import create_auth_token
+from hcc_py.database import database_config
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+SOURCE = 'import_source'
+
+# rebuilt by migrate, or not worth to keep
+EXCLUDE = ['contenttypes', 'auth.permission', 'sessions', 'admin.logentry']
+
+
+class Command(BaseCommand):
+    help = "Copy all data from another database (URL) into the configured one."
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_url', nargs='?', default='sqlite:///db/db.sqlite3',
+                            help='database to copy from (default: sqlite:///db/db.sqlite3)')
+
+    def handle(self, *args, **options):
+        try:
+            connections.databases[SOURCE] = database_config(options['source_url'])
+        except ValueError as _e:
+            raise CommandError(str(_e))
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        # users in the dump bring their tokens, do not create new ones
+        post_save.disconnect(create_auth_token, sender=User)
+        try:
+            call_command('dumpdata', database=SOURCE, exclude=EXCLUDE, output=path,
+                         use_natural_foreign_keys=True, use_natural_primary_keys=True)
+            call_command('loaddata', path, database='default',
+                         verbosity=options['verbosity'])
+        finally:
+            post_save.connect(create_auth_token, sender=User)
+            connections[SOURCE].close()
+            os.remove(path)
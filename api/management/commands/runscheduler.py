@@ -0,0 +1,61 @@
+"""
+Run the HCC scheduler (api/scheduler.py): start harvesters by the crontabs
+stored in HCC (settings.HCC_SCHEDULER) and start queued harvesters when
+harvest slots get free (api/admission.py). Run it once per installation.
+
+Usage: python manage.py runscheduler
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from api import admission
+from api.scheduler import Scheduler, local_now
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+LOGGER = logging.getLogger('api.scheduler')
+
+
+class Command(BaseCommand):
+    help = "Start harvesters by the crontabs stored in HCC and from the admission queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='start the due and admitted harvesters and exit')
+
+    def handle(self, *args, **options):
+        if not settings.HCC_SCHEDULER and not admission.enabled():
+            raise CommandError('Nothing to do, set HCC_SCHEDULER=True or HARVEST_MAX_CONCURRENT.')
+        scheduler = Scheduler() if settings.HCC_SCHEDULER else None
+        if scheduler:
+            scheduler.load(local_now())
+        while True:
+            try:
+                if scheduler:
+                    scheduler.run_pending()
+                admission.dispatch()
+            except Exception:  # a failing check must not stop the scheduler
+                LOGGER.exception("HCC scheduler check failed.")
+            finally:
+                close_old_connections()
+            if options['once']:
+                return
+            time.sleep(self._seconds_to_wait(scheduler))
+
+    @staticmethod
+    def _seconds_to_wait(scheduler):
+        """until the next crontab fires, SCHEDULER_INTERVAL at most"""
+        wait = settings.SCHEDULER_INTERVAL
+        next_run = scheduler.next_run() if scheduler else None
+        if next_run is not None:
+            wait = min(wait, (next_run - local_now()).total_seconds())
+        return max(wait, 1)
@@ -0,0 +1,256 @@
+"""
+This module holds the HCC metrics (counters, gauges and histograms)
+and renders them in the Prometheus text exposition format.
+
+Metrics live in the memory of a process. With several gunicorn workers
+each worker exposes its own numbers.
+"""
+import bisect
+import collections
+import contextvars
+import threading
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+
+# the harvester call a view is currently doing, see HarvesterApiStrategy
+HarvesterCall = collections.namedtuple("HarvesterCall", ["harvester", "version", "operation"])
+CURRENT_CALL = contextvars.ContextVar("harvester_call", default=None)
+# the timings of the request currently handled, see ServerTimingMiddleware
+CURRENT_REQUEST = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """Base class of a labelled metric."""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError("{} expects the labels {}".format(self.name, self.labelnames))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """list of (suffix, label values, extra labels, value)"""
+        with self._lock:
+            return [("", key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        """the metric in the text exposition format"""
+        lines = ["# HELP {} {}".format(self.name, self.documentation),
+                 "# TYPE {} {}".format(self.name, self.kind)]
+        for suffix, key, extra, value in self.samples():
+            lines.append("{}{}{} {}".format(self.name, suffix,
+                                            _format_labels(self.labelnames, key, extra),
+                                            _format_value(value)))
+        return "\n".join(lines)
+
+    def clear(self):
+        """drop all samples"""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """A value which only goes up."""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        """increase the counter"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """the current value"""
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """A value which can go up and down."""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        """set the gauge"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels):
+        """the current value"""
+        return self._values.get(self._key(labels))
+
+
+class Histogram(Metric):
+    """Observations counted in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """record one observation, e.g. a duration in seconds"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            if index < len(self.buckets):
+                counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def get_count(self, **labels):
+        """number of observations"""
+        return self._values.get(self._key(labels), (None, 0.0, 0))[2]
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, (("le", _format_value(bound)),), cumulative))
+                samples.append(("_bucket", key, (("le", "+Inf"),), count))
+                samples.append(("_sum", key, (), total))
+                samples.append(("_count", key, (), count))
+        return samples
+
+
+class Registry:
+    """A collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = collections.OrderedDict()
+
+    def register(self, metric):
+        """add a metric, returns it"""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """all metrics in the text exposition format"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def clear(self):
+        """drop all samples, used by tests"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+class RequestTimings:
+    """
+    Collects the database and harvester time of a single request.
+    Harvester calls may be recorded from several threads.
+    """
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.harvester_calls = 0
+        self.harvester_seconds = 0.0
+        # harvester name -> [calls, seconds]
+        self.per_harvester = collections.defaultdict(lambda: [0, 0.0])
+        self._lock = threading.Lock()
+
+    def add_query(self, duration):
+        """record a database query"""
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += duration
+
+    def add_harvester_call(self, harvester, duration):
+        """record an HTTP call to a harvester"""
+        with self._lock:
+            self.harvester_calls += 1
+            self.harvester_seconds += duration
+            self.per_harvester[harvester][0] += 1
+            self.per_harvester[harvester][1] += duration
+
+
+REGISTRY = Registry()
+
+HARVESTER_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "hcc_harvester_request_duration_seconds",
+    "Duration of HTTP calls from HCC to harvesters.",
+    ["harvester", "version", "operation"]))
+HARVESTER_OPERATION_SECONDS = REGISTRY.register(Histogram(
+    "hcc_harvester_operation_duration_seconds",
+    "Duration of harvester API operations (may span several HTTP calls).",
+    ["harvester", "version", "operation"]))
+HARVESTER_ERRORS = REGISTRY.register(Counter(
+    "hcc_harvester_request_errors_total",
+    "Failed HTTP calls to harvesters by exception type or HTTP status code.",
+    ["harvester", "version", "operation", "exception", "status_code"]))
+VIEW_SECONDS = REGISTRY.register(Histogram(
+    "hcc_view_duration_seconds",
+    "Duration of HCC views by URL name.",
+    ["view", "method", "status_code"]))
+HARVESTED_COUNT = REGISTRY.register(Gauge(
+    "hcc_harvester_harvested_count",
+    "Documents harvested by a harvester, as last reported.",
+    ["harvester"]))
+MAX_DOCUMENTS = REGISTRY.register(Gauge(
+    "hcc_harvester_max_documents",
+    "Maximum number of documents of a harvester, as last reported.",
+    ["harvester"]))
+
+
+def _call_labels():
+    call = CURRENT_CALL.get()
+    if call is None:
+        return {"harvester": "", "version": "", "operation": ""}
+    return call._asdict()
+
+
+def observe_harvester_request(duration, status_code=None, exception=None):
+    """record an HTTP call to the harvester of the current call context"""
+    labels = _call_labels()
+    HARVESTER_REQUEST_SECONDS.observe(duration, **labels)
+    timings = CURRENT_REQUEST.get()
+    if timings is not None:
+        timings.add_harvester_call(labels["harvester"], duration)
+    if exception is not None:
+        HARVESTER_ERRORS.inc(exception=type(exception).__name__, status_code="", **labels)
+    elif status_code is not None and status_code >= 400:
+        HARVESTER_ERRORS.inc(exception="", status_code=status_code, **labels)
+
+
+def observe_documents(harvester, harvested=None, max_docs=None):
+    """update the document gauges of a harvester, ignores non numbers"""
+    for gauge, value in ((HARVESTED_COUNT, harvested), (MAX_DOCUMENTS, max_docs)):
+        try:
+            gauge.set(int(value), harvester=harvester)
+        except (TypeError, ValueError):
+            pass
@@ -0,0 +1,209 @@
+"""
+This module holds the HCC middlewares.
+"""
+import gzip
+import logging
+import re
+import time
+import zlib
+
+from django.conf import settings
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+
+from api import metrics, tracing
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+# requests slower than settings.SLOW_REQUEST_THRESHOLD go to log/slow.log
+SLOW_LOGGER = logging.getLogger('api.slow_requests')
+
+# text, json (coreapi, openapi, ndjson), javascript, xml and msgpack responses
+COMPRESSIBLE_TYPE = re.compile(
+    r'^(text/|application/([a-z.-]+\+|x-nd)?(json|javascript|xml|msgpack)\b)', re.IGNORECASE)
+
+
+class MetricsMiddleware:
+    """
+    Measures the duration of every view, labelled by its URL name
+    (see api/metrics.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        metrics.VIEW_SECONDS.observe(
+            time.perf_counter() - start,
+            view=match.view_name if match else 'unresolved',
+            method=request.method,
+            status_code=response.status_code)
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Measures total, database and harvester time of a request and adds them
+    as Server-Timing header, so they show up in the browser devtools.
+    Slow requests are logged with a breakdown per harvester.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = metrics.RequestTimings()
+        token = metrics.CURRENT_REQUEST.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._query_timer(timings)):
+                response = self.get_response(request)
+        finally:
+            metrics.CURRENT_REQUEST.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            'total;dur={:.1f}'.format(total * 1000),
+            'db;dur={:.1f};desc="{} queries"'.format(
+                timings.db_seconds * 1000, timings.db_queries),
+            'harvester;dur={:.1f};desc="{} calls"'.format(
+                timings.harvester_seconds * 1000, timings.harvester_calls),
+        ])
+        if total * 1000 >= settings.SLOW_REQUEST_THRESHOLD:
+            self._log_slow_request(request, total, timings)
+        return response
+
+    @staticmethod
+    def _query_timer(timings):
+        def execute(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timings.add_query(time.perf_counter() - start)
+        return execute
+
+    @staticmethod
+    def _log_slow_request(request, total, timings):
+        breakdown = sorted(timings.per_harvester.items(),
+                           key=lambda item: item[1][1], reverse=True)
+        SLOW_LOGGER.warning(
+            "%s %s took %.1f ms (db %.1f ms / %d queries, harvesters %.1f ms / %d calls)%s",
+            request.method, request.get_full_path(), total * 1000,
+            timings.db_seconds * 1000, timings.db_queries,
+            timings.harvester_seconds * 1000, timings.harvester_calls,
+            ''.join('\n    {}: {:.1f} ms ({} calls)'.format(name or '-', seconds * 1000, calls)
+                    for name, (calls, seconds) in breakdown))
+
+
+class TracingMiddleware:
+    """
+    Opens the root span of a request, all harvester spans of the request
+    become its children (see api/tracing.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with tracing.span('HTTP ' + request.method, **{
+                'http.method': request.method,
+                'url.path': request.path}) as span:
+            response = self.get_response(request)
+            if span is not None:
+                match = getattr(request, 'resolver_match', None)
+                if match:
+                    span.name = '{} {}'.format(request.method, match.view_name)
+                span.set_attribute('http.status_code', response.status_code)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of settings.COMPRESSION_MIN_SIZE bytes and more with
+    brotli or gzip, whichever the client accepts (brotli preferred), so clients
+    talking to gunicorn directly get compressed responses as well.
+    Streaming responses (e.g. the harvester export) are compressed per chunk.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or \
+                not COMPRESSIBLE_TYPE.match(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self._encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self._compress_sequence(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = self._compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # the compressed body is not byte-equal to the uncompressed one
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _encoding(accept_encoding):
+        """br or gzip if accepted (q > 0), None otherwise"""
+        accepted = set()
+        for value in accept_encoding.split(','):
+            coding, _, params = value.strip().partition(';')
+            quality = re.search(r'q=([0-9.]+)', params)
+            if not quality or float(quality.group(1)) > 0:
+                accepted.add(coding.strip().lower())
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    @staticmethod
+    def _compress(content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        return gzip.compress(content, settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+    @staticmethod
+    def _compress_sequence(sequence, encoding):
+        """compress and flush every chunk, the client gets them as they come"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            for chunk in sequence:
+                yield compressor.process(chunk) + compressor.flush()
+            yield compressor.finish()
+        else:
+            # wbits 31: zlib stream with gzip header and trailer
+            compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            for chunk in sequence:
+                yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield compressor.flush()
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.7 on 2019-12-02 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_auto_20190827_1447'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='harvester',
+            index=models.Index(fields=['enabled', 'name'], name='harvester_enabled_name_idx'),
+        ),
+    ]
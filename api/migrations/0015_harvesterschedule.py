@@ -0,0 +1,30 @@
+# Generated by Django 2.2.7 on 2019-12-16 09:30
+
+import api.crontab
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_harvester_enabled_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvesterSchedule',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crontab', models.CharField(max_length=100, validators=[api.crontab.validate_crontab])),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('harvester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                                related_name='schedules', to='api.Harvester')),
+            ],
+            options={
+                'ordering': ['harvester', 'crontab'],
+                'unique_together': {('harvester', 'crontab')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.7 on 2019-12-17 10:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_harvesterschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvestAdmission',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('host', models.CharField(max_length=255)),
+                ('date_queued', models.DateTimeField(auto_now_add=True)),
+                ('date_started', models.DateTimeField(blank=True, null=True)),
+                ('harvester', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE,
+                                                   related_name='admission', to='api.Harvester')),
+            ],
+            options={
+                'ordering': ['date_queued', 'id'],
+            },
+        ),
+    ]
@@ -7,9 +7,12 @@ from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from django.db import models
 from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
+from django.utils import timezone
 from rest_framework.authtoken.models import Token
 
+from api.crontab import validate_crontab
+
 __author__ = "Jan Frömberg"
 __copyright__ = "Copyright 2018, GeRDI Project"
 __credits__ = ["Jan Frömberg"]
@@ -18,6 +21,30 @@ __maintainer__ = "Jan Frömberg"
 __email__ = "jan.froemberg@tu-dresden.de"
 
 
+# Sent once per enable/disable operation with the names of the harvesters
+# whose enabled state changed. Caches and snapshots that depend on the
+# enabled state listen to it instead of post_save.
+enabled_changed = Signal(providing_args=['names', 'enabled'])
+
+
+class HarvesterQuerySet(models.QuerySet):
+    """QuerySet with bulk operations on harvesters."""
+
+    def set_enabled(self, enabled):
+        """
+        Enable or disable all harvesters of this queryset with a single
+        UPDATE of enabled and date_modified. Returns the names of the
+        harvesters that changed.
+        """
+        changed = dict(self.exclude(enabled=enabled).values_list('pk', 'name'))
+        names = list(changed.values())
+        if names:
+            # update() does not apply auto_now
+            self.filter(pk__in=changed).update(enabled=enabled, date_modified=timezone.now())
+            enabled_changed.send(sender=Harvester, names=names, enabled=enabled)
+        return names
+
+
 class Harvester(models.Model):
     """
     This class represents the Harvester model which is also used for serialization.
@@ -40,6 +67,8 @@ class Harvester(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
 
+    objects = HarvesterQuerySet.as_manager()
+
     # TODO: Preparation for future Harvester registration
     # harvester_token = models.CharField(max_length=255, blank=True)
     # harvester_user = models.CharField(max_length=255, blank=True)
@@ -47,22 +76,76 @@ class Harvester(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            # serves filter(enabled=...) ordered by name, and enabled alone
+            models.Index(fields=['enabled', 'name'], name='harvester_enabled_name_idx'),
+        ]
 
     def enable(self):
         """enable harvester"""
-        self.enabled = True
-        self.save()
+        self._set_enabled(True)
 
     def disable(self):
         """disbale harvester"""
-        self.enabled = False
-        self.save()
+        self._set_enabled(False)
+
+    def _set_enabled(self, enabled):
+        changed = self.enabled != enabled
+        self.enabled = enabled
+        # only write the changed columns, date_modified via auto_now
+        self.save(update_fields=['enabled', 'date_modified'])
+        if changed:
+            enabled_changed.send(sender=Harvester, names=[self.name], enabled=enabled)
 
     def __str__(self):
         """Return a human readable representation of the model instance."""
         return "{}".format(self.name)
 
 
+class HarvesterSchedule(models.Model):
+    """
+    A crontab of a harvester, started by the HCC scheduler (api/scheduler.py)
+    instead of the harvester itself if settings.HCC_SCHEDULER is on.
+    """
+    harvester = models.ForeignKey(Harvester,
+                                  related_name='schedules',
+                                  on_delete=models.CASCADE)
+    crontab = models.CharField(max_length=100, validators=[validate_crontab])
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['harvester', 'crontab']
+        unique_together = ['harvester', 'crontab']
+
+    def __str__(self):
+        """Return a human readable representation of the model instance."""
+        return "{}: {}".format(self.harvester.name, self.crontab)
+
+
+class HarvestAdmission(models.Model):
+    """
+    A start of a harvester passed through the admission control
+    (api/admission.py): queued until date_started is set, then holding a
+    harvest slot until the harvester is done.
+    """
+    harvester = models.OneToOneField(Harvester,
+                                     related_name='admission',
+                                     on_delete=models.CASCADE)
+    # the host of the harvester url, for the limit per host
+    host = models.CharField(max_length=255)
+    date_queued = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['date_queued', 'id']
+
+    def __str__(self):
+        """Return a human readable representation of the model instance."""
+        return "{}: {}".format(self.harvester.name,
+                               'started' if self.date_started else 'queued')
+
+
 @receiver(post_save, sender=User)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     """ This receiver handles token creation immediately a new user is created."""
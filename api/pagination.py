@@ -0,0 +1,22 @@
+"""
+This module holds the pagination of the v1 API lists.
+"""
+from rest_framework.pagination import CursorPagination
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+class HarvesterCursorPagination(CursorPagination):
+    """
+    Pages through harvesters by name: ?cursor=<next link>&page_size=50.
+    The name is unique and indexed (together with enabled), so every page
+    is one index range scan, however deep the client pages.
+    """
+    ordering = 'name'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,41 @@
+"""
+This module holds the additional renderers of the v1 API.
+
+Clients choose a renderer by its media type, e.g.
+    curl -H 'Accept: application/msgpack' .../v1/harvesters/status
+The MessagePack renderer is optional and only registered when the msgpack
+package is installed (see REST_FRAMEWORK in settings.py).
+"""
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # the renderer is not registered without msgpack
+    msgpack = None
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders the response data as MessagePack, a binary JSON that is smaller
+    and faster to parse for machine clients polling the API.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    # dates, decimals, uuids, ... the way the JSONRenderer writes them
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.encoder.default, use_bin_type=True)
@@ -1,31 +1,132 @@
-# import schedule
-# import time
+"""
+This module holds the HCC scheduler. If settings.HCC_SCHEDULER is on, the
+crontabs of the harvesters are stored in HCC (HarvesterSchedule) and
+"python manage.py runscheduler" starts the harvesters, which works for
+harvesters that can not schedule themselves (BaseStrategy) as well.
+
+The next fire times of all crontabs are kept in a min-heap, a check only
+looks at the crontabs that are due. Due harvesters are started through the
+admission control (api/admission.py), which queues them while the limit of
+concurrent harvests is reached, so a shared backend is not flooded at
+midnight.
+"""
+import heapq
+import logging
+
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from rest_framework import status
+
+from api import admission
+from api.constants import HCCJSONConstants as HCCJC
+from api.crontab import CronTab
+from api.models import Harvester, HarvesterSchedule
 
 __author__ = "Jan Frömberg"
 __copyright__ = "Copyright 2018, GeRDI Project"
 __credits__ = ["Jan Frömberg"]
-__license__ = "Apache"
+__license__ = "Apache 2.0"
 __maintainer__ = "Jan Frömberg"
 __email__ = "jan.froemberg@tu-dresden.de"
 
+LOGGER = logging.getLogger(__name__)
 
-def job():
-    print("poll the harvester api...")
 
+def local_now():
+    """the local wall clock time, crontabs are evaluated in it"""
+    return timezone.localtime().replace(tzinfo=None)
 
-# schedule.every(10).minutes.do(job)
-# schedule.every().hour.do(job)
-# schedule.every().day.at("10:30").do(job)
-# schedule.every(5).to(10).minutes.do(job)
-# schedule.every().monday.do(job)
 
-# schedule.every().wednesday.at("13:15").do(job)
+def add_schedules(statuses):
+    """
+    Set the crontabs stored in HCC and the next harvest date as "cron" and
+    "nextHarvestDate" of the harvester statuses (keyed by name).
+    """
+    crontabs = {}
+    for name, crontab in HarvesterSchedule.objects.filter(
+            harvester__name__in=list(statuses)).values_list('harvester__name', 'crontab'):
+        crontabs.setdefault(name, []).append(crontab)
+    now = local_now()
+    for name, feedback in statuses.items():
+        if not isinstance(feedback, dict):
+            continue
+        feedback[HCCJC.CRONTAB] = crontabs.get(name, HCCJC.NO_CRONTAB)
+        if name in crontabs:
+            feedback[HCCJC.NEXT_HARVEST_DATE] = min(
+                CronTab(crontab).next_after(now) for crontab in crontabs[name]).isoformat()
+    return statuses
 
 
-# while True:
-#     schedule.run_pending()
-#     time.sleep(1)
+class Scheduler:
+    """Custom Scheduler class to handle timed events: harvests by crontab."""
 
+    def __init__(self):
+        # (next fire time, schedule id, harvester name, crontab)
+        self._heap = []
+        self._signature = None
+        # time of the last check, crontabs (re)loaded later fire from here on
+        self._checked = None
 
-class Scheduler:
-    """Custom Scheduler class to handle timed events."""
+    def load(self, now):
+        """(re)build the heap from the crontabs of the enabled harvesters"""
+        self._signature = self._current_signature()
+        self._checked = now
+        self._heap = []
+        for schedule in HarvesterSchedule.objects.filter(
+                harvester__enabled=True).select_related('harvester'):
+            try:
+                crontab = CronTab(schedule.crontab)
+                self._heap.append((crontab.next_after(now), schedule.pk,
+                                   schedule.harvester.name, crontab))
+            except ValueError as _e:
+                LOGGER.warning("%s: %s", schedule.harvester.name, _e)
+        heapq.heapify(self._heap)
+        LOGGER.info("HCC scheduler loaded %d crontabs.", len(self._heap))
+
+    @staticmethod
+    def _current_signature():
+        """changes whenever a crontab is added or deleted or a harvester changes"""
+        schedules = HarvesterSchedule.objects.aggregate(
+            count=Count('id'), modified=Max('date_modified'))
+        harvesters = Harvester.objects.aggregate(
+            count=Count('id', filter=Q(enabled=True)), modified=Max('date_modified'))
+        return (schedules['count'], schedules['modified'],
+                harvesters['count'], harvesters['modified'])
+
+    def next_run(self):
+        """the next fire time of all crontabs, None without crontabs"""
+        return self._heap[0][0] if self._heap else None
+
+    def due(self, now):
+        """the names of the harvesters due until now, their crontabs move on"""
+        self._checked = now
+        names = []
+        while self._heap and self._heap[0][0] <= now:
+            _, pk, name, crontab = heapq.heappop(self._heap)
+            heapq.heappush(self._heap, (crontab.next_after(now), pk, name, crontab))
+            if name not in names:
+                names.append(name)
+        return names
+
+    def run_pending(self, now=None):
+        """
+        Start the due harvesters through the admission control. Returns the
+        names of the harvesters started or queued.
+        """
+        now = now or local_now()
+        if self._signature != self._current_signature():
+            self.load(self._checked or now)
+        due = self.due(now)
+        if not due:
+            return []
+        harvesters = list(Harvester.objects.filter(name__in=due, enabled=True))
+        started = []
+        for harvester, response in zip(harvesters, admission.start(harvesters)):
+            if status.is_success(response.status_code):
+                LOGGER.info("%s harvester started by the HCC scheduler: %s",
+                            harvester.name, response.data[harvester.name])
+                started.append(harvester.name)
+            else:
+                LOGGER.warning("%s harvester could not be started by the HCC scheduler: %s",
+                               harvester.name, response.data)
+        return started
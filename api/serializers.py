@@ -26,6 +26,14 @@ class HarvesterSerializer(serializers.ModelSerializer):
                   'url', 'date_created', 'date_modified')
         read_only_fields = ('date_created', 'date_modified')
 
+    def __init__(self, *args, **kwargs):
+        # fields=('name', 'enabled') limits the output to these fields
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 
 class UserSerializer(serializers.ModelSerializer):
     """A user serializer to aid in authentication and authorization."""
@@ -0,0 +1,184 @@
+"""
+This module keeps what HCC last learned about a harvester in the Django cache:
+
+* the library version (6 or 7), so InitHarvester does not ask /versions
+  before every call,
+* snapshots of the last status and progress response and the harvester
+  state they reported, e.g. to skip polling harvesters that are idle,
+* the config shown in the config form, so saving it does not fetch it again.
+  A version token of the config travels with the form and tells whether
+  the snapshot is still the config the user edited.
+
+Snapshots are dropped when a harvester is started, stopped, reset, enabled
+or disabled through HCC and expire after settings.SNAPSHOT_TTL otherwise.
+Every change of the state increments the snapshot version of a harvester.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from api.constants import HCCJSONConstants as HCCJC
+from api.models import enabled_changed
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+STATUS = 'status'
+PROGRESS = 'progress'
+KINDS = (STATUS, PROGRESS)
+CONFIG = 'config'
+
+IDLE_STATES = (HCCJC.IDLE, HCCJC.IDLE_OLD, 'idling')
+BUSY_STATES = (HCCJC.HARV, HCCJC.INIT, 'queued', 'submitting')
+
+
+def _key(name, kind):
+    return 'hcc:snapshot:{}:{}'.format(kind, name)
+
+
+def _state_key(name):
+    return 'hcc:state:{}'.format(name)
+
+
+def _version_key(name):
+    return 'hcc:snapshot-version:{}'.format(name)
+
+
+def _library_key(name):
+    return 'hcc:library-version:{}'.format(name)
+
+
+def get_library_version(harvester):
+    """the cached library version of a harvester, None if unknown"""
+    known = cache.get(_library_key(harvester.name))
+    # the version belongs to the url it was asked from
+    if known is not None and known[0] == harvester.url:
+        return known[1]
+    return None
+
+
+def set_library_version(harvester, version):
+    """remember a library version, only 6 and 7 are worth to keep"""
+    if version in (6, 7):
+        cache.set(_library_key(harvester.name), (harvester.url, version),
+                  settings.HARVESTER_VERSION_TTL)
+
+
+def state_of(feedback):
+    """the lower case harvester state of a status or progress feedback"""
+    if not isinstance(feedback, dict):
+        return ''
+    return str(feedback.get(HCCJC.STATE) or feedback.get(HCCJC.STATUS) or '').lower()
+
+
+def is_idle(state):
+    """True for the idle states of v6 and v7 harvesters"""
+    return state in IDLE_STATES
+
+
+def is_busy(state):
+    """True for the states of a harvest that is not over yet"""
+    return state in BUSY_STATES
+
+
+def record(name, kind, feedback):
+    """remember a status or progress feedback of a harvester"""
+    state = state_of(feedback)
+    previous = cache.get(_state_key(name))
+    cache.set_many({_key(name, kind): feedback, _state_key(name): state},
+                   settings.SNAPSHOT_TTL)
+    if state != previous:
+        _increment_version(name)
+
+
+def get(name, kind):
+    """the last status or progress feedback of a harvester, None if unknown"""
+    return cache.get(_key(name, kind))
+
+
+def get_many(names, kind):
+    """the last status or progress feedbacks of the harvesters, keyed by name"""
+    known = cache.get_many([_key(name, kind) for name in names])
+    return {name: known[_key(name, kind)] for name in names
+            if _key(name, kind) in known}
+
+
+def states(names):
+    """the last known states of the harvesters, keyed by name"""
+    known = cache.get_many([_state_key(name) for name in names])
+    return {name: known[_state_key(name)] for name in names
+            if _state_key(name) in known}
+
+
+def version(name):
+    """the snapshot version of a harvester, changes with its state"""
+    return cache.get(_version_key(name), 0)
+
+
+def versions(names):
+    """the snapshot versions of the harvesters, keyed by name"""
+    known = cache.get_many([_version_key(name) for name in names])
+    return {name: known.get(_version_key(name), 0) for name in names}
+
+
+def config_token(config):
+    """the version token of a harvester config"""
+    content = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode()).hexdigest()[:12]
+
+
+def record_config(name, config):
+    """remember the config of a harvester, returns its version token"""
+    token = config_token(config)
+    cache.set(_key(name, CONFIG), (token, config), settings.CONFIG_SNAPSHOT_TTL)
+    return token
+
+
+def get_config(name, token=None):
+    """
+    The last known config of a harvester, None if unknown or, given a version
+    token, if the config changed since.
+    """
+    known = cache.get(_key(name, CONFIG))
+    if known is None or (token is not None and known[0] != token):
+        return None
+    return known[1]
+
+
+def forget_config(name):
+    """drop the config snapshot of a harvester, e.g. after saving its config"""
+    cache.delete(_key(name, CONFIG))
+
+
+def forget(names, library_versions=False):
+    """drop the snapshots (and library versions) of the harvesters"""
+    keys = [_key(name, kind) for name in names for kind in KINDS + (CONFIG,)]
+    keys += [_state_key(name) for name in names]
+    if library_versions:
+        keys += [_library_key(name) for name in names]
+    cache.delete_many(keys)
+    for name in names:
+        _increment_version(name)
+
+
+def _increment_version(name):
+    key = _version_key(name)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted in between
+        cache.set(key, 1, None)
+
+
+@receiver(enabled_changed, dispatch_uid='api.snapshots')
+def forget_enabled_changed(sender, names, enabled, **kwargs):
+    """a disabled harvester has no status, an enabled one a new one"""
+    forget(names, library_versions=True)
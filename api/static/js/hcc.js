@@ -132,8 +132,7 @@ $(function () {
                     btnhvstatus.classList.add("btn-" + obj.gui_status);
                 }
                 if (obj.status) {
-                    var lbl_status = document.getElementById('lbl-harvester-status-' + key);
-                    lbl_status.innerHTML = obj.status;
+                    $('.harvester-status-' + key).text(obj.status);
                 }
                 if (obj.cached_docs) {
                     vlabels.push(key);
@@ -145,10 +144,10 @@ $(function () {
                     bcarray.push('rgba(' + r + ',' + g + ',' + b + ',0.4)');
                 }
                 if (obj.health != 'OK') {
-                    $('#health-exclamation-' + key).show();
-                    $('#health-exclamation-' + key).prop('title', obj.health);
+                    $('.health-exclamation-' + key).show();
+                    $('.health-exclamation-' + key).attr('data-original-title', obj.health);
                 } else {
-                    $('#health-exclamation-' + key).hide();
+                    $('.health-exclamation-' + key).hide();
                 }
                 if (obj.status == 'harvesting') {
                     //$( '#progresshv-' + key ).show();
@@ -248,16 +247,11 @@ $(function () {
         // id is btn-(viewtype)-view
         var viewtype = $(this).attr('id').split('-')[1];
 
-        // set global viewtype variables
-        listView = viewtype === 'list';
-        cardView = viewtype === 'card';
-        tableView = viewtype === 'table';
-
-        updateSession('viewtype', viewtype);
-
-        // actually change the viewtype and check for filter
-        toggleViews();
-        filterFunction();
+        // only the active view is rendered by the server,
+        // reload the page once the session knows the new one
+        updateSession('viewtype', viewtype, function () {
+            window.location.reload();
+        });
     });
 
     $(".harvesteredit").click(function (ev) { // for each edit harvester url
@@ -285,6 +279,8 @@ $(function () {
             type: $(this).attr('method'),
             url: $(this).attr('action'),
             data: serializedData,
+            // the form is part of a cached harvester card, without a token
+            headers: { 'X-CSRFToken': getCookie('csrftoken') },
             context: this,
             success: function (response) {
                 $('#message-modal-header').text(response.status == 'Ok' ? 'Success!' : 'Error');
@@ -330,12 +326,12 @@ $(function () {
             // changing from light to dark theme
             theme = 'dark';
             $('#toggle-theme-text').text("Light Theme");
-            $('#toggle-theme-link').attr("href", "https://bootswatch.com/4/darkly/bootstrap.min.css");
+            $('#toggle-theme-link').attr("href", $('#toggle-theme-link').data('dark'));
         } else {
             // changing from dark to light theme
             theme = 'light';
             $('#toggle-theme-text').text("Dark Theme");
-            $('#toggle-theme-link').attr("href", "https://bootswatch.com/4/materia/bootstrap.min.css");
+            $('#toggle-theme-link').attr("href", $('#toggle-theme-link').data('light'));
         }
 
         $('.navbar').toggleClass("light-theme-bg dark-theme-bg");
@@ -353,134 +349,281 @@ $(function () {
 $(window).ready(function () {
 
     getStatusHistories();
+    loadStatuses();
 
-    // milisec to hours, min, sec
-    var timeConvert = function (milis) {
-        var milisec = milis;
-        var rseconds = Math.floor((milisec / 1000) % 60);
-        var rminutes = Math.floor((milisec / (1000 * 60)) % 60);
-        var rhours = Math.round((milisec / (1000 * 60 * 60)) % 24);
-        var rdays = Math.round(milisec / (1000 * 60 * 60 * 24));
-        
-        if (rdays == 0 && rhours == 0 && rminutes == 0) {
-            return rseconds + "sec";
-        } else if (rdays == 0 && rhours == 0) {
-            return rminutes + "min " + rseconds + "sec";
-        } else if (rdays == 0) {
-            return rhours + "h " + rminutes + "min " + rseconds + "sec";
-        } else {
-            return rdays + "d" + rhours + "h " + rminutes + "min " + rseconds + "sec";
-        }
-    };
+});
 
-    var lbl_status = document.querySelectorAll('*[id^="lbl-harvester-status-"]');
-    var lblarray = Array.from(lbl_status);
-    if (lblarray.length > 0) {
-        for (var key in lblarray) {
+/*
+   Status of the enabled harvesters, loaded in batches after the page is shown
+*/
 
-            var obj = lblarray[key];
-            var objid = obj.id;
-            var me = objid.split('-')[3];
+// number of harvesters per status request
+var STATUS_BATCH_SIZE = 10;
+var sumHarvested = 0;
 
-            if (obj.innerText == 'harvesting' || obj.innerText == 'queued') {
+// progress of running harvesters, polled for all of them in one request
+var PROGRESS_INTERVAL = 1982;
+var PROGRESS_HIDDEN_INTERVAL = 30000;
+var progressNames = [];
+var progressTimer = null;
 
-                var is = $('#progresshv-' + me);
-                is.addClass("progress-bar-animated");
-                is.removeClass("progress-bar-grey");
-                var remember = is.attr("title");
-                var progressid = setInterval( getProgress, 1982, remember, me );
-            }
-        }
+function loadStatuses() {
+    /*
+    The page only holds the harvester registry. This function requests the
+    status of all enabled harvesters in batches and fills in every view
+    as soon as a batch arrives.
+    */
+    var list = document.getElementById('harvesterList');
+    if (list == null) return;
+
+    var url = $(list).attr('data-status-url');
+    var names = [];
+    $('[data-harvester]').each(function () {
+        var name = $(this).attr('data-harvester');
+        if (!names.includes(name)) names.push(name);
+    });
+    if (names.length == 0) {
+        $('#sum-harvested').text(0);
     }
+    for (var i = 0; i < names.length; i += STATUS_BATCH_SIZE) {
+        loadStatusBatch(url, names.slice(i, i + STATUS_BATCH_SIZE));
+    }
+}
 
-    function getProgress(_url, _harv) {
-        
-        var bar = $( '#progresshv-' + _harv);
-        var timelabel = $( '#status-label-' + _harv);
-        var statuslabel = $( '#lbl-harvester-status-' + _harv);
-        var btnhvstatus = document.getElementById('btn-harvester-status-' + _harv);
-        var width = parseInt(bar[0].innerText.replace('%', ''));
-        var state = statuslabel[0].innerText;
-        var perc = "%";
-        var remain, elapsed, activated;
-        var time = 0;
-        var time_string = "";
-        var start, now;
-
-        if (state == 'harvesting' || state == 'queued' || typeof state == "undefined") {
-
-            var request = $.ajax({
-                url: _url,
-                headers: {
-                    "Access-Control-Allow-Origin": "*"
-                },
-                xhrFields: {
-                    withCredentials: true
-                },
-                dataType: 'json',
-                method: 'GET'
+function loadStatusBatch(url, names) {
+    $.get(url, { names: names.join(',') }, function (result) {
+        for (var key in result) {
+            showStatus(key, result[key]);
+        }
+    }).fail(function () {
+        names.forEach(function (name) {
+            showStatus(name, {
+                gui_status: 'warning',
+                health: 'waiting for the server to respond...'
             });
+        });
+    });
+}
 
-            request.done(function (data) {
-                for (var key in data) {
-
-                    width = data[key].progress_cur;
-                    remain = data[key].remainingHarvestTime;
-                    elapsed = data[key].lastHarvestDate;
-                    activated = data[key].lastActivated;
-                    max = data[key].max_docs;
-                    cache = data[key].progress;
-                    state = data[key].state;
-
-                    $('#btn-harvester-status-' + key).attr('data-original-title',
-                        cache + ' of ' + max);
-                    $('.harvester-status-' + _harv).html(state);
-
-                    // referenced by context, this
-                    bar.css("width", width + "%");
-                    if (max === "N/A") {
-                        perc = "";
-                    }
-                    if (typeof remain !== "undefined") {
-                        time = timeConvert(remain);
-                        time_string = 'remaining time: ' + time;
-                        timelabel.html( time_string );
-                    } else if (typeof elapsed !== "undefined") {
-                        start = new Date(elapsed);
-                        now = new Date();
-                        time = timeConvert(now - start);
-                        time_string = 'current runtime: ' + time;
-                        timelabel.html( time_string );
-                    } else if (typeof activated !== "undefined") {
-                        start = new Date(activated);
-                        now = new Date();
-                        time = timeConvert(now - start);
-                        time_string = 'waiting for harvest: ' + time;
-                        timelabel.html( time_string );
-                    }
-                    bar.html(width + perc);
-                }
-            });
-            request.fail( function(data) {
-                timelabel.html("waiting for the server to respond...");
-            });
+function showStatus(name, val) {
+    /*
+    Fills the list, card and table view of a harvester with its status.
+    */
+    var state = val.status || '';
+    var running = state == 'harvesting' || state == 'submitting' || state == 'queued';
+
+    $('.harvester-status-' + name).text(state);
+    $('#hv-status-' + name).text(JSON.stringify(val));
+    $('#table-info-button-' + name).attr('data-original-title', JSON.stringify(val));
+
+    $('#list-item-' + name)
+        .addClass('list-group-item-' + val.gui_status)
+        .attr('data-original-title', val.health);
+
+    var btnhvstatus = $('#btn-harvester-status-' + name);
+    btnhvstatus.removeClass('btn-secondary').addClass('btn-' + val.gui_status);
+    if (val.data_pvd) {
+        var title = val.data_pvd;
+        if (val.cached_docs) {
+            title += ' harvested and cached Documents: ' + val.cached_docs;
+            if (val.max_docs) title += ' of ' + val.max_docs;
+            title += '.';
+        }
+        if (val.lastHarvestDate) title += ' Last harvest: ' + val.lastHarvestDate;
+        btnhvstatus.attr('data-original-title', title);
+    }
 
-        } else {
+    var bar = $('#progresshv-' + name);
+    if (typeof val.progress_cur !== 'undefined') {
+        bar.css('width', val.progress_cur + '%');
+        bar.attr('aria-valuenow', val.progress_cur);
+        bar.attr('aria-valuemax', val.max_docs);
+        bar.text(val.progress_cur + (val.max_docs !== 'N/A' ? '%' : ''));
+    }
+    bar.toggle(val.gui_status != 'warning');
+
+    $('.harvester-stop-' + name).toggle(running);
+    $('.harvester-start-' + name).toggle(state == 'idle' || state == 'idling');
+
+    if (val.nextHarvestDate || val.cron && val.cron != 'no crontab defined yet' &&
+        val.cron != 'cron not supported. basic mode.') {
+        $('#cron-icon-' + name)
+            .attr('data-original-title', 'next harvest: ' + val.nextHarvestDate +
+                ' with crontab ' + val.cron)
+            .show();
+    }
+    if (val.cron) {
+        var cron = Array.isArray(val.cron) && val.cron.length > 0 ? val.cron[0] : val.cron;
+        $('#crontab-form-' + name).show().find('input[type=text]').attr('placeholder', cron);
+    }
+
+    $('.health-exclamation-' + name)
+        .toggle(val.health != 'OK')
+        .attr('data-original-title', val.health);
+
+    if (val.cached_docs) {
+        sumHarvested += parseInt(val.cached_docs);
+    }
+    $('#sum-harvested').text(sumHarvested);
 
-            bar.removeClass("progress-bar-animated");
-            bar.addClass("progress-bar-grey");
+    if (state == 'harvesting' || state == 'queued') {
+        watchProgress(name);
+    }
+}
+
+/*
+   Progress of running harvesters
+*/
+
+// milisec to hours, min, sec
+function timeConvert(milis) {
+    var milisec = milis;
+    var rseconds = Math.floor((milisec / 1000) % 60);
+    var rminutes = Math.floor((milisec / (1000 * 60)) % 60);
+    var rhours = Math.round((milisec / (1000 * 60 * 60)) % 24);
+    var rdays = Math.round(milisec / (1000 * 60 * 60 * 24));
+    
+    if (rdays == 0 && rhours == 0 && rminutes == 0) {
+        return rseconds + "sec";
+    } else if (rdays == 0 && rhours == 0) {
+        return rminutes + "min " + rseconds + "sec";
+    } else if (rdays == 0) {
+        return rhours + "h " + rminutes + "min " + rseconds + "sec";
+    } else {
+        return rdays + "d" + rhours + "h " + rminutes + "min " + rseconds + "sec";
+    }
+}
+
+function watchProgress(name) {
+    /*
+    Adds a harvester to the progress poller.
+    */
+    if (progressNames.includes(name)) return;
+    progressNames.push(name);
+
+    var bar = $('#progresshv-' + name);
+    bar.addClass("progress-bar-animated");
+    bar.removeClass("progress-bar-grey");
+    scheduleProgress();
+}
+
+function unwatchProgress(name) {
+    /*
+    Removes a harvester from the progress poller.
+    */
+    var index = progressNames.indexOf(name);
+    if (index !== -1) progressNames.splice(index, 1);
+}
+
+function scheduleProgress() {
+    /*
+    Schedules the next poll, slower while the page is hidden.
+    Only one poll is scheduled or running at any time.
+    */
+    if (progressTimer !== null || progressNames.length == 0) return;
+    var delay = document.hidden ? PROGRESS_HIDDEN_INTERVAL : PROGRESS_INTERVAL;
+    progressTimer = setTimeout(pollProgress, delay);
+}
+
+function pollProgress() {
+    /*
+    Requests the progress of all watched harvesters at once.
+    */
+    var list = document.getElementById('harvesterList');
+    var names = progressNames.slice();
+    progressTimer = 'polling';
+
+    $.ajax({
+        url: $(list).attr('data-progress-url'),
+        data: { names: names.join(',') },
+        dataType: 'json',
+        method: 'GET'
+    }).done(function (data) {
+        for (var key in data) {
+            showProgress(key, data[key]);
+        }
+        // disabled or deleted harvesters are not answered, stop polling them
+        names.forEach(function (name) {
+            if (!(name in data)) {
+                unwatchProgress(name);
+                $('#progresshv-' + name).removeClass("progress-bar-animated");
+            }
+        });
+    }).fail(function () {
+        names.forEach(function (name) {
+            $('#status-label-' + name).html("waiting for the server to respond...");
+        });
+    }).always(function () {
+        progressTimer = null;
+        scheduleProgress();
+    });
+}
+
+function showProgress(_harv, progress) {
+
+    var bar = $( '#progresshv-' + _harv);
+    var timelabel = $( '#status-label-' + _harv);
+    var btnhvstatus = document.getElementById('btn-harvester-status-' + _harv);
+    var width = progress.progress_cur;
+    var remain = progress.remainingHarvestTime;
+    var elapsed = progress.lastHarvestDate;
+    var activated = progress.lastActivated;
+    var max = progress.max_docs;
+    var state = progress.state;
+    var perc = max === "N/A" ? "" : "%";
+    var start, now;
+
+    if (state == 'harvesting' || state == 'queued') {
+
+        $('#btn-harvester-status-' + _harv).attr('data-original-title',
+            progress.progress + ' of ' + max);
+        $('.harvester-status-' + _harv).html(state);
+
+        bar.css("width", width + "%");
+        if (typeof remain !== "undefined") {
+            timelabel.html( 'remaining time: ' + timeConvert(remain) );
+        } else if (typeof elapsed !== "undefined") {
+            start = new Date(elapsed);
+            now = new Date();
+            timelabel.html( 'current runtime: ' + timeConvert(now - start) );
+        } else if (typeof activated !== "undefined") {
+            start = new Date(activated);
+            now = new Date();
+            timelabel.html( 'waiting for harvest: ' + timeConvert(now - start) );
+        }
+        bar.html(width + perc);
+
+    } else {
+
+        // the harvest is over, stop polling this harvester
+        unwatchProgress(_harv);
+        if (typeof width !== "undefined") {
             bar.css("width", width + "%");
-            bar.html(width + '%');
+            bar.html(width + perc);
+        }
+        bar.removeClass("progress-bar-animated");
+        bar.addClass("progress-bar-grey");
+        if (btnhvstatus) {
             btnhvstatus.classList.toggle( "btn-info", false );
             btnhvstatus.classList.toggle( "btn-primary", false );
             btnhvstatus.classList.add( "btn-success" );
-            timelabel.html( "" );
-            statuslabel.html("finished");
-            clearInterval(progressid);
-            
         }
+        timelabel.html( "" );
+        $('.harvester-status-' + _harv).html(state == 'idle' ? "finished" : state);
+        $('.harvester-stop-' + _harv).hide();
+        $('.harvester-start-' + _harv).toggle(state == 'idle');
+
     }
+}
 
+document.addEventListener('visibilitychange', function () {
+    // poll at once when the page is shown again, instead of waiting
+    // for the slow interval of the hidden page
+    if (!document.hidden && progressTimer !== null && progressTimer !== 'polling') {
+        clearTimeout(progressTimer);
+        progressTimer = null;
+        pollProgress();
+    }
 });
 
 /*
@@ -557,27 +700,17 @@ function filterFunction() {
 
 function toggleViews() {
     /*
-    Toggles between list, card and table view when page is loaded
-    or a button is clicked.
+    Marks the button of the active view (list, card or table) when the
+    page is loaded. The server renders the active view only.
     */
 
     // declare variables
-    var listDiv, listBtn, cardDiv, cardBtn, tableDiv, tableBtn;
-
-    // get all needed divs/buttons
-    listDiv = document.getElementById("div-list-view");
-    cardDiv = document.getElementById("div-card-view");
-    tableDiv = document.getElementById("div-table-view");
-    if (listDiv == null) return;
+    var listBtn, cardBtn, tableBtn;
 
     listBtn = document.getElementById("btn-list-view");
     cardBtn = document.getElementById("btn-card-view");
     tableBtn = document.getElementById("btn-table-view");
-
-    // only show active view
-    listDiv.style.display = listView ? "" : "none";
-    cardDiv.style.display = cardView ? "" : "none";
-    tableDiv.style.display = tableView ? "" : "none";
+    if (listBtn == null) return;
 
     // only show buttons for inactive views
     if (listView) {
@@ -797,10 +930,10 @@ function getCookie(cookieName) {
     return "";
 }
 
-function updateSession(sessionVar, value) {
+function updateSession(sessionVar, value, done) {
     /*
     This function sends a post request to the server to change
-    the session variable with the given input.
+    the session variable with the given input and calls done afterwards.
     */
     var csrftoken = getCookie('csrftoken');
     sessionData = {
@@ -814,6 +947,7 @@ function updateSession(sessionVar, value) {
         data: sessionData,
         success: function (response) {},
         error: function () {},
+        complete: done,
     });
 }
 
@@ -825,12 +959,12 @@ function toggleTheme() {
     if (currentTheme === 'light') {
         // changing from light to dark Theme
         $('#toggle-theme-text').text("Light Theme");
-        $('#toggle-theme-link').attr("href", "https://bootswatch.com/4/darkly/bootstrap.min.css");
+        $('#toggle-theme-link').attr("href", $('#toggle-theme-link').data('dark'));
         newTheme = 'dark';
     } else {
         // changing from dark to light Theme
         $('#toggle-theme-text').text("Dark Theme");
-        $('#toggle-theme-link').attr("href", "https://bootswatch.com/4/materia/bootstrap.min.css");
+        $('#toggle-theme-link').attr("href", $('#toggle-theme-link').data('light'));
         newTheme = 'light‚';
     }
     currentTheme = newTheme;
@@ -0,0 +1,59 @@
+"""
+This module holds the static files storage of production builds.
+
+collectstatic stores every file under a fingerprinted name
+(hcc.min.3f2a9c1e0b7d.js, see ManifestStaticFilesStorage) and adds gzip and
+brotli compressed variants (.gz/.br) next to the text files. nginx serves
+them with gzip_static/brotli_static and far-future, immutable caching.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # the .br variants are optional
+    brotli = None
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+COMPRESS_EXTENSIONS = ('.css', '.js', '.map', '.json', '.svg', '.txt',
+                       '.eot', '.otf', '.ttf', '.ico')
+
+# smaller files do not get smaller
+COMPRESS_MIN_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprinted static files with precompressed variants."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESS_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        """write name.gz (and name.br) if they are smaller than the file"""
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        if len(content) < COMPRESS_MIN_SIZE:
+            return
+        variants = {'.gz': gzip.compress(content, 9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(content):
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
@@ -0,0 +1,61 @@
+"""
+Template tags of the HCC GUI.
+"""
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from api.forms import SchedulerForm
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+register = template.Library()
+
+
+@register.simple_tag
+def scheduler_form(name):
+    """
+    The crontab form of a harvester. Built by the template, so a cached
+    harvester card does not build it at all.
+    """
+    return SchedulerForm(prefix=name)
+
+
+@lru_cache(maxsize=None)
+def _vendored(path):
+    return finders.find(path) is not None
+
+
+@register.simple_tag
+def vendor_static(path):
+    """
+    The url of a vendored static file. Falls back to its pinned origin
+    (settings.STATIC_VENDOR) as long as buildstatic did not fetch it, e.g.
+    after a version bump.
+    """
+    if not settings.STATIC_BUNDLED and path in settings.STATIC_VENDOR and not _vendored(path):
+        return settings.STATIC_VENDOR[path][0]
+    return static(path)
+
+
+@register.simple_tag
+def static_bundle(name):
+    """
+    The script or stylesheet tags of a bundle (settings.STATIC_BUNDLES):
+    the minified bundle in production, its single files otherwise.
+    """
+    paths = [name] if settings.STATIC_BUNDLED else settings.STATIC_BUNDLES[name]
+    if name.endswith('.css'):
+        tag = '<link rel="stylesheet" href="{}">'
+    else:
+        tag = '<script src="{}"></script>'
+    return format_html_join('\n', tag, ((vendor_static(path),) for path in paths))
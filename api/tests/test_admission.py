@@ -0,0 +1,147 @@
+"""
+Testing Module for admission.py
+"""
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+
+from api import admission, snapshots
+from api.constants import HCCJSONConstants as HCCJC
+from api.models import HarvestAdmission, Harvester
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+def _started(harvester):
+    return Response({harvester.name: {HCCJC.HEALTH: 'started'}}, status=status.HTTP_200_OK)
+
+
+def _idle(harvester):
+    return Response({harvester.name: {HCCJC.STATE: HCCJC.IDLE}}, status=status.HTTP_200_OK)
+
+
+@override_settings(HARVEST_MAX_CONCURRENT=2, HARVEST_START_GRACE=0)
+@patch('api.admission._status', side_effect=_idle)
+@patch('api.admission._start', side_effect=_started)
+class AdmissionTests(TestCase):
+    """Test suite for the queue and the limits of concurrent harvests."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="AdmissionUser")
+        self.harvesters = [
+            Harvester.objects.create(name='Harvester{}'.format(number), owner=self.user,
+                                     url='http://host{}.url/v{}'.format(number % 2, number),
+                                     enabled=True)
+            for number in range(4)]
+
+    def _queued(self):
+        return list(HarvestAdmission.objects.filter(
+            date_started__isnull=True).values_list('harvester__name', flat=True))
+
+    @override_settings(HARVEST_MAX_CONCURRENT=0)
+    def test_without_limit_harvesters_start_directly(self, start, harvester_status):
+        responses = admission.start(self.harvesters)
+        self.assertEqual([response.status_code for response in responses], [200] * 4)
+        self.assertEqual(start.call_count, 4)
+        self.assertFalse(HarvestAdmission.objects.exists())
+
+    def test_starts_beyond_the_limit_are_queued(self, start, harvester_status):
+        responses = admission.start(self.harvesters)
+        self.assertEqual([response.status_code for response in responses],
+                         [200, 200, 202, 202])
+        self.assertEqual(responses[3].data['Harvester3'][HCCJC.HEALTH],
+                         'queued, 1 harvesters start before')
+        self.assertEqual(self._queued(), ['Harvester2', 'Harvester3'])
+        # a queued harvester is not queued twice
+        for harvester in self.harvesters[:2]:
+            snapshots.record(harvester.name, snapshots.STATUS, {HCCJC.STATE: HCCJC.HARV})
+        admission.start(self.harvesters[2:3])
+        self.assertEqual(self._queued(), ['Harvester2', 'Harvester3'])
+        self.assertEqual(start.call_count, 2)
+
+    @override_settings(HARVEST_MAX_CONCURRENT=0, HARVEST_MAX_CONCURRENT_PER_HOST=1)
+    def test_limit_per_host(self, start, harvester_status):
+        for harvester in self.harvesters:
+            snapshots.record(harvester.name, snapshots.STATUS, {HCCJC.STATE: HCCJC.HARV})
+        admission.start(self.harvesters)
+        self.assertEqual(self._queued(), ['Harvester2', 'Harvester3'])
+        harvester_status.assert_not_called()
+
+    def test_done_harvesters_free_their_slots(self, start, harvester_status):
+        snapshots.record('Harvester0', snapshots.STATUS, {HCCJC.STATE: HCCJC.HARV})
+        admission.start(self.harvesters)
+        self.assertEqual(self._queued(), ['Harvester2', 'Harvester3'])
+        # Harvester0 is still busy, Harvester1 is asked and idle
+        snapshots.record('Harvester0', snapshots.STATUS, {HCCJC.STATE: HCCJC.HARV})
+        started = admission.dispatch()
+        self.assertEqual(list(started), ['Harvester2'])
+        self.assertEqual(self._queued(), ['Harvester3'])
+        self.assertEqual(start.call_count, 3)
+
+    def test_concurrent_dispatches_start_each_harvester_once(self, start, harvester_status):
+        """Test that a dispatch reading the queue before another one claimed it starts nothing"""
+        HarvestAdmission.objects.bulk_create(
+            [HarvestAdmission(harvester=harvester, host=admission.host_of(harvester))
+             for harvester in self.harvesters])
+        read_queue = admission._admissions
+        other = {}
+
+        def stale_queue():
+            admissions = read_queue()
+            if 'started' not in other:
+                # the other dispatcher runs between the read and the claims
+                other['started'] = None
+                other['started'] = admission.dispatch()
+            return admissions
+
+        with patch('api.admission._admissions', side_effect=stale_queue):
+            started = admission.dispatch()
+        self.assertEqual(list(other['started']), ['Harvester0', 'Harvester1'])
+        self.assertEqual(started, {})
+        self.assertEqual(start.call_count, 2)
+        self.assertEqual(self._queued(), ['Harvester2', 'Harvester3'])
+
+    def test_polled_statuses_dispatch_the_queue(self, start, harvester_status):
+        admission.start(self.harvesters)
+        with patch('api.admission.dispatch') as dispatch:
+            admission.statuses_polled({'Harvester2': {HCCJC.STATE: HCCJC.IDLE}})
+            dispatch.assert_not_called()
+            admission.statuses_polled({'Harvester0': {HCCJC.STATE: HCCJC.IDLE}})
+            dispatch.assert_called_once_with()
+
+    def test_failed_start_frees_the_slot(self, start, harvester_status):
+        start.side_effect = lambda harvester: Response(
+            {harvester.name: 'start not supported'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        responses = admission.start(self.harvesters[:1])
+        self.assertEqual(responses[0].status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertFalse(HarvestAdmission.objects.exists())
+
+    def test_start_all_view_queues_harvesters(self, start, harvester_status):
+        token = Token.objects.get(user=self.user)
+        response = self.client.post(reverse('api:run-harvesters'),
+                                    HTTP_AUTHORIZATION='Token ' + token.key)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['Harvester0'], {HCCJC.HEALTH: 'started'})
+        self.assertIn('queued', response.json()['Harvester3'][HCCJC.HEALTH])
+
+    def test_progress_poller_dispatches_the_queue(self, start, harvester_status):
+        """Test that the progress poll of a harvester done harvesting admits the next one"""
+        admission.start(self.harvesters)
+        self.client.force_login(self.user)
+        with patch('api.views_v2._harvester_progress',
+                   return_value={HCCJC.STATE: HCCJC.IDLE}), \
+                patch('api.admission.dispatch') as dispatch:
+            self.client.get(reverse('harvesters-progress'), {'names': 'Harvester0'})
+        dispatch.assert_called_once_with()
@@ -0,0 +1,54 @@
+"""
+Testing Module for executor.py
+"""
+import contextvars
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from api.executor import run_concurrently
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+VALUE = contextvars.ContextVar("value", default=None)
+
+
+class RunConcurrentlyTests(SimpleTestCase):
+    """Test suite for the concurrent harvester calls."""
+
+    def test_results_keep_the_order(self):
+        """Test that results come back in the order of the items"""
+        def call(delay):
+            time.sleep(delay)
+            return delay, threading.current_thread().name
+        results = run_concurrently(call, [0.05, 0.0, 0.02])
+        self.assertEqual([delay for delay, _ in results], [0.05, 0.0, 0.02])
+        self.assertTrue(all(name.startswith('hcc-harvester') for _, name in results))
+
+    def test_context_is_propagated(self):
+        """Test that the tasks see the context of the caller"""
+        token = VALUE.set('request')
+        try:
+            self.assertEqual(run_concurrently(lambda item: VALUE.get(), [1, 2]),
+                             ['request', 'request'])
+        finally:
+            VALUE.reset(token)
+
+    def test_errors_are_raised(self):
+        """Test that a failing call is re-raised after all calls finished"""
+        done = []
+
+        def call(item):
+            if item == 1:
+                raise ValueError('broken')
+            time.sleep(0.02)
+            done.append(item)
+        with self.assertRaises(ValueError):
+            run_concurrently(call, [1, 2, 3])
+        self.assertEqual(sorted(done), [2, 3])
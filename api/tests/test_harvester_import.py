@@ -0,0 +1,126 @@
+"""
+Testing Module for harvester_import.py
+"""
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from api.harvester_import import (HarvesterImport, HarvesterImportError,
+                                  iter_json_array)
+from api.models import Harvester
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+def entry(name, url, enabled=False, notes=""):
+    """a harvester entry as in an uploaded file"""
+    return {"name": name, "notes": notes, "url": url, "enabled": enabled}
+
+
+class HarvesterImportTests(TestCase):
+    """Test suite for the bulk harvester import."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="ImportUser")
+        Harvester.objects.create(name='Harvester1', owner=self.user,
+                                 url='http://somewhere.url/v1', notes='keep')
+
+    def test_query_count_does_not_grow_with_entries(self):
+        """Test that a large import needs a constant number of queries"""
+        entries = [entry('Harvester1', 'http://somewhere.url/v1', enabled=True)]
+        entries += [entry('New{}'.format(i), 'http://new.url/{}'.format(i))
+                    for i in range(300)]
+        entries += [entry('Harvester1', 'http://other.url/{}'.format(i))
+                    for i in range(50)]
+        # lookup, renamed names, savepoint, insert, update, release
+        with self.assertNumQueries(6):
+            importer = HarvesterImport(self.user)
+            importer.add_all(entries)
+            importer.save()
+        self.assertEqual(Harvester.objects.count(), 351)
+        self.assertTrue(Harvester.objects.get(name='Harvester1').enabled)
+        self.assertEqual(Harvester.objects.get(name='Harvester1_50').notes, 'keep')
+
+    def test_renames_use_the_first_free_suffix(self):
+        """Test that renamed harvesters skip names taken in the database or the import"""
+        Harvester.objects.create(name='Harvester1_2', owner=self.user, url='http://two.url')
+        importer = HarvesterImport(self.user)
+        importer.add_all([entry('Harvester1', 'http://a.url'),
+                          entry('Harvester1', 'http://b.url'),
+                          entry('Harvester1', 'http://b.url')])
+        importer.save()
+        self.assertEqual(Harvester.objects.get(url='http://a.url').name, 'Harvester1_1')
+        self.assertEqual(Harvester.objects.get(url='http://b.url').name, 'Harvester1_3')
+        self.assertEqual(importer.skipped, 1)
+
+    def test_invalid_entry_saves_nothing(self):
+        """Test that one invalid entry rejects the whole import"""
+        importer = HarvesterImport(self.user)
+        with self.assertRaises(HarvesterImportError):
+            importer.add_all([entry('Valid', 'http://valid.url'),
+                              entry('not valid!', 'http://invalid.url')])
+        self.assertEqual(Harvester.objects.count(), 1)
+
+
+class IterJsonArrayTests(TestCase):
+    """Test suite for the streaming JSON array parser."""
+
+    def parse(self, text, read_size=4):
+        """parse text in tiny chunks to hit every chunk border"""
+        return list(iter_json_array(io.BytesIO(text.encode()), read_size=read_size))
+
+    def test_elements_across_chunks(self):
+        """Test that elements split over many reads are decoded"""
+        entries = [entry('Hä{}'.format(i), 'http://x.url/{}'.format(i)) for i in range(20)]
+        self.assertEqual(self.parse(json.dumps(entries)), entries)
+        self.assertEqual(self.parse(' [ 12345 , 6 ] '), [12345, 6])
+        self.assertEqual(self.parse('[]'), [])
+
+    def test_structural_errors(self):
+        """Test that broken structure is reported"""
+        for text in ('', '{"name": "x"}', '[{"name": "x"} {"name": "y"}]',
+                     '[{"name": "x"},', '[1] 2', '[{"name": x}]'):
+            with self.assertRaises(HarvesterImportError, msg=text):
+                self.parse(text)
+
+    def test_error_is_raised_before_reading_everything(self):
+        """Test that a broken element stops the import before the rest is read"""
+        upload = io.BytesIO(b'[{"name": "x"}, oops' + b' ' * 10 ** 6 + b']')
+        elements = iter_json_array(upload, read_size=16, max_element_size=64)
+        self.assertEqual(next(elements), {"name": "x"})
+        with self.assertRaises(HarvesterImportError):
+            next(elements)
+        self.assertLess(upload.tell(), 1024)
+
+    def test_chunked_import(self):
+        """Test that run() writes chunk by chunk and reports progress"""
+        user = User.objects.create(username="ChunkUser")
+        entries = [entry('New{}'.format(i), 'http://new.url/{}'.format(i)) for i in range(5)]
+        entries.append(entry('New0', 'http://new.url/0', enabled=True))
+        importer = HarvesterImport(user)
+        self.assertEqual(list(importer.run(iter(entries), chunk_size=2)), [2, 4, 6])
+        self.assertEqual((importer.created, importer.updated), (5, 1))
+        self.assertTrue(Harvester.objects.get(name='New0').enabled)
+
+    def test_chunks_look_up_the_registry(self):
+        """Test that every chunk sees the harvesters written by the chunks before"""
+        user = User.objects.create(username="ChunkUser")
+        Harvester.objects.create(name='Old', owner=user, url='http://old.url')
+        entries = [entry('Old', 'http://a.url'), entry('New', 'http://b.url'),
+                   entry('Old', 'http://c.url'), entry('Other', 'http://b.url'),
+                   entry('New', 'http://b.url', enabled=True)]
+        importer = HarvesterImport(user)
+        self.assertEqual(list(importer.run(iter(entries), chunk_size=2)), [2, 4, 5])
+        self.assertLessEqual(len(importer.harvesters), 2)
+        self.assertEqual(Harvester.objects.get(url='http://a.url').name, 'Old_1')
+        self.assertEqual(Harvester.objects.get(url='http://c.url').name, 'Old_2')
+        self.assertFalse(Harvester.objects.filter(name='Other').exists())
+        self.assertTrue(Harvester.objects.get(name='New').enabled)
+        self.assertEqual((importer.created, importer.updated, importer.skipped), (3, 1, 1))
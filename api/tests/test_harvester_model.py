@@ -1,9 +1,13 @@
 """
 Testing Module for the model "Harvester"
 """
+from unittest.mock import patch
+
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from api.forms import HarvesterForm
 from api.models import Harvester
@@ -74,6 +78,30 @@ class ModelTestCase(TestCase):
         self.harvester.disable()
         self.assertFalse(self.harvester.enabled)
 
+    def test_enable_writes_only_enabled_and_date_modified(self):
+        """Test that enable() updates two columns and announces the change once"""
+        with patch('api.models.enabled_changed.send') as send:
+            with CaptureQueriesContext(connection) as queries:
+                self.harvester.enable()
+                self.harvester.enable()
+        update = queries.captured_queries[0]['sql']
+        self.assertIn('"enabled"', update)
+        self.assertIn('"date_modified"', update)
+        self.assertNotIn('"url"', update)
+        send.assert_called_once_with(sender=Harvester, names=[self.name], enabled=True)
+
+    def test_queryset_set_enabled(self):
+        """Test that set_enabled changes all harvesters with one UPDATE"""
+        Harvester.objects.create(name='Harvester2', owner=self.user,
+                                 url='http://somewhere.url/v2', enabled=True)
+        before = Harvester.objects.get(name=self.name).date_modified
+        with patch('api.models.enabled_changed.send') as send:
+            self.assertEqual(Harvester.objects.all().set_enabled(True), [self.name])
+        send.assert_called_once_with(sender=Harvester, names=[self.name], enabled=True)
+        harvester = Harvester.objects.get(name=self.name)
+        self.assertTrue(harvester.enabled)
+        self.assertGreater(harvester.date_modified, before)
+
     def test_regex_validator_works(self):
         """Test if the regex validator works"""
         self.harvester.name = "bad-name"
@@ -0,0 +1,90 @@
+"""
+Testing Module for metrics.py and the metrics endpoint
+"""
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from requests.exceptions import ConnectTimeout
+
+from api import metrics
+from api.harvester_api_strategy import (HarvesterApiStrategy,
+                                        VersionBased7Strategy)
+from api.models import Harvester
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+class MetricsTests(TestCase):
+    """Test suite for the HCC metrics."""
+
+    def setUp(self):
+        metrics.REGISTRY.clear()
+        self.user = User.objects.create(username="MetricsUser")
+        self.harvester = Harvester.objects.create(
+            name='Harvester1', owner=self.user, url='http://somewhere.url/v1', enabled=True)
+        self.api = HarvesterApiStrategy(self.harvester, VersionBased7Strategy())
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test the text exposition of a histogram"""
+        histogram = metrics.Histogram('test_seconds', 'A test.', ['view'], buckets=(0.1, 1))
+        histogram.observe(0.05, view='home')
+        histogram.observe(0.5, view='home')
+        text = histogram.render()
+        self.assertIn('# TYPE test_seconds histogram', text)
+        self.assertIn('test_seconds_bucket{view="home",le="0.1"} 1.0', text)
+        self.assertIn('test_seconds_bucket{view="home",le="1.0"} 2.0', text)
+        self.assertIn('test_seconds_bucket{view="home",le="+Inf"} 2.0', text)
+        self.assertIn('test_seconds_count{view="home"} 2.0', text)
+
+    @patch('requests.request')
+    def test_outbound_calls_are_labelled(self, request_mock):
+        """Test that HTTP calls are measured per harvester, version and operation"""
+        request_mock.return_value = MagicMock(
+            status_code=500, text='{"status": "error", "message": "fail"}')
+        self.api.start_harvest()
+        labels = dict(harvester='Harvester1', version='7', operation='start')
+        self.assertEqual(metrics.HARVESTER_REQUEST_SECONDS.get_count(**labels), 1)
+        self.assertEqual(metrics.HARVESTER_OPERATION_SECONDS.get_count(**labels), 1)
+        self.assertEqual(
+            metrics.HARVESTER_ERRORS.get(exception='', status_code=500, **labels), 1)
+
+    @patch('requests.request', side_effect=ConnectTimeout('timeout'))
+    def test_exceptions_are_counted(self, request_mock):
+        """Test that failed HTTP calls are counted by exception type"""
+        self.api.harvester_log()
+        self.assertEqual(metrics.HARVESTER_ERRORS.get(
+            harvester='Harvester1', version='7', operation='log',
+            exception='ConnectTimeout', status_code=''), 1)
+
+    @patch('requests.request')
+    def test_progress_sets_document_gauges(self, request_mock):
+        """Test that the harvested count and max docs gauges are updated"""
+        request_mock.return_value = MagicMock(
+            status_code=200,
+            text='{"harvestedCount": 5, "maxDocumentCount": 10, "state": "HARVESTING", '
+                 '"remainingHarvestTime": 100}')
+        self.api.harvester_progress()
+        self.assertEqual(metrics.HARVESTED_COUNT.get(harvester='Harvester1'), 5)
+        self.assertEqual(metrics.MAX_DOCUMENTS.get(harvester='Harvester1'), 10)
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics serves the text format including view timings"""
+        self.client.get('/metrics')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertIn(b'hcc_view_duration_seconds_count{view="metrics",method="GET",'
+                      b'status_code="200"} 1.0', response.content)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_token(self):
+        """Test that a configured token protects /metrics"""
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,99 @@
+"""
+Testing Module for middleware.py
+"""
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import brotli
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.models import Harvester
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    """Test suite for the ServerTimingMiddleware."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="TimingUser")
+        self.client.force_login(self.user)
+        Harvester.objects.create(
+            name='Harvester1', owner=self.user, url='http://somewhere.url/v1', enabled=True)
+
+    def test_server_timing_header(self):
+        """Test that total, db and harvester timings are sent"""
+        response = self.client.get('/hcc/edit/Harvester1')
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertRegex(timing, r'db;dur=[0-9.]+;desc="[1-9][0-9]* queries"')
+        self.assertIn('harvester;dur=0.0;desc="0 calls"', timing)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD=0)
+    @patch('requests.request')
+    def test_slow_request_log(self, request_mock):
+        """Test that slow requests are logged with a breakdown per harvester"""
+        request_mock.return_value = MagicMock(
+            status_code=200,
+            text='{"value": ["x", "RestfulHarvester-Library-7.1.0"], '
+                 '"harvestedCount": 5, "maxDocumentCount": 10, "state": "IDLE", '
+                 '"remainingHarvestTime": 100}')
+        with self.assertLogs('api.slow_requests', level='WARNING') as logs:
+            response = self.client.get('/hcc/Harvester1/progress')
+        self.assertIn('harvester;dur=', response['Server-Timing'])
+        self.assertIn('desc="2 calls"', response['Server-Timing'])
+        self.assertIn('GET /hcc/Harvester1/progress took', logs.output[0])
+        self.assertIn('Harvester1:', logs.output[0])
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTests(TestCase):
+    """Test suite for the CompressionMiddleware."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="CompressionUser")
+        self.client.force_login(self.user)
+        # the harvester list authenticates by token
+        self.token = 'Token ' + Token.objects.get(user=self.user).key
+        for number in range(10):
+            Harvester.objects.create(
+                name='Harvester{}'.format(number), owner=self.user,
+                url='http://somewhere.url/v{}'.format(number))
+
+    def _list(self, accept_encoding):
+        return self.client.get('/v1/harvesters/', HTTP_AUTHORIZATION=self.token,
+                               HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_gzip(self):
+        response = self._list('gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 10)
+
+    def test_brotli_is_preferred(self):
+        response = self._list('gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(brotli.decompress(response.content))['results']), 10)
+
+    def test_refused_and_small_responses_stay_uncompressed(self):
+        response = self._list('gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(json.loads(response.content)['results']), 10)
+        response = self.client.get('/v1/harvesters/Harvester1/', HTTP_AUTHORIZATION=self.token,
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response(self):
+        response = self.client.get('/hcc/saveharvesters?format=ndjson', HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        lines = brotli.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 10)
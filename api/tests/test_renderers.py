@@ -0,0 +1,38 @@
+"""
+Testing Module for renderers.py
+"""
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from api.models import Harvester
+from api.renderers import msgpack
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackRendererTests(TestCase):
+    """Test suite for the MessagePackRenderer."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="MessagePackUser")
+        self.token = 'Token ' + Token.objects.get(user=self.user).key
+        Harvester.objects.create(name='Harvester1', owner=self.user, url='http://somewhere.url/v1')
+
+    def test_accept_msgpack(self):
+        response = self.client.get('/v1/harvesters/', HTTP_AUTHORIZATION=self.token, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(data['results'][0]['name'], 'Harvester1')
+
+    def test_json_stays_default(self):
+        response = self.client.get('/v1/harvesters/', HTTP_AUTHORIZATION=self.token, HTTP_ACCEPT='application/json')
+        self.assertEqual(response['Content-Type'], 'application/json')
@@ -0,0 +1,142 @@
+"""
+Testing Module for crontab.py, scheduler.py and the schedules stored in HCC
+"""
+import datetime
+import urllib
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.constants import HCCJSONConstants as HCCJC
+from api.crontab import CronTab, validate_crontab
+from api.forms import SchedulerForm
+from api.models import HarvestAdmission, Harvester, HarvesterSchedule
+from api.scheduler import Scheduler, add_schedules
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+# a monday
+MONDAY = datetime.datetime(2019, 12, 16, 10, 30)
+
+
+def _started(harvester):
+    return Response({harvester.name: {HCCJC.HEALTH: 'ok'}}, status=status.HTTP_200_OK)
+
+
+class CronTabTests(TestCase):
+    """Test suite for the crontab parser."""
+
+    def test_next_after(self):
+        self.assertEqual(CronTab('0 0 * * *').next_after(MONDAY),
+                         datetime.datetime(2019, 12, 17, 0, 0))
+        self.assertEqual(CronTab('*/15 * * * *').next_after(MONDAY),
+                         datetime.datetime(2019, 12, 16, 10, 45))
+        self.assertEqual(CronTab('30 10 * * *').next_after(MONDAY),
+                         datetime.datetime(2019, 12, 17, 10, 30))
+        self.assertEqual(CronTab('0 8 * jan sat').next_after(MONDAY),
+                         datetime.datetime(2020, 1, 4, 8, 0))
+        self.assertEqual(CronTab('@monthly').next_after(MONDAY),
+                         datetime.datetime(2020, 1, 1, 0, 0))
+
+    def test_day_and_weekday_fire_on_either(self):
+        """Test that a crontab with day and weekday fires on both"""
+        crontab = CronTab('0 0 1 * 7')
+        self.assertEqual(crontab.next_after(MONDAY), datetime.datetime(2019, 12, 22, 0, 0))
+        self.assertEqual(crontab.next_after(datetime.datetime(2019, 12, 29, 12, 0)),
+                         datetime.datetime(2020, 1, 1, 0, 0))
+
+    def test_invalid_crontabs(self):
+        for expression in ('* * * *', '60 * * * *', '* * * foo *', '*/0 * * * *', '5-1 * * * *'):
+            with self.assertRaises(ValueError):
+                CronTab(expression)
+        with self.assertRaises(ValidationError):
+            validate_crontab('0 0 30 feb *')
+
+    def test_scheduler_form_validates_crontabs(self):
+        """Test that the scheduler form takes crontabs longer than 14 characters"""
+        self.assertTrue(SchedulerForm({'cronTab': '0,15,30,45 2-6 * * mon-fri'}).is_valid())
+        self.assertTrue(SchedulerForm({'cronTab': ''}).is_valid())
+        form = SchedulerForm({'cronTab': '30 25 * * *'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('cronTab', form.errors)
+
+
+class SchedulerTests(TestCase):
+    """Test suite for the HCC scheduler."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="SchedulerUser")
+        self.harvesters = [
+            Harvester.objects.create(name='Harvester{}'.format(number), owner=self.user,
+                                     url='http://somewhere{}.url/v1'.format(number), enabled=True)
+            for number in range(3)]
+        for harvester in self.harvesters:
+            HarvesterSchedule.objects.create(harvester=harvester, crontab='0 0 * * *')
+
+    def test_heap_returns_due_crontabs_once(self):
+        scheduler = Scheduler()
+        scheduler.load(MONDAY)
+        self.assertEqual(scheduler.next_run(), datetime.datetime(2019, 12, 17, 0, 0))
+        self.assertEqual(scheduler.due(MONDAY), [])
+        midnight = datetime.datetime(2019, 12, 17, 0, 0)
+        self.assertEqual(sorted(scheduler.due(midnight)),
+                         ['Harvester0', 'Harvester1', 'Harvester2'])
+        self.assertEqual(scheduler.due(midnight), [])
+        self.assertEqual(scheduler.next_run(), datetime.datetime(2019, 12, 18, 0, 0))
+
+    @override_settings(HARVEST_MAX_CONCURRENT=2)
+    @patch('api.admission._start', side_effect=_started)
+    def test_due_harvesters_pass_the_admission_control(self, start):
+        """Test that due harvesters are queued while the limit is reached"""
+        scheduler = Scheduler()
+        scheduler.load(MONDAY)
+        midnight = datetime.datetime(2019, 12, 17, 0, 0)
+        self.assertEqual(scheduler.run_pending(midnight),
+                         ['Harvester0', 'Harvester1', 'Harvester2'])
+        self.assertEqual(start.call_count, 2)
+        self.assertEqual(HarvestAdmission.objects.filter(date_started__isnull=True).count(), 1)
+
+    @patch('api.admission._start', side_effect=_started)
+    def test_scheduler_reloads_changed_crontabs(self, start):
+        scheduler = Scheduler()
+        scheduler.load(MONDAY)
+        HarvesterSchedule.objects.create(harvester=self.harvesters[0], crontab='45 10 * * *')
+        self.harvesters[1].disable()
+        self.assertEqual(scheduler.run_pending(MONDAY + datetime.timedelta(minutes=15)),
+                         ['Harvester0'])
+        self.assertEqual(start.call_count, 1)
+
+    def test_add_schedules(self):
+        statuses = add_schedules({'Harvester0': {}, 'Unknown': {}})
+        self.assertEqual(statuses['Harvester0'][HCCJC.CRONTAB], ['0 0 * * *'])
+        self.assertIn(HCCJC.NEXT_HARVEST_DATE, statuses['Harvester0'])
+        self.assertEqual(statuses['Unknown'][HCCJC.CRONTAB], HCCJC.NO_CRONTAB)
+
+    @override_settings(HCC_SCHEDULER=True)
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.add_schedule')
+    def test_schedule_view_stores_crontabs(self, add_schedule):
+        self.client.force_login(self.user)
+        url = reverse('api:harvester-cron', kwargs={'name': 'Harvester0'})
+        key = 'Harvester0-' + HCCJC.POSTCRONTAB
+        response = self.client.post(url, urllib.parse.urlencode({key: '30 2 * * mon'}),
+                                    content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.json()[HCCJC.STATUS], 'Ok')
+        response = self.client.post(url, urllib.parse.urlencode({key: '30 25 * * *'}),
+                                    content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.json()[HCCJC.STATUS], 'failed')
+        self.assertEqual(
+            sorted(self.harvesters[0].schedules.values_list('crontab', flat=True)),
+            ['0 0 * * *', '30 2 * * mon'])
+        add_schedule.assert_not_called()
+        self.client.post(url)
+        self.assertFalse(self.harvesters[0].schedules.exists())
@@ -0,0 +1,129 @@
+"""
+Testing Module for snapshots.py
+"""
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+
+from api import snapshots
+from api.constants import HCCJSONConstants as HCCJC
+from api.forms import create_config_form
+from api.harvester_api import InitHarvester
+from api.harvester_api_strategy import BaseStrategy, HarvesterApiStrategy
+from api.models import Harvester
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+VERSIONS = '{"value": ["HarvesterService", "GeRDI-HarvesterLibrary-7.1.0"]}'
+
+CONFIG = {'harvester': {'parameters': [
+    {'key': 'rate', 'type': 'IntegerParameter', 'value': 1}]}}
+
+
+class SnapshotTests(TestCase):
+    """Test suite for the harvester versions and snapshots in the cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="SnapshotUser")
+        self.client.force_login(self.user)
+        self.harvester = Harvester.objects.create(
+            name='Harvester1', owner=self.user, url='http://somewhere.url/v1', enabled=True)
+
+    @patch('requests.request', return_value=MagicMock(status_code=200, text=VERSIONS))
+    def test_library_version_is_cached(self, request):
+        """Test that /versions is asked once per harvester url"""
+        self.assertEqual(InitHarvester(self.harvester).get_version(), 7)
+        self.assertEqual(InitHarvester(self.harvester).get_version(), 7)
+        self.assertEqual(request.call_count, 1)
+        self.harvester.url = 'http://elsewhere.url/v1'
+        InitHarvester(self.harvester)
+        self.assertEqual(request.call_count, 2)
+
+    @patch('requests.request', return_value=MagicMock(status_code=404, text=''))
+    def test_unsupported_version_is_not_cached(self, request):
+        """Test that a failed version request is repeated"""
+        InitHarvester(self.harvester)
+        InitHarvester(self.harvester)
+        self.assertEqual(request.call_count, 2)
+
+    def test_state_changes_increment_the_version(self):
+        """Test that the snapshot version follows the harvester state"""
+        snapshots.record('Harvester1', snapshots.PROGRESS, {HCCJC.STATE: 'harvesting'})
+        first = snapshots.version('Harvester1')
+        snapshots.record('Harvester1', snapshots.PROGRESS, {HCCJC.STATE: 'harvesting'})
+        self.assertEqual(snapshots.version('Harvester1'), first)
+        snapshots.record('Harvester1', snapshots.STATUS, {HCCJC.STATUS: 'Idle'})
+        self.assertEqual(snapshots.states(['Harvester1', 'Unknown']), {'Harvester1': 'idle'})
+        self.assertGreater(snapshots.version('Harvester1'), first)
+
+    def test_disable_forgets_the_harvester(self):
+        """Test that enabled_changed drops snapshots and library versions"""
+        snapshots.set_library_version(self.harvester, 7)
+        snapshots.record('Harvester1', snapshots.STATUS, {HCCJC.STATUS: 'idle'})
+        self.harvester.disable()
+        self.assertIsNone(snapshots.get('Harvester1', snapshots.STATUS))
+        self.assertIsNone(snapshots.get_library_version(self.harvester))
+
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.harvester_progress',
+           autospec=True,
+           side_effect=lambda api: Response({api.harvester.name: {
+               HCCJC.STATE: 'idle' if api.harvester.name.endswith('1') else 'harvesting',
+               HCCJC.PROGRESS_CURRENT: 50}}, status.HTTP_200_OK))
+    def test_progress_skips_idle_harvesters(self, apicall):
+        """Test that idle harvesters answer from their snapshot"""
+        Harvester.objects.create(name="Harvester2", owner=self.user,
+                                 url='http://somewhere.url/2', enabled=True)
+        # the mocked api call does not record, do what the strategy does
+        snapshots.record('Harvester1', snapshots.PROGRESS, {HCCJC.STATE: 'idle'})
+        url = reverse('api:all-harvester-progress')
+        response = self.client.get(url, {'names': 'Harvester1,Harvester2'})
+        self.assertEqual(response.data, {
+            'Harvester1': {HCCJC.STATE: 'idle'},
+            'Harvester2': {HCCJC.STATE: 'harvesting', HCCJC.PROGRESS_CURRENT: 50},
+        })
+        self.assertEqual(apicall.call_count, 1)
+
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy._call',
+           return_value=Response({'Harvester1': 'started'}, status.HTTP_200_OK))
+    def test_start_forgets_the_snapshot(self, apicall):
+        """Test that a harvester started through HCC is polled again"""
+        snapshots.record('Harvester1', snapshots.PROGRESS, {HCCJC.STATE: 'idle'})
+        HarvesterApiStrategy(self.harvester, BaseStrategy()).start_harvest()
+        self.assertEqual(snapshots.states(['Harvester1']), {})
+        self.assertIsNone(snapshots.get('Harvester1', snapshots.PROGRESS))
+
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy._call', autospec=True,
+           side_effect=lambda api, operation, *args: Response({api.harvester.name: {
+               HCCJC.HEALTH: CONFIG if operation == 'get_config'
+               else {'message': 'Set parameter', 'status': 'Ok'}}}, status.HTTP_200_OK))
+    def test_config_form_reuses_the_config(self, apicall):
+        """Test that saving the config form does not fetch the config again"""
+        snapshots.set_library_version(self.harvester, 7)
+        url = reverse('config-harvester', kwargs={'name': 'Harvester1'})
+        response = self.client.get(url)
+        token = response.context['config_version']
+        self.assertEqual(token, snapshots.config_token(CONFIG))
+        response = self.client.post(url, {'config_version': token, 'harvester.rate': '5'})
+        self.assertEqual(response.json()['changes'], {'harvester.rate': {'before': 1, 'after': '5'}})
+        self.assertEqual([call[0][1] for call in apicall.call_args_list],
+                         ['get_config', 'set_config'])
+        # saved, the next form shows the new config
+        self.assertIsNone(snapshots.get_config('Harvester1', token))
+
+    def test_config_form_class_is_memoized(self):
+        """Test that harvesters with the same config schema share the form class"""
+        other = {'harvester': {'parameters': [
+            {'key': 'rate', 'type': 'IntegerParameter', 'value': 2}]}}
+        self.assertIs(type(create_config_form(CONFIG)), type(create_config_form(other)))
+        self.assertEqual(create_config_form(other)['harvester.rate'].value(), 2)
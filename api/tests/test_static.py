@@ -0,0 +1,135 @@
+"""
+Testing Module for the static files: storage.py, the buildstatic command
+and the static template tags.
+"""
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from api.storage import CompressedManifestStaticFilesStorage
+from api.templatetags.hcc_tags import _vendored
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+BUNDLES = {
+    'bundles/test.min.css': ['css/hcc.css'],
+    'bundles/test.min.js': ['js/hcc.js'],
+}
+
+VENDOR = {'vendor/lib.min.js': (
+    'https://cdn.example.org/lib@1.0.0/lib.min.js',
+    hashlib.sha256(b'lib();').hexdigest())}
+
+THEME = b'@import url("https://fonts.googleapis.com/css?family=Lato:400,700");body{}'
+LOCAL_THEME = (b'@font-face{font-family:"Lato";font-style:normal;font-weight:400;font-display:swap;'
+               b'src:url(../fonts/lato.woff2) format("woff2"),url(../fonts/lato.woff) format("woff")}body{}')
+
+
+class StaticFilesTests(SimpleTestCase):
+    """Test suite for bundled, fingerprinted and precompressed static files."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        _vendored.cache_clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_storage_writes_compressed_variants(self):
+        """Test that collected files get a gzip variant if it is worth it"""
+        storage = CompressedManifestStaticFilesStorage(location=self.directory)
+        content = b'body { color: #000; }\n' * 100
+        name = storage.save('css/big.css', ContentFile(content))
+        storage.save('css/small.css', ContentFile(b'p{}'))
+        storage.compress(name)
+        storage.compress('css/small.css')
+        with open(storage.path(name) + '.gz', 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), content)
+        self.assertFalse(os.path.exists(storage.path('css/small.css') + '.gz'))
+
+    @override_settings(STATIC_BUNDLES=BUNDLES, STATIC_VENDOR={})
+    def test_buildstatic_writes_minified_bundles(self):
+        """Test that buildstatic concatenates and minifies the bundle sources"""
+        call_command('buildstatic', '--no-download', output=self.directory, verbosity=0)
+        with open(os.path.join(self.directory, 'bundles/test.min.js')) as bundle:
+            script = bundle.read()
+        self.assertIn('function', script)
+        self.assertNotIn('\n    ', script)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'bundles/test.min.css')))
+
+    @override_settings(STATIC_BUNDLES=BUNDLES, STATIC_BUNDLED=False)
+    def test_static_bundle_renders_single_files(self):
+        """Test that development pages load the single files of a bundle"""
+        rendered = Template("{% load hcc_tags %}{% static_bundle 'bundles/test.min.js' %}").render(Context())
+        self.assertEqual(rendered, '<script src="/static/js/hcc.js"></script>')
+
+    @override_settings(STATIC_BUNDLES=BUNDLES, STATIC_BUNDLED=True)
+    def test_static_bundle_renders_bundle(self):
+        """Test that production pages load the bundle"""
+        rendered = Template("{% load hcc_tags %}{% static_bundle 'bundles/test.min.css' %}").render(Context())
+        self.assertEqual(rendered, '<link rel="stylesheet" href="/static/bundles/test.min.css">')
+
+    @override_settings(STATIC_VENDOR=VENDOR, STATIC_BUNDLED=False)
+    def test_vendor_static_falls_back_to_origin(self):
+        """Test that a missing vendored file is linked from its pinned origin"""
+        rendered = Template("{% load hcc_tags %}{% vendor_static 'vendor/lib.min.js' %}").render(Context())
+        self.assertEqual(rendered, VENDOR['vendor/lib.min.js'][0])
+        with override_settings(STATIC_BUNDLED=True):
+            rendered = Template("{% load hcc_tags %}{% vendor_static 'vendor/lib.min.js' %}").render(Context())
+        self.assertEqual(rendered, '/static/vendor/lib.min.js')
+
+    @override_settings(STATIC_VENDOR=VENDOR, STATIC_BUNDLES={})
+    def test_buildstatic_verifies_vendored_files(self):
+        """Test that buildstatic rejects a vendored file with another sha256"""
+        os.makedirs(os.path.join(self.directory, 'vendor'))
+        with open(os.path.join(self.directory, 'vendor/lib.min.js'), 'wb') as file:
+            file.write(b'lib();')
+        call_command('buildstatic', '--no-download', output=self.directory, verbosity=0)
+        with open(os.path.join(self.directory, 'vendor/lib.min.js'), 'wb') as file:
+            file.write(b'evil();')
+        with self.assertRaises(CommandError):
+            call_command('buildstatic', '--no-download', output=self.directory, verbosity=0)
+
+    @override_settings(STATIC_BUNDLES={})
+    def test_committed_vendored_files_match(self):
+        """Test that the committed vendored files match their sha256"""
+        call_command('buildstatic', '--no-download', verbosity=0)
+
+    @override_settings(STATIC_BUNDLES={}, STATIC_FONTS={'Lato': [('normal', 400, 'vendor/fonts/lato')]},
+                       STATIC_VENDOR={'vendor/theme/theme.css': (
+                           'https://cdn.example.org/theme@1.0.0/theme.css',
+                           hashlib.sha256(LOCAL_THEME).hexdigest())})
+    @patch('api.management.commands.buildstatic._fetch', return_value=THEME)
+    def test_buildstatic_replaces_google_fonts(self, fetch):
+        """Test that a fetched stylesheet uses the vendored fonts instead of Google Fonts"""
+        call_command('buildstatic', output=self.directory, verbosity=0)
+        with open(os.path.join(self.directory, 'vendor/theme/theme.css'), 'rb') as file:
+            self.assertEqual(file.read(), LOCAL_THEME)
+        with override_settings(STATIC_FONTS={}):
+            os.remove(os.path.join(self.directory, 'vendor/theme/theme.css'))
+            with self.assertRaises(CommandError):
+                call_command('buildstatic', output=self.directory, verbosity=0)
+
+    def test_no_third_party_fonts(self):
+        """Test that no template or stylesheet loads fonts from Google Fonts"""
+        for directory in (os.path.join(settings.BASE_DIR, 'templates'),
+                          os.path.join(settings.BASE_DIR, 'api', 'static')):
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if name.endswith(('.html', '.css')):
+                        with open(os.path.join(root, name), 'rb') as file:
+                            self.assertNotIn(b'fonts.googleapis.com', file.read(), name)
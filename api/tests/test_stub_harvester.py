@@ -0,0 +1,70 @@
+"""
+Testing Module for the benchmark stub harvesters
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.constants import HCCJSONConstants as HCCJC
+from api.harvester_api import InitHarvester
+from api.models import Harvester
+from benchmarks.fleet import Fleet
+from benchmarks.stub_harvester import StubSettings
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+class StubHarvesterTestCase(TestCase):
+    """Talk to a small stub fleet through the real harvester API strategies."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fleet = Fleet(2, version="mixed",
+                          settings=StubSettings(queue_time=0, harvest_time=60)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fleet.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="StubUser")
+        self.fleet.register(self.user)
+
+    def test_fleet_is_registered(self):
+        """Test that every stub harvester got a Harvester row"""
+        self.assertEqual(
+            Harvester.objects.filter(name__startswith="stub_", enabled=True).count(), 2)
+
+    def test_versions_are_detected(self):
+        """Test that HCC detects the simulated library versions"""
+        self.assertEqual(InitHarvester(Harvester.objects.get(name="stub_0")).get_version(), 7)
+        self.assertEqual(InitHarvester(Harvester.objects.get(name="stub_1")).get_version(), 6)
+
+    def test_start_harvest_changes_state(self):
+        """Test that a started harvest is reported in the status"""
+        for harvester in Harvester.objects.all():
+            api = InitHarvester(harvester).get_harvester_api()
+            api.start_harvest()
+            response = api.harvester_status()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.data[harvester.name][HCCJC.STATUS], HCCJC.HARV)
+
+    def test_config_of_both_versions(self):
+        """Test that the v6 and v7 stubs serve and change their config"""
+        for harvester in Harvester.objects.all():
+            api = InitHarvester(harvester).get_harvester_api()
+            response = api.save_harvester_config_data({"ETL.concurrentTasks": 4})
+            self.assertEqual(response.status_code, 200, harvester.name)
+            response = api.get_harvester_config_data()
+            self.assertEqual(response.status_code, 200, harvester.name)
+            parameters = response.data[harvester.name][HCCJC.HEALTH]["ETL"]["parameters"]
+            self.assertEqual(parameters[0]["value"], 4)
@@ -0,0 +1,105 @@
+"""
+Testing Module for tracing.py
+"""
+import json
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from api import tracing
+from api.models import Harvester
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+class TracingTests(TestCase):
+    """Test suite for the tracing spans."""
+
+    def setUp(self):
+        # no cached harvester versions, every call is traced
+        cache.clear()
+        self.exporter = tracing.MemoryExporter()
+        self.old_exporter = tracing.set_exporter(self.exporter)
+        self.user = User.objects.create(username="TracingUser")
+        self.client.force_login(self.user)
+        Harvester.objects.create(
+            name='Harvester1', owner=self.user, url='http://somewhere.url/v1', enabled=True)
+
+    def tearDown(self):
+        tracing.set_exporter(self.old_exporter)
+
+    def test_spans_are_nested(self):
+        """Test that child spans share the trace and point to their parent"""
+        with tracing.span('outer') as outer:
+            with tracing.span('inner', key='value') as inner:
+                pass
+        self.assertEqual(self.exporter.spans, [inner, outer])
+        self.assertEqual(inner.trace_id, outer.trace_id)
+        self.assertEqual(inner.parent_id, outer.span_id)
+        self.assertEqual(inner.attributes, {'key': 'value'})
+        self.assertIsNotNone(outer.end_ns)
+
+    def test_failed_span(self):
+        """Test that an exception marks the span as failed"""
+        with self.assertRaises(ValueError):
+            with tracing.span('failing'):
+                raise ValueError('broken')
+        self.assertEqual(self.exporter.spans[0].status, 'ERROR')
+        self.assertEqual(self.exporter.spans[0].attributes['exception.type'], 'ValueError')
+
+    @patch('requests.request')
+    def test_harvester_waterfall(self, request_mock):
+        """Test that a view is traced down to every harvester HTTP call"""
+        request_mock.return_value = MagicMock(
+            status_code=200, content=b'12345',
+            text='{"value": ["x", "RestfulHarvester-Library-7.1.0"], '
+                 '"harvestedCount": 5, "maxDocumentCount": 10, "state": "IDLE", '
+                 '"remainingHarvestTime": 100}')
+        self.client.get('/hcc/Harvester1/progress')
+        spans = {span.name: span for span in self.exporter.spans}
+        root = spans['GET harvester-progress']
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(spans['harvester.versions'].parent_id, root.span_id)
+        self.assertEqual(spans['harvester.progress'].parent_id, root.span_id)
+        http_spans = [span for span in self.exporter.spans if span.name == 'HTTP GET']
+        self.assertEqual(len(http_spans), 2)
+        self.assertEqual(http_spans[1].parent_id, spans['harvester.progress'].span_id)
+        self.assertEqual(http_spans[1].attributes, {
+            'http.method': 'GET',
+            'url.path': '/v1/',
+            'hcc.harvester': 'Harvester1',
+            'hcc.strategy_version': '7',
+            'http.status_code': 200,
+            'http.response_content_length': 5,
+        })
+
+    def test_json_file_exporter(self):
+        """Test that the file exporter writes one JSON object per span"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traces.jsonl')
+            tracing.set_exporter(tracing.JsonFileExporter(path))
+            with tracing.span('outer'):
+                with tracing.span('inner'):
+                    pass
+            with open(path) as file:
+                spans = [json.loads(line) for line in file]
+        self.assertEqual([span['name'] for span in spans], ['inner', 'outer'])
+        self.assertEqual(spans[0]['parentSpanId'], spans[1]['spanId'])
+        self.assertEqual(spans[0]['traceId'], spans[1]['traceId'])
+
+    def test_incomplete_exporter_is_rejected(self):
+        """Test that an exporter without export() fails when it is created"""
+        class IncompleteExporter(tracing.SpanExporter):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteExporter()
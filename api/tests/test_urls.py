@@ -119,6 +119,34 @@ class UrlsV2Tests(APITestCase, URLPatternsTestCase):
         view = resolve('/v1/harvesters/stop')
         self.assertEqual(view.func.__name__, 'stop_harvesters')
 
+    def test_enable_harvesters_reverses_to_correct_url(self):
+        """
+        Test, if 'enable-harvesters' reverses to the correct url.
+        """
+        url = reverse('api:enable-harvesters')
+        self.assertEqual(url, '/v1/harvesters/enable')
+
+    def test_enable_harvesters_url_resolves_to_correct_view(self):
+        """
+        Test, if '/v1/harvesters/enable' resolves to the correct view.
+        """
+        view = resolve('/v1/harvesters/enable')
+        self.assertEqual(view.func.__name__, 'enable_harvesters')
+
+    def test_disable_harvesters_reverses_to_correct_url(self):
+        """
+        Test, if 'disable-harvesters' reverses to the correct url.
+        """
+        url = reverse('api:disable-harvesters')
+        self.assertEqual(url, '/v1/harvesters/disable')
+
+    def test_disable_harvesters_url_resolves_to_correct_view(self):
+        """
+        Test, if '/v1/harvesters/disable' resolves to the correct view.
+        """
+        view = resolve('/v1/harvesters/disable')
+        self.assertEqual(view.func.__name__, 'disable_harvesters')
+
     def test_harvester_status_reverses_to_correct_url(self):
         """
         Test, if 'harvester-status' reverses to the correct url.
@@ -147,6 +175,20 @@ class UrlsV2Tests(APITestCase, URLPatternsTestCase):
         view = resolve('/v1/harvesters/status')
         self.assertEqual(view.func.__name__, 'get_harvester_states')
 
+    def test_all_harvester_progress_reverses_to_correct_url(self):
+        """
+        Test, if 'all-harvester-progress' reverses to the correct url.
+        """
+        url = reverse('api:all-harvester-progress')
+        self.assertEqual(url, '/v1/harvesters/progress')
+
+    def test_all_harvester_progress_url_resolves_to_correct_view(self):
+        """
+        Test, if '/v1/harvesters/progress' resolves to the correct view
+        """
+        view = resolve('/v1/harvesters/progress')
+        self.assertEqual(view.func.__name__, 'get_harvester_progresses')
+
     def test_harvester_cron_reverses_to_correct_url(self):
         """
         Test, if 'harvester-cron' reverses to the correct url.
@@ -459,6 +501,34 @@ class UrlsTests(APITestCase, URLPatternsTestCase):
         view = resolve('/hcc/Harvester1/progress')
         self.assertEqual(view.func.__name__, 'get_harvester_progress')
 
+    def test_harvesters_status_reverses_to_correct_url(self):
+        """
+        Test, if 'harvesters-status' reverses to the correct url.
+        """
+        url = reverse('harvesters-status')
+        self.assertEqual(url, '/hcc/status')
+
+    def test_harvesters_status_url_resolves_to_correct_view(self):
+        """
+        Test, if '/hcc/status' resolves to the correct view.
+        """
+        view = resolve('/hcc/status')
+        self.assertEqual(view.func.__name__, 'get_harvesters_status')
+
+    def test_harvesters_progress_reverses_to_correct_url(self):
+        """
+        Test, if 'harvesters-progress' reverses to the correct url.
+        """
+        url = reverse('harvesters-progress')
+        self.assertEqual(url, '/hcc/progress')
+
+    def test_harvesters_progress_url_resolves_to_correct_view(self):
+        """
+        Test, if '/hcc/progress' resolves to the correct view.
+        """
+        view = resolve('/hcc/progress')
+        self.assertEqual(view.func.__name__, 'get_harvesters_progress')
+
     def test_harvester_to_file_reverses_to_correct_url(self):
         """
         Test, if 'harvester-to-file' reverses to the correct url.
@@ -1,13 +1,17 @@
 """
 Testing Module for views_v2.py
 """
+import gzip
 import json
 import os
 import urllib
 from unittest.mock import MagicMock, patch
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files import File
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import include, path, reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
@@ -15,6 +19,7 @@ from rest_framework.response import Response
 from rest_framework.test import APIClient, APITestCase, URLPatternsTestCase
 
 from api.constants import HCCJSONConstants as HCCJC
+from api.forms import SchedulerForm
 from api.models import Harvester
 
 __author__ = "Jan Frömberg, Laura Höhle"
@@ -144,11 +149,9 @@ class ApiViewsTests(APITestCase, URLPatternsTestCase):
         self.assertEqual(response, apicall())
         apicall.assert_called()
 
-    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest',
-           side_effect=[
-               Response({'Harvester1': "dummy message"}, status.HTTP_200_OK),
-               Response({"Harvester2": "dummy message"}, status.HTTP_200_OK)
-           ])
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest', autospec=True,
+           side_effect=lambda api: Response({api.harvester.name: "dummy message"},
+                                            status.HTTP_200_OK))
     def test_start_harvesters_view_calls_api(self, apicall):
         """Test the API command run-harvesters with reverse lookup of the resource."""
         # create second harvester to have multiple harvesters in the test
@@ -186,6 +189,80 @@ class ApiViewsTests(APITestCase, URLPatternsTestCase):
         self.assertEqual(response.data, expected_output)
         self.assertEqual(apicall.call_count, 2)
 
+    def test_enable_harvesters_by_names(self):
+        """Test that the bulk enable API reports changed and missing names."""
+        Harvester.objects.create(name='Harvester2', owner=self.user,
+                                 url='http://somewhere.url/v2')
+        response = self.client.post(
+            reverse('api:enable-harvesters'),
+            {'names': ['Harvester1', 'Harvester2', 'Unknown']}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'enabled': ['Harvester2'], 'missing': ['Unknown']})
+        self.assertTrue(Harvester.objects.get(name='Harvester2').enabled)
+
+    def test_disable_harvesters_by_filter(self):
+        """Test that the bulk disable API selects by prefix and owner."""
+        other = User.objects.create(username="Other")
+        Harvester.objects.create(name='Harvester2', owner=other, enabled=True,
+                                 url='http://somewhere.url/v2')
+        Harvester.objects.create(name='Other1', owner=self.user, enabled=True,
+                                 url='http://somewhere.url/v3')
+        response = self.client.post(
+            reverse('api:disable-harvesters'),
+            {'prefix': 'Harvester', 'owner': 'ChuckNorris'}, format="json")
+        self.assertEqual(response.data['disabled'], ['Harvester1'])
+        self.assertEqual(
+            list(Harvester.objects.filter(enabled=True).values_list('name', flat=True)),
+            ['Harvester2', 'Other1'])
+
+    def test_bulk_enable_needs_a_selector(self):
+        """Test that the bulk API never changes all harvesters by accident."""
+        response = self.client.post(reverse('api:disable-harvesters'), {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Harvester.objects.get(name='Harvester1').enabled)
+        response = self.client.post(reverse('api:disable-harvesters'),
+                                    {'all': True}, format="json")
+        self.assertEqual(response.data['disabled'], ['Harvester1'])
+
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy._call', autospec=True,
+           side_effect=lambda api, operation, *args: Response({api.harvester.name: {
+               HCCJC.HEALTH: {'harvester': {'parameters': [
+                   {'key': 'rate', 'type': 'IntegerParameter',
+                    'value': 5 if api.harvester.name == 'Harvester1' else 1},
+                   {'key': 'active', 'type': 'BooleanParameter', 'value': True}]}}
+               if operation == 'get_config' else {'message': 'Set parameter', 'status': 'Ok'}}},
+               status.HTTP_200_OK))
+    def test_configure_harvesters_pushes_real_changes(self, apicall):
+        """Test that the bulk config API only pushes the differences."""
+        cache.clear()
+        Harvester.objects.create(name='Harvester2', owner=self.user,
+                                 url='http://somewhere.url/v2', enabled=True)
+        Harvester.objects.create(name='Harvester3', owner=self.user,
+                                 url='http://somewhere.url/v3')
+        response = self.client.post(reverse('api:configure-harvesters'), {
+            'prefix': 'Harvester', 'changes': {'harvester.rate': 5, 'harvester.active': True,
+                                               'harvester.unknown': 1}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data['harvesters']
+        self.assertEqual(result['Harvester1']['status'], 'unchanged')
+        self.assertEqual(result['Harvester2']['status'], 'Ok')
+        self.assertEqual(result['Harvester2']['changes'],
+                         {'harvester.rate': {'before': '1', 'after': '5'}})
+        self.assertEqual(result['Harvester2']['unknown'], ['harvester.unknown'])
+        self.assertEqual(response.data['disabled'], ['Harvester3'])
+        pushed = [call[0][2:] for call in apicall.call_args_list if call[0][1] == 'set_config']
+        self.assertEqual(len(pushed), 1)
+        self.assertEqual(pushed[0][1], {'harvester.rate': '5'})
+
+    def test_configure_harvesters_needs_changes(self):
+        """Test that the bulk config API validates the change set."""
+        response = self.client.post(reverse('api:configure-harvesters'),
+                                    {'all': True, 'changes': ['rate']}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('api:configure-harvesters'),
+                                    {'changes': {'harvester.rate': 5}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     @patch('api.harvester_api_strategy.HarvesterApiStrategy.harvester_status',
            return_value=Response({'Harvester1': "dummy message"}, status.HTTP_200_OK))
     def test_harvester_state_view_calls_api(self, apicall):
@@ -219,6 +296,54 @@ class ApiViewsTests(APITestCase, URLPatternsTestCase):
         self.assertEqual(response.data, expected_output)
         self.assertEqual(apicall.call_count, 2)
 
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.harvester_status',
+           autospec=True,
+           side_effect=lambda api: Response({api.harvester.name: {
+               HCCJC.STATE: 'HARVESTING' if api.harvester.name.endswith('2') else 'IDLE',
+               HCCJC.GUI_STATUS: HCCJC.PRIMARY,
+               HCCJC.PROGRESS_CURRENT: 50}}, status.HTTP_200_OK))
+    def test_harvester_states_page(self, apicall):
+        """Test that the status list is paginated, filtered and projected."""
+        for i in range(2, 5):
+            Harvester.objects.create(name="Harvester{}".format(i), owner=self.user,
+                                     url='http://somewhere.url/{}'.format(i))
+        url = reverse('api:all-harvester-status')
+        response = self.client.get(url, {'page_size': 2, 'fields': HCCJC.PROGRESS_CURRENT})
+        self.assertEqual(response.data['results'], [
+            {'name': 'Harvester1', HCCJC.PROGRESS_CURRENT: 50},
+            {'name': 'Harvester2', HCCJC.PROGRESS_CURRENT: 50},
+        ])
+        self.assertEqual(apicall.call_count, 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([entry['name'] for entry in response.data['results']],
+                         ['Harvester3', 'Harvester4'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(url, {'state': 'harvesting', 'fields': 'state'})
+        self.assertEqual(response.data['results'],
+                         [{'name': 'Harvester2', HCCJC.STATE: 'HARVESTING'}])
+        response = self.client.get(url, {'enabled': 'true'})
+        self.assertEqual([entry['name'] for entry in response.data['results']],
+                         ['Harvester1'])
+
+    def test_harvester_list_cursor_filters_and_fields(self):
+        """Test that the registry list is cursor paginated, filtered and projected."""
+        for i in range(2, 5):
+            Harvester.objects.create(name="Harvester{}".format(i), owner=self.user,
+                                     url='http://somewhere.url/{}'.format(i))
+        response = self.client.get('/v1/harvesters/', {
+            'enabled': 'false', 'prefix': 'Harv', 'fields': 'name,owner', 'page_size': 2})
+        self.assertEqual(response.data['results'], [
+            {'name': 'Harvester2', 'owner': 'ChuckNorris'},
+            {'name': 'Harvester3', 'owner': 'ChuckNorris'},
+        ])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'name': 'Harvester4', 'owner': 'ChuckNorris'}])
+        response = self.client.get('/v1/harvesters/', {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/v1/harvesters/', {'enabled': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     @patch('api.harvester_api_strategy.HarvesterApiStrategy.add_schedule',
            return_value=Response({'Harvester1': {HCCJC.HEALTH: {"message": "dummy message"}}},
                                  status.HTTP_200_OK))
@@ -375,6 +500,25 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
         harvester = Harvester.objects.get(pk=2)
         self.assertFalse(harvester.enabled)
 
+    def test_toggle_harvesters_uses_set_based_updates(self):
+        Harvester.objects.create(
+            name="Harvester2",
+            owner=self.user,
+            url='http://somewhereelse.url/v1'
+        )
+        self.harvester.enable()
+        hnames = self.harvester.name + "-Harvester2-Unknown"
+        url = reverse("toggle-harvesters", kwargs={"hnames": hnames})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        harvester_queries = [query['sql'] for query in queries
+                             if '"api_harvester"' in query['sql']]
+        # one select, then the changed harvesters and one update for each direction
+        self.assertEqual(len(harvester_queries), 5)
+        self.assertEqual(len([sql for sql in harvester_queries if sql.startswith('UPDATE')]), 2)
+        self.assertFalse(Harvester.objects.get(name=self.harvester.name).enabled)
+        self.assertTrue(Harvester.objects.get(name="Harvester2").enabled)
+
     def test_stop_harvester_login_required(self):
         self.client.logout()
         url = reverse("stop-harvester", kwargs={"name": self.harvester.name})
@@ -427,11 +571,9 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
         self.assertRedirects(
             response, '/api-auth/login/?next=/hcc/start/Harvester1')
 
-    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest',
-           side_effect=[
-               Response({'Harvester1': "dummy message"}, status.HTTP_200_OK),
-               Response({"Harvester2": "dummy message"}, status.HTTP_200_OK)
-           ])
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest', autospec=True,
+           side_effect=lambda api: Response({api.harvester.name: "dummy message"},
+                                            status.HTTP_200_OK))
     def test_start_selected_harvesters_view_redirects(self, apicall):
         url = reverse(
             "start-selected-harvesters",
@@ -441,10 +583,10 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
         self.assertRedirects(response, reverse("hcc_gui"))
 
     @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest',
-           side_effect=[
-               Response({'Harvester1': "dummy message"}, status.HTTP_200_OK),
-               Response({"Harvester2": "dummy message"}, status.HTTP_200_OK)
-           ])
+           autospec=True,
+           # the harvesters are started concurrently, in any order
+           side_effect=lambda api: Response(
+               {api.harvester.name: "dummy message"}, status.HTTP_200_OK))
     def test_start_selected_harvesters_view_calls_api(self, apicall):
         Harvester.objects.create(
             name="Harvester2",
@@ -457,6 +599,17 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
         self.client.get(url)
         self.assertEqual(apicall.call_count, 2)
 
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest',
+           return_value=Response({'Harvester1': "dummy message"}, status.HTTP_200_OK))
+    def test_start_selected_harvesters_reports_missing(self, apicall):
+        hnames = self.harvester.name + "-Unknown1-Unknown2"
+        url = reverse("start-selected-harvesters", kwargs={"hnames": hnames})
+        response = self.client.get(url, follow=True)
+        self.assertEqual(apicall.call_count, 1)
+        warnings = [message.message for message in response.context.get('messages')
+                    if message.tags == "alert-warning"]
+        self.assertEqual(warnings, ['Harvester(s) not found: Unknown1, Unknown2'])
+
     def test_reset_harvester_login_required(self):
         self.client.logout()
         url = reverse("reset-harvester", kwargs={"name": self.harvester.name})
@@ -540,23 +693,17 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
         self.assertRedirects(
             response, '/api-auth/login/?next=/hcc/startall')
 
-    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest',
-           side_effect=[
-               Response({'Harvester1': "dummy message"}, status.HTTP_200_OK),
-               Response({"Harvester2": "dummy message"}, status.HTTP_200_OK)
-           ])
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest', autospec=True,
+           side_effect=lambda api: Response({api.harvester.name: "dummy message"},
+                                            status.HTTP_200_OK))
     def test_start_all_harvesters_view_redirects(self, apicall):
         url = reverse("start-harvesters")
         response = self.client.get(url)
         self.assertRedirects(response, reverse("hcc_gui"))
 
-    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest',
-           side_effect=[
-               Response({'Harvester1': {HCCJC.HEALTH: "dummy message"}},
-                        status.HTTP_200_OK),
-               Response({'Harvester2': {HCCJC.HEALTH: "dummy message"}},
-                        status.HTTP_200_OK)
-           ])
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest', autospec=True,
+           side_effect=lambda api: Response(
+               {api.harvester.name: {HCCJC.HEALTH: "dummy message"}}, status.HTTP_200_OK))
     def test_start_all_harvesters_view_calls_api(self, apicall):
         Harvester.objects.create(
             name="Harvester2",
@@ -570,6 +717,28 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
         self.client.get(url)
         self.assertEqual(apicall.call_count, 2)
 
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.start_harvest',
+           side_effect=[
+               Response({'Harvester1': {HCCJC.HEALTH: "dummy message"}},
+                        status.HTTP_200_OK)
+           ])
+    def test_start_all_harvesters_skips_disabled(self, apicall):
+        Harvester.objects.create(
+            name="Harvester2",
+            owner=self.user,
+            url='http://somewhereelse.url/v1'
+        )
+        self.harvester.enable()
+        url = reverse("start-harvesters")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(apicall.call_count, 1)
+        # the database filters, not the view
+        harvester_queries = [query['sql'] for query in queries
+                             if 'FROM "api_harvester"' in query['sql']]
+        self.assertEqual(len(harvester_queries), 1)
+        self.assertIn('WHERE "api_harvester"."enabled"', harvester_queries[0])
+
     def test_abort_all_harvesters_login_required(self):
         self.client.logout()
         url = reverse("abort-harvesters")
@@ -683,6 +852,22 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
         self.client.get(url)
         apicall.assert_called()
 
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.harvester_progress',
+           autospec=True,
+           side_effect=lambda api: Response({api.harvester.name: {
+               HCCJC.STATE: 'harvesting', HCCJC.PROGRESS_CURRENT: 50}},
+                                            status.HTTP_200_OK))
+    def test_harvesters_progress_view_returns_all(self, apicall):
+        """Test that one request returns the progress of several harvesters."""
+        Harvester.objects.create(name="Harvester2", owner=self.user,
+                                 url='http://somewhere.url/2', enabled=True)
+        response = self.client.get(reverse('harvesters-progress'),
+                                   {'names': 'Harvester1,Harvester2'})
+        self.assertEqual(json.loads(response.content), {
+            name: {HCCJC.STATE: 'harvesting', HCCJC.PROGRESS_CURRENT: 50}
+            for name in ('Harvester1', 'Harvester2')})
+        self.assertEqual(apicall.call_count, 2)
+
     def test_harvester_to_file_view_login_required(self):
         self.client.logout()
         url = reverse("harvester-to-file")
@@ -701,7 +886,20 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
                 "enabled": self.harvester.enabled
             }
         ]
-        self.assertEqual(json.loads(response.content), data)
+        self.assertEqual(
+            json.loads(b''.join(response.streaming_content)), data)
+
+    def test_harvester_to_file_ndjson_and_gzip(self):
+        Harvester.objects.create(name='Harvester2', owner=self.user,
+                                 url='http://somewhere.url/v2')
+        url = reverse("harvester-to-file") + "?format=ndjson"
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = gzip.decompress(
+            b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines],
+                         [self.harvester.name, 'Harvester2'])
 
     def test_harvester_file_form_view_response(self):
         url = reverse("harvester-file-form")
@@ -795,6 +993,25 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
         self.assertEqual(message.tags, "alert-success")
         self.assertEqual(Harvester.objects.all().count(), 2)
 
+    def test_harvester_from_file_streams_progress(self):
+        """
+        With Accept: application/x-ndjson the import progress is streamed.
+        """
+        url = reverse("harvester-from-file")
+        module_dir = os.path.dirname(__file__)
+
+        file_path = os.path.join(
+            module_dir, 'test_files/valid_new_harvester.json')
+        file = File(open(file_path, 'r'))
+        response = self.client.post(url, {'upload_file': file},
+                                    HTTP_ACCEPT='application/x-ndjson')
+        lines = [json.loads(line) for line in
+                 b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(lines[0]['status'], 'progress')
+        self.assertEqual(lines[-1]['status'], HCCJC.SUCCESS)
+        self.assertEqual(lines[-1]['created'], 1)
+        self.assertEqual(Harvester.objects.all().count(), 2)
+
     def test_harvester_from_file_name_changed(self):
         """
         When the name is new, but the url already exists, do not make changes.
@@ -909,7 +1126,53 @@ class ViewsTests(APITestCase, URLPatternsTestCase):
     @patch('api.harvester_api_strategy.HarvesterApiStrategy.harvester_status',
            return_value=Response({'Harvester1': {HCCJC.CRONTAB: HCCJC.NO_CRONTAB}},
                                  status.HTTP_200_OK))
-    def test_hcc_gui_view_calls_api(self, apicall):
+    def test_hcc_gui_view_does_not_call_api(self, apicall):
+        """The dashboard renders the registry only, statuses are loaded later."""
         url = reverse("hcc_gui")
-        self.client.get(url)
-        apicall.assert_called()
+        response = self.client.get(url)
+        apicall.assert_not_called()
+        self.assertContains(response, 'data-harvester="Harvester1"')
+        self.assertContains(response, reverse('harvesters-status'))
+
+    def test_hcc_gui_view_renders_the_session_viewtype(self):
+        """Only the view of the session is rendered."""
+        cache.clear()
+        session = self.client.session
+        session['viewtype'] = 'list'
+        session.save()
+        response = self.client.get(reverse("hcc_gui"))
+        self.assertContains(response, 'id="div-list-view"')
+        self.assertNotContains(response, 'id="div-card-view"')
+        self.assertNotContains(response, 'id="div-table-view"')
+
+    def test_hcc_gui_view_caches_harvester_cards(self):
+        """A rendered card is reused until the harvester changes."""
+        cache.clear()
+        with patch('api.templatetags.hcc_tags.SchedulerForm',
+                   wraps=SchedulerForm) as form:
+            self.client.get(reverse("hcc_gui"))
+            self.client.get(reverse("hcc_gui"))
+            self.assertEqual(form.call_count, 1)
+            self.harvester.notes = 'changed notes'
+            self.harvester.save()
+            response = self.client.get(reverse("hcc_gui"))
+            self.assertEqual(form.call_count, 2)
+        self.assertContains(response, 'changed notes')
+
+    @patch('api.harvester_api_strategy.HarvesterApiStrategy.harvester_status',
+           autospec=True,
+           side_effect=lambda api: Response({api.harvester.name: {
+               HCCJC.GUI_STATUS: HCCJC.PRIMARY}}, status.HTTP_200_OK))
+    def test_harvesters_status_view_returns_batch(self, apicall):
+        """Test that only the requested enabled harvesters are called."""
+        Harvester.objects.create(name="Harvester2", owner=self.user,
+                                 url='http://somewhere.url/2', enabled=True)
+        Harvester.objects.create(name="Harvester3", owner=self.user,
+                                 url='http://somewhere.url/3')
+        response = self.client.get(reverse('harvesters-status'),
+                                   {'names': 'Harvester1,Harvester2,Harvester3,Unknown'})
+        self.assertEqual(json.loads(response.content), {
+            'Harvester1': {HCCJC.GUI_STATUS: HCCJC.PRIMARY},
+            'Harvester2': {HCCJC.GUI_STATUS: HCCJC.PRIMARY},
+        })
+        self.assertEqual(apicall.call_count, 2)
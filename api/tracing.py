@@ -0,0 +1,154 @@
+"""
+This module holds a small tracing API for HCC.
+
+Spans are nested via contextvars and handed to a pluggable exporter once
+they end. Field and attribute names follow the OpenTelemetry conventions,
+so exported spans can be converted to OTLP or fed into a collector.
+Tracing is off unless settings.TRACING_EXPORTER names an exporter class.
+"""
+import abc
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+CURRENT_SPAN = contextvars.ContextVar("span", default=None)
+
+_EXPORTER = None
+_EXPORTER_LOCK = threading.Lock()
+
+
+class Span:
+    """A timed operation with attributes, part of a trace."""
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        """add an attribute, e.g. http.status_code"""
+        self.attributes[key] = value
+
+    def set_error(self, exception):
+        """mark the span as failed"""
+        self.status = "ERROR"
+        self.attributes["exception.type"] = type(exception).__name__
+        self.attributes["exception.message"] = str(exception)
+
+    def end(self):
+        """stop the clock"""
+        self.end_ns = time.time_ns()
+
+    def to_dict(self):
+        """the span as OTLP-like JSON object"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class SpanExporter(metaclass=abc.ABCMeta):
+    """Base class of exporters, receives every finished span."""
+
+    @abc.abstractmethod
+    def export(self, span):
+        """hand over a finished span"""
+
+    def shutdown(self):
+        """flush and release resources"""
+
+
+class MemoryExporter(SpanExporter):
+    """Keeps finished spans in a list, used by tests."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+class JsonFileExporter(SpanExporter):
+    """
+    Appends every finished span as one JSON line to a file
+    (settings.TRACING_FILE), works without any collector.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.TRACING_FILE
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict()) + "\n"
+        with self._lock, open(self.path, "a") as file:
+            file.write(line)
+
+
+def get_exporter():
+    """the configured exporter or None if tracing is off"""
+    global _EXPORTER
+    if _EXPORTER is None and settings.TRACING_EXPORTER:
+        with _EXPORTER_LOCK:
+            if _EXPORTER is None:
+                _EXPORTER = import_string(settings.TRACING_EXPORTER)()
+    return _EXPORTER
+
+
+def set_exporter(exporter):
+    """replace the exporter, returns the old one"""
+    global _EXPORTER
+    old, _EXPORTER = _EXPORTER, exporter
+    return old
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Trace the enclosed block as a child of the current span:
+
+        with tracing.span("harvester.status", **{"hcc.harvester": name}) as current:
+            ...
+            current.set_attribute("http.status_code", 200)
+
+    Yields None if tracing is off.
+    """
+    exporter = get_exporter()
+    if exporter is None:
+        yield None
+        return
+    current = Span(name, CURRENT_SPAN.get(), attributes)
+    token = CURRENT_SPAN.set(current)
+    try:
+        yield current
+    except Exception as _e:
+        current.set_error(_e)
+        raise
+    finally:
+        CURRENT_SPAN.reset(token)
+        current.end()
+        exporter.export(current)
@@ -37,6 +37,12 @@ urlpatterns = [
          views.start_harvesters, name="run-harvesters"),
     path('harvesters/stop',
          views.stop_harvesters, name="stop-harvesters"),
+    path('harvesters/enable',
+         views.enable_harvesters, name="enable-harvesters"),
+    path('harvesters/disable',
+         views.disable_harvesters, name="disable-harvesters"),
+    path('harvesters/config',
+         views.configure_harvesters, name="configure-harvesters"),
     path('harvesters/<str:name>/',
          HarvesterDetailsView.as_view(), name="harvester-detail"),
     path('harvesters/<str:name>/start/',
@@ -47,6 +53,8 @@ urlpatterns = [
          views.get_harvester_state, name="harvester-status"),
     path('harvesters/status',
          views.get_harvester_states, name="all-harvester-status"),
+    path('harvesters/progress',
+         views.get_harvester_progresses, name="all-harvester-progress"),
     path('harvesters/<str:name>/schedule/',
          ScheduleHarvesterView.as_view(), name="harvester-cron"),
     path('users/',
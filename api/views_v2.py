@@ -2,7 +2,7 @@
 This is the views module which encapsulates the backend logic
 which will be riggered via the corresponding path (url).
 """
-import collections
+import itertools
 import json
 import logging
 
@@ -12,9 +12,13 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.contrib.messages.views import SuccessMessageMixin
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import (HttpResponse, HttpResponseRedirect, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from django.views.generic import RedirectView
 from django.views.generic.base import View
 from django.views.generic.edit import FormMixin
@@ -25,13 +29,19 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from api import admission, metrics, scheduler, snapshots
 from api.constants import HCCJSONConstants as HCCJC
+from api.executor import run_concurrently
+from api.filters import (HarvesterFilterBackend, requested_fields,
+                         status_matches)
 from api.forms import (HarvesterForm, SchedulerForm, UploadFileForm,
-                       ValidateFileForm, create_config_fields,
-                       create_config_form)
+                       config_values, create_config_form)
 from api.harvester_api import InitHarvester
+from api.harvester_import import (HarvesterImport, HarvesterImportError,
+                                  iter_json_array)
 from api.mixins import AjaxableResponseMixin
-from api.models import Harvester
+from api.models import Harvester, HarvesterSchedule
+from api.pagination import HarvesterCursorPagination
 from api.permissions import IsOwner
 from api.serializers import HarvesterSerializer, UserSerializer
 
@@ -45,6 +55,13 @@ __email__ = "jan.froemberg@tu-dresden.de"
 # Get an instance of a logger
 LOGGER = logging.getLogger(__name__)
 
+# the harvester views of the GUI, only the one of the session is rendered
+VIEWTYPES = ('card', 'list', 'table')
+
+# query parameters that switch the status list to a paginated list
+STATUS_LIST_PARAMS = ('enabled', 'prefix', 'owner', HCCJC.STATE, HCCJC.GUI_STATUS,
+                      'fields', 'page_size', 'cursor')
+
 
 def index(request):
     """
@@ -87,19 +104,21 @@ def toggle_harvesters(request, hnames):
     :param hnames: names of the harvesters
     :return: an HttpResponseRedirect to the Main HCC page
     """
-    names = hnames.split('-')
+    names = _split_names(hnames)
+    enabled = dict(Harvester.objects.filter(
+        name__in=names).values_list('name', 'enabled'))
+    to_enable = [name for name in names if enabled.get(name) is False]
+    to_disable = [name for name in names if enabled.get(name)]
+    with transaction.atomic():
+        Harvester.objects.filter(name__in=to_disable).set_enabled(False)
+        Harvester.objects.filter(name__in=to_enable).set_enabled(True)
     for name in names:
-        harv = get_object_or_404(Harvester, name=name)
-        if harv.enabled:
-            harv.disable()
-            LOGGER.info("%s disabled.", harv.name)
+        if name in enabled:
+            state = 'disabled' if enabled[name] else 'enabled'
+            LOGGER.info("%s %s.", name, state)
             messages.add_message(request, messages.INFO,
-                                 name + ' harvester disabled.')
-        else:
-            harv.enable()
-            LOGGER.info("%s enabled.", harv.name)
-            messages.add_message(request, messages.INFO,
-                                 name + ' harvester enabled.')
+                                 name + ' harvester ' + state + '.')
+    _report_missing(request, names, enabled)
     return HttpResponseRedirect(reverse('hcc_gui'))
 
 
@@ -130,8 +149,7 @@ def start_harvester(request, name):
     :return: an HttpResponseRedirect to the Main HCC page
     """
     harvester = get_object_or_404(Harvester, name=name)
-    api = InitHarvester(harvester).get_harvester_api()
-    response = api.start_harvest()
+    response = admission.start([harvester])[0]
     messages.add_message(request, messages.INFO,
                          name + ': ' + str(response.data[harvester.name]))
     return HttpResponseRedirect(reverse('hcc_gui'))
@@ -146,16 +164,33 @@ def start_selected_harvesters(request, hnames):
     :param hnames: names of the harvesters
     :return: an HttpResponseRedirect to the Main HCC page
     """
-    names = hnames.split('-')
-    for name in names:
-        harvester = get_object_or_404(Harvester, name=name)
-        api = InitHarvester(harvester).get_harvester_api()
-        response = api.start_harvest()
-        messages.add_message(request, messages.INFO,
-                             name + ': ' + str(response.data[harvester.name]))
+    names = _split_names(hnames)
+    harvesters = Harvester.objects.in_bulk(names, field_name='name')
+    selected = [harvesters[name] for name in names if name in harvesters]
+    # the harvesters are called concurrently (see api/executor.py) or queued
+    # by the admission control (see api/admission.py)
+    responses = admission.start(selected)
+    for harvester, response in zip(selected, responses):
+        messages.add_message(request, messages.INFO, harvester.name + ': ' +
+                             str(response.data[harvester.name]))
+    _report_missing(request, names, harvesters)
     return HttpResponseRedirect(reverse('hcc_gui'))
 
 
+def _split_names(hnames, separator='-'):
+    """the harvester names of a '-' separated path segment (or another
+    separator), without duplicates"""
+    return list(dict.fromkeys(name for name in hnames.split(separator) if name))
+
+
+def _report_missing(request, names, found):
+    """add a warning for the names that are not registered"""
+    missing = [name for name in names if name not in found]
+    if missing:
+        LOGGER.warning("harvesters not found: %s", ', '.join(missing))
+        messages.warning(request, 'Harvester(s) not found: ' + ', '.join(missing))
+
+
 @login_required
 def reset_harvester(request, name):
     """
@@ -183,12 +218,11 @@ def get_all_harvester_log(request):
     """
     feedback = {}
     feedback[HCCJC.LOG_DATA] = {}
-    harvesters = Harvester.objects.all()
+    harvesters = Harvester.objects.filter(enabled=True)
     for harvester in harvesters:
-        if harvester.enabled:
-            api = InitHarvester(harvester).get_harvester_api()
-            response = api.harvester_log()
-            feedback[HCCJC.LOG_DATA][harvester.name] = response.data[harvester.name][HCCJC.LOGS]
+        api = InitHarvester(harvester).get_harvester_api()
+        response = api.harvester_log()
+        feedback[HCCJC.LOG_DATA][harvester.name] = response.data[harvester.name][HCCJC.LOGS]
     return render(request, "hcc/harvester_logs.html", feedback)
 
 
@@ -205,6 +239,17 @@ def get_hcc_log(request):
     return response
 
 
+def get_metrics(request):
+    """
+    Returns the HCC metrics in the Prometheus text exposition format.
+    Protected by settings.METRICS_TOKEN if it is set.
+    """
+    if settings.METRICS_TOKEN and request.META.get(
+            'HTTP_AUTHORIZATION') != 'Bearer ' + settings.METRICS_TOKEN:
+        return HttpResponse('Unauthorized', status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @login_required
 def get_harvester_progress(request, name):
     """
@@ -221,6 +266,89 @@ def get_harvester_progress(request, name):
     return JsonResponse(feedback, status=response.status_code)
 
 
+@login_required
+def get_harvesters_progress(request):
+    """
+    Returns the progress of the given enabled harvesters
+    (?names=a,b,c) keyed by name. The GUI polls the progress of
+    all running harvesters with one request of this view.
+
+    :param request: the request
+    :return: JSON Feedback Array
+    """
+    names = _split_names(request.GET.get('names', ''), ',')
+    return JsonResponse(_harvesters_progress(
+        Harvester.objects.filter(name__in=names, enabled=True)))
+
+
+def _harvesters_progress(harvesters):
+    """
+    The progress of the harvesters keyed by name. Harvesters whose last
+    known state is idle answer from their snapshot, the others are called
+    concurrently.
+    """
+    harvesters = list(harvesters)
+    states = snapshots.states([harvester.name for harvester in harvesters])
+    feedback = {}
+    called = []
+    for harvester in harvesters:
+        known = None
+        if snapshots.is_idle(states.get(harvester.name)):
+            known = snapshots.get(harvester.name, snapshots.PROGRESS)
+        if known is None:
+            called.append(harvester)
+        else:
+            feedback[harvester.name] = known
+    for harvester, progress in zip(called, run_concurrently(_harvester_progress, called)):
+        feedback[harvester.name] = progress
+    # the progress poller of the dashboard sees harvests end first
+    admission.statuses_polled(feedback)
+    return {harvester.name: feedback[harvester.name] for harvester in harvesters}
+
+
+def _harvester_progress(harvester):
+    api = InitHarvester(harvester).get_harvester_api()
+    try:
+        return api.harvester_progress().data[harvester.name]
+    except (KeyError, TypeError) as _e:
+        # v7 harvesters without a readable progress answer, one of them
+        # must not fail the progress of all others
+        LOGGER.warning("no progress of %s: %r", harvester.name, _e)
+        return {
+            HCCJC.STATE: "no status",
+            HCCJC.GUI_STATUS: HCCJC.WARNING,
+            HCCJC.HEALTH: 'Error : no progress'
+        }
+
+
+@login_required
+def get_harvesters_status(request):
+    """
+    Returns the status of the given enabled harvesters
+    (?names=a,b,c) keyed by name. The GUI loads the status of
+    its harvesters in batches with this view after the page is shown.
+
+    :param request: the request
+    :return: JSON Feedback Array
+    """
+    names = _split_names(request.GET.get('names', ''), ',')
+    harvesters = list(Harvester.objects.filter(name__in=names, enabled=True))
+    feedback = {}
+    for harvester, response in zip(harvesters,
+                                   run_concurrently(_harvester_status, harvesters)):
+        if response:
+            feedback[harvester.name] = response.data[harvester.name]
+        else:
+            feedback[harvester.name] = {
+                HCCJC.GUI_STATUS: HCCJC.WARNING,
+                HCCJC.HEALTH: 'Error : no response object'
+            }
+    if settings.HCC_SCHEDULER:
+        scheduler.add_schedules(feedback)
+    admission.statuses_polled(feedback)
+    return JsonResponse(feedback)
+
+
 @login_required
 def harvester_status_history(request, name):
     """
@@ -242,19 +370,16 @@ def start_all_harvesters(request):
     :param request: the request
     :return: an HttpResponseRedirect to the Main HCC page
     """
-    harvesters = Harvester.objects.all()
-    for harvester in harvesters:
-        if harvester.enabled:
-            api = InitHarvester(harvester).get_harvester_api()
-            response = api.start_harvest()
-            if HCCJC.HEALTH in response.data[harvester.name]:
-                msg = harvester.name + ': ' + response.data[harvester.name][
-                    HCCJC.HEALTH]
-                messages.add_message(request, messages.INFO, msg)
-            else:
-                msg = harvester.name + ': ' + str(
-                    response.data[harvester.name])
-                messages.add_message(request, messages.INFO, msg)
+    harvesters = list(Harvester.objects.filter(enabled=True))
+    for harvester, response in zip(harvesters, admission.start(harvesters)):
+        if HCCJC.HEALTH in response.data[harvester.name]:
+            msg = harvester.name + ': ' + response.data[harvester.name][
+                HCCJC.HEALTH]
+            messages.add_message(request, messages.INFO, msg)
+        else:
+            msg = harvester.name + ': ' + str(
+                response.data[harvester.name])
+            messages.add_message(request, messages.INFO, msg)
 
     return HttpResponseRedirect(reverse('hcc_gui'))
 
@@ -267,19 +392,18 @@ def abort_all_harvesters(request):
     :param request: the request
     :return: an HttpResponseRedirect to the Main HCC page
     """
-    harvesters = Harvester.objects.all()
+    harvesters = Harvester.objects.filter(enabled=True)
     for harvester in harvesters:
-        if harvester.enabled:
-            api = InitHarvester(harvester).get_harvester_api()
-            response = api.stop_harvest()
-            if HCCJC.HEALTH in response.data[harvester.name]:
-                msg = harvester.name + ': ' + response.data[harvester.name][
-                    HCCJC.HEALTH]
-                messages.add_message(request, messages.INFO, msg)
-            else:
-                msg = harvester.name + ': ' + str(
-                    response.data[harvester.name])
-                messages.add_message(request, messages.INFO, msg)
+        api = InitHarvester(harvester).get_harvester_api()
+        response = api.stop_harvest()
+        if HCCJC.HEALTH in response.data[harvester.name]:
+            msg = harvester.name + ': ' + response.data[harvester.name][
+                HCCJC.HEALTH]
+            messages.add_message(request, messages.INFO, msg)
+        else:
+            msg = harvester.name + ': ' + str(
+                response.data[harvester.name])
+            messages.add_message(request, messages.INFO, msg)
     return HttpResponseRedirect(reverse('hcc_gui'))
 
 
@@ -294,6 +418,8 @@ def home(request):
     theme = request.session.get('theme', 'light')
     # viewtype (card/list/table) with default card
     viewtype = request.session.get('viewtype', 'card')
+    if viewtype not in VIEWTYPES:
+        viewtype = 'card'
     # collapse status (visible/collapsed)
     collapse_status = {}
     collapse_status['toolbox'] = request.session.get('toolbox', 'collapsed')
@@ -305,76 +431,24 @@ def home(request):
 
     # if user is logged in
     if request.user.is_authenticated:
-        forms = {}
-        response = None
-        harvesters = Harvester.objects.all()
-        num_harvesters = len(harvesters)
-        num_enabled_harvesters = 0
-        num_disabled_harvesters = 0
-        # get status of each enabled harvester
-        for harvester in harvesters:
-            # TODO do that call at client side!!
-            if harvester.enabled:
-                num_enabled_harvesters += 1
-                api = InitHarvester(harvester).get_harvester_api()
-                response = api.harvester_status()
-                if response:
-                    feedback[harvester.name] = response.data[harvester.name]
-
-                    if HCCJC.CRONTAB in response.data[harvester.name]:
-                        # if a GET (or any other method) we'll create form
-                        # initialized with a schedule for this harvester
-                        jsonstr = {
-                            HCCJC.POSTCRONTAB:
-                            response.data[harvester.name][HCCJC.CRONTAB]
-                        }
-                        placehldr = response.data[harvester.name][
-                            HCCJC.CRONTAB]
-                        form = SchedulerForm(prefix=harvester.name)
-                        if isinstance(placehldr, list):
-                            if len(placehldr) > 0:
-                                placehldr = response.data[harvester.name][HCCJC.CRONTAB][0]
-                        form.fields[HCCJC.POSTCRONTAB].widget.attrs.update(
-                            {'placeholder': placehldr})
-                        forms[harvester.name] = form
-                    else:
-                        jsonstr = {HCCJC.POSTCRONTAB: '0 0 * * *'}
-                        form = SchedulerForm(initial=jsonstr,
-                                             prefix=harvester.name)
-                        forms[harvester.name] = form
-                else:
-                    jsonstr = {HCCJC.POSTCRONTAB: '0 0 * * *'}
-                    form = SchedulerForm(initial=jsonstr,
-                                         prefix=harvester.name)
-                    forms[harvester.name] = form
-                    feedback[harvester.name] = {}
-                    feedback[harvester.name][HCCJC.GUI_STATUS] = HCCJC.WARNING
-                    feedback[harvester.name][
-                        HCCJC.HEALTH] = 'Error : no response object'
-            else:
-                num_disabled_harvesters += 1
-
-        # get total amount of docs
-        sum_harvested = 0
-        sum_max_docs = 0
-        for harvester in feedback.values():
-            if isinstance(harvester, dict):
-                for (_k, _v) in harvester.items():
-                    if _k == HCCJC.CACHED_DOCS:
-                        sum_harvested += int(_v)
-                    if _k == HCCJC.MAX_DOCUMENTS:
-                        if _v != 'N/A':
-                            sum_max_docs += int(_v)
-
-        feedback['sum_harvested'] = sum_harvested
-        feedback['sum_maxdocs'] = sum_max_docs
-        feedback['num_disabled_harvesters'] = num_disabled_harvesters
-        feedback['num_enabled_harvesters'] = num_enabled_harvesters
-        feedback['num_harvesters'] = num_harvesters
-        msg = '{} enabled Harvesters with total amount \
-               of harvested Items so far: {}'.format(num_enabled_harvesters,
-                                                     sum_harvested)
-        messages.add_message(request, messages.INFO, msg)
+        # both use the (enabled, name) index, already ordered
+        enabled_harvesters = list(Harvester.objects.filter(enabled=True))
+        disabled_harvesters = list(Harvester.objects.filter(enabled=False))
+        harvesters = enabled_harvesters + disabled_harvesters
+        # only the registry is rendered here, the status of each enabled
+        # harvester is loaded by the browser (see get_harvesters_status).
+        # A last known status is shown until then, the rendered harvester
+        # is cached until it or its state changes (see hcc/harvester_*.html)
+        names = [harvester.name for harvester in enabled_harvesters]
+        known = snapshots.get_many(names, snapshots.STATUS)
+        versions = snapshots.versions(names)
+        for harvester in enabled_harvesters:
+            harvester.snapshot = known.get(harvester.name)
+            harvester.snapshot_version = versions.get(harvester.name, 0)
+
+        feedback['num_disabled_harvesters'] = len(disabled_harvesters)
+        feedback['num_enabled_harvesters'] = len(enabled_harvesters)
+        feedback['num_harvesters'] = len(harvesters)
 
         # init form
         if request.method == 'POST':
@@ -385,8 +459,10 @@ def home(request):
         return render(
             request, 'hcc/index.html', {
                 'harvesters': harvesters,
+                'enabled_harvesters': enabled_harvesters,
+                'disabled_harvesters': disabled_harvesters,
                 'status': feedback,
-                'forms': forms,
+                'fragment_ttl': settings.FRAGMENT_CACHE_TTL,
                 'theme': theme,
                 'viewtype': viewtype,
                 'collapse_status': collapse_status
@@ -435,10 +511,8 @@ def start_harvesters(request, format=None):
     Start all harvesters via POST request.
     """
     feedback = {}
-    harvesters = Harvester.objects.all()
-    for harvester in harvesters:
-        api = InitHarvester(harvester).get_harvester_api()
-        response = api.start_harvest()
+    harvesters = list(Harvester.objects.all())
+    for harvester, response in zip(harvesters, admission.start(harvesters)):
         feedback[harvester.name] = response.data[harvester.name]
     return Response(feedback, status=status.HTTP_200_OK)
 
@@ -450,8 +524,8 @@ def start_harvest(request, name, format=None):
     Start harvest via POST request to an harvester url-endpoint.
     """
     harvester = Harvester.objects.get(name=name)
-    api = InitHarvester(harvester).get_harvester_api()
-    return api.start_harvest()
+    response = admission.start([harvester])[0]
+    return response
 
 
 @api_view(['POST'])
@@ -480,6 +554,147 @@ def stop_harvesters(request, format=None):
     return Response(feedback, status=status.HTTP_200_OK)
 
 
+@api_view(['POST'])
+@permission_classes((IsAuthenticated, ))
+def enable_harvesters(request, format=None):
+    """
+    Enable harvesters via POST request, see _set_enabled.
+    """
+    return _set_enabled(request, True)
+
+
+@api_view(['POST'])
+@permission_classes((IsAuthenticated, ))
+def disable_harvesters(request, format=None):
+    """
+    Disable harvesters via POST request, see _set_enabled.
+    """
+    return _set_enabled(request, False)
+
+
+def _set_enabled(request, enabled):
+    """
+    Enable or disable the harvesters selected by the request body with one
+    UPDATE, see _select_harvesters.
+    """
+    try:
+        queryset, missing = _select_harvesters(request.data)
+    except ValueError as _e:
+        return Response({HCCJC.MESSAGE: str(_e)}, status=status.HTTP_400_BAD_REQUEST)
+    changed = queryset.set_enabled(enabled)
+    LOGGER.info("%s %s.", ', '.join(changed) or 'no harvester',
+                'enabled' if enabled else 'disabled')
+    return Response({
+        'enabled' if enabled else 'disabled': changed,
+        'missing': missing,
+    }, status=status.HTTP_200_OK)
+
+
+def _select_harvesters(data):
+    """
+    The harvesters selected by a request body and the selected names that
+    are not registered. Selectors (combined with AND):
+    {"names": ["a", "b"]}, {"prefix": "oai_"}, {"owner": "username"}
+    or {"all": true}. Raises ValueError for an invalid selection.
+    """
+    queryset = Harvester.objects.all()
+    if not any(key in data for key in ('names', 'prefix', 'owner')) \
+            and data.get('all') is not True:
+        raise ValueError('Select harvesters by names, prefix, owner or all.')
+    missing = []
+    if 'names' in data:
+        names = data['names']
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise ValueError('names must be a list of names.')
+        queryset = queryset.filter(name__in=names)
+        found = set(Harvester.objects.filter(name__in=names).values_list('name', flat=True))
+        missing = [name for name in names if name not in found]
+    if 'prefix' in data:
+        queryset = queryset.filter(name__startswith=data['prefix'])
+    if 'owner' in data:
+        queryset = queryset.filter(owner__username=data['owner'])
+    return queryset, missing
+
+
+@api_view(['POST'])
+@permission_classes((IsAuthenticated, ))
+def configure_harvesters(request, format=None):
+    """
+    Change config parameters of many harvesters via POST request:
+    {"prefix": "oai_", "changes": {"submission.url": "http://..."}}
+    selects harvesters like _set_enabled. Every enabled harvester is diffed
+    against its (cached) config and only real changes are pushed, to all
+    harvesters concurrently. With "dry_run": true nothing is pushed.
+    """
+    changes = request.data.get('changes')
+    if not isinstance(changes, dict) or not changes or any(
+            isinstance(value, (dict, list)) for value in changes.values()):
+        return Response(
+            {HCCJC.MESSAGE: 'changes must map parameters ("<category>.<key>") to values.'},
+            status=status.HTTP_400_BAD_REQUEST)
+    try:
+        queryset, missing = _select_harvesters(request.data)
+    except ValueError as _e:
+        return Response({HCCJC.MESSAGE: str(_e)}, status=status.HTTP_400_BAD_REQUEST)
+    harvesters = list(queryset.order_by('name'))
+    enabled = [harvester for harvester in harvesters if harvester.enabled]
+    changes = {key: _config_text(value) for key, value in changes.items()}
+    dry_run = request.data.get('dry_run') is True
+    results = dict(zip(
+        [harvester.name for harvester in enabled],
+        run_concurrently(lambda harvester: _configure_harvester(harvester, changes, dry_run),
+                         enabled)))
+    if not dry_run:
+        pushed = [name for name, result in results.items() if result['changes']]
+        LOGGER.info("config of %s changed by user.", ', '.join(pushed) or 'no harvester')
+    return Response({
+        'harvesters': results,
+        'disabled': [harvester.name for harvester in harvesters if not harvester.enabled],
+        'missing': missing,
+    }, status=status.HTTP_200_OK)
+
+
+def _config_text(value):
+    """a config value the way the config form sends it"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return '' if value is None else str(value)
+
+
+def _configure_harvester(harvester, changes, dry_run):
+    """diff a harvester config against the changes and push the difference"""
+    api = InitHarvester(harvester).get_harvester_api()
+    config_data = snapshots.get_config(harvester.name)
+    if config_data is None:
+        response = api.get_harvester_config_data()
+        if response.status_code != status.HTTP_200_OK:
+            return {HCCJC.STATUS: 'failed',
+                    HCCJC.MESSAGE: response.data[harvester.name][HCCJC.HEALTH]}
+        config_data = response.data[harvester.name][HCCJC.HEALTH]
+    old_data = {key: _config_text(value) for key, value in config_values(config_data).items()}
+    result = {
+        'changes': {key: {"before": old_data[key], "after": value}
+                    for key, value in changes.items()
+                    if key in old_data and old_data[key] != value},
+        'unknown': [key for key in changes if key not in old_data],
+    }
+    if not result['changes'] or dry_run:
+        result[HCCJC.STATUS] = 'unchanged' if not result['changes'] else 'dry run'
+        return result
+    response = api.save_harvester_config_data(
+        {key: change["after"] for key, change in result['changes'].items()})
+    feedback = response.data[harvester.name][HCCJC.HEALTH]
+    if not isinstance(feedback, dict):
+        result.update({HCCJC.STATUS: 'failed', HCCJC.MESSAGE: feedback})
+        return result
+    message = feedback.get("message", "")
+    result[HCCJC.MESSAGE] = message
+    result[HCCJC.STATUS] = feedback.get("status", "failed")
+    if ("Cannot change value" in message) and ("Set parameter" in message):
+        result[HCCJC.STATUS] = "some issues"
+    return result
+
+
 @api_view(['GET'])
 @permission_classes((IsAuthenticated, ))
 def get_harvester_state(request, name, format=None):
@@ -488,7 +703,10 @@ def get_harvester_state(request, name, format=None):
     """
     harvester = get_object_or_404(Harvester, name=name)
     api = InitHarvester(harvester).get_harvester_api()
-    return api.harvester_status()
+    response = api.harvester_status()
+    if settings.HCC_SCHEDULER and isinstance(response.data, dict):
+        scheduler.add_schedules(response.data)
+    return response
 
 
 @api_view(['GET'])
@@ -496,25 +714,115 @@ def get_harvester_state(request, name, format=None):
 def get_harvester_states(request, format=None):
     """
     View to show all harvester states via GET request.
+
+    Without parameters all harvesters are returned as one object keyed by
+    name. With filters (?enabled=, ?prefix=, ?owner=, ?state=,
+    ?gui_status=), a projection (?fields=) or paging (?page_size=, ?cursor=)
+    the statuses are returned as cursor paginated list instead.
     """
+    if any(param in request.query_params for param in STATUS_LIST_PARAMS):
+        return _harvester_status_page(request)
     feedback = {}
     harvesters = Harvester.objects.all()
     for harvester in harvesters:
         api = InitHarvester(harvester).get_harvester_api()
         response = api.harvester_status()
         feedback[harvester.name] = response.data[harvester.name]
+    if settings.HCC_SCHEDULER:
+        scheduler.add_schedules(feedback)
+    admission.statuses_polled(feedback)
     return Response(feedback, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes((IsAuthenticated, ))
+def get_harvester_progresses(request, format=None):
+    """
+    View to show the progress of several harvesters via GET request,
+    all enabled harvesters or the ones in ?names=a,b,c.
+    """
+    harvesters = Harvester.objects.filter(enabled=True)
+    if request.query_params.get('names'):
+        harvesters = harvesters.filter(
+            name__in=_split_names(request.query_params['names'], ','))
+    return Response(_harvesters_progress(harvesters), status=status.HTTP_200_OK)
+
+
+def _harvester_status_page(request):
+    """
+    One page of live harvester statuses. Registry filters and the cursor
+    run in the database, only the harvesters of the page are called
+    (concurrently). State filters apply to the statuses of the page, so a
+    filtered page may hold less than page_size entries.
+    """
+    fields = requested_fields(request)
+    queryset = HarvesterFilterBackend().filter_queryset(
+        request, Harvester.objects.all(), None)
+    paginator = HarvesterCursorPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    statuses = {harvester.name: response.data[harvester.name]
+                for harvester, response in zip(page, run_concurrently(_harvester_status, page))}
+    if settings.HCC_SCHEDULER:
+        scheduler.add_schedules(statuses)
+    admission.statuses_polled(statuses)
+    results = []
+    for harvester in page:
+        entry = {'name': harvester.name}
+        entry.update(statuses[harvester.name])
+        if not status_matches(request, entry):
+            continue
+        if fields is not None:
+            entry = {key: value for key, value in entry.items()
+                     if key in fields or key == 'name'}
+        results.append(entry)
+    return paginator.get_paginated_response(results)
+
+
+def _harvester_status(harvester):
+    api = InitHarvester(harvester).get_harvester_api()
+    return api.harvester_status()
+
+
 @login_required
 def harvester_data_to_file(request):
     """
     Function that gets data of all harvesters in the database and returns it
-    through a file.
+    through a file. The harvesters are streamed as JSON array, as NDJSON
+    (one harvester per line) if requested via ?format=ndjson or the Accept
+    header. The CompressionMiddleware compresses the stream.
     """
-    data = list(Harvester.objects.values('name', 'notes', 'url', 'enabled'))
+    ndjson = (request.GET.get('format') == 'ndjson'
+              or request.META.get('HTTP_ACCEPT') == 'application/x-ndjson')
+    response = StreamingHttpResponse(
+        _export_harvesters(ndjson, settings.EXPORT_CHUNK_SIZE),
+        content_type='application/x-ndjson' if ndjson else 'application/json')
+    patch_vary_headers(response, ('Accept',))
+    return response
 
-    return JsonResponse(data, safe=False)
+
+def _export_harvesters(ndjson, chunk_size):
+    """
+    Yield the registry as JSON text, one chunk of harvesters at a time.
+    The queryset is iterated, so memory stays constant for any registry.
+    """
+    rows = Harvester.objects.values(
+        'name', 'notes', 'url', 'enabled').iterator(chunk_size=chunk_size)
+    if ndjson:
+        separator, end = '\n', '\n'
+    else:
+        # the first byte goes out before the database is queried
+        yield '['
+        separator, end = ', ', ''
+    first = True
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        text = separator.join(json.dumps(row) for row in chunk) + end
+        yield text if first or ndjson else separator + text
+        first = False
+    if not ndjson:
+        yield ']'
 
 
 @login_required
@@ -523,21 +831,9 @@ def upload_file(request):
     This function handles POST requests to upload a file
     containing harvester data and add it to the database
     """
-    data = {}
     f = request.FILES['upload_file']
-    # Check if file type is correct and get the content
-    if f.content_type == 'application/json':
-        try:
-            content = json.load(f)
-        except json.JSONDecodeError:
-            message = (
-                'Upload failed. '
-                'File content was either wrong formatted or empty. '
-                'Must be a JSON array of objects with harvester data.'
-            )
-            messages.warning(request, message)
-            return HttpResponseRedirect(reverse('hcc_gui'))
-    else:
+    # Check if file type is correct
+    if f.content_type != 'application/json':
         message = (
             'Upload failed. '
             'File type could not been handled. '
@@ -546,75 +842,43 @@ def upload_file(request):
         messages.warning(request, message)
         return HttpResponseRedirect(reverse('hcc_gui'))
 
-    required_keys = ('name', 'notes', 'url', 'enabled')
-    for harvester_data in content:
-        # 'content' should be a list of dictionaries
-        if not isinstance(harvester_data, collections.Mapping):
-            message = (
-                'Validation failed. '
-                'File content could not been handled.'
-                'Should be a list of dictionaries!'
-            )
-            messages.warning(request, message)
-            return HttpResponseRedirect(reverse('hcc_gui'))
-
-        # The json file should contain the required harvester data
-        if not all(key in harvester_data for key in required_keys):
-            message = (
-                'Validation failed. '
-                'Key missmatch! Required: name, notes, url, enabled'
-            )
-            messages.warning(request, message)
-            return HttpResponseRedirect(reverse('hcc_gui'))
-
-        data = harvester_data.copy()
-        if Harvester.objects.filter(name=harvester_data['name']).exists():
-            # Harvester already exists -> update harvester
-            harvester = Harvester.objects.get(name=harvester_data['name'])
-            data['notes'] = harvester.notes  # Notes should not be updated
-            if ((harvester.url == harvester_data['url']
-                 and harvester.enabled == harvester_data['enabled'])):
-                continue
-            elif not harvester.url == harvester_data['url']:
-                if Harvester.objects.filter(
-                        url=harvester_data['url']).exists():
-                    # The url should be unique. Leave the existing harvester data
-                    # and ignore the new one.
-                    continue
-                # Create new Harvester with new url
-                harvester = Harvester(owner=request.user)
-                counter = 1
-                while True:
-                    # Loop until the harvester name is not already used
-                    postfix = '_{}'.format(counter)
-                    temp_name = harvester_data['name'] + postfix
-                    if not Harvester.objects.filter(name=temp_name).exists():
-                        data['name'] = temp_name
-                        break
-                    counter += 1
-        elif Harvester.objects.filter(url=harvester_data['url']).exists():
-            # The url should be unique. Leave the existing harvester data
-            # and ignore the new one
-            continue
-        else:
-            # Create a new harvester
-            harvester = Harvester(owner=request.user)
+    # the file is parsed while it is imported, in chunks of UPLOAD_CHUNK_SIZE
+    importer = HarvesterImport(request.user)
+    progress = _import_harvesters(importer, iter_json_array(f))
+    if request.META.get('HTTP_ACCEPT') == 'application/x-ndjson':
+        # report the progress line by line while importing
+        return StreamingHttpResponse(
+            (json.dumps(line) + '\n' for line in progress),
+            content_type='application/x-ndjson')
 
-        form = ValidateFileForm(data, instance=harvester)
-        if form.is_valid():
-            form.save()
-        else:
-            message = (
-                'Validation failed. '
-                'Content data could not been saved.'
-            )
-            messages.warning(request, message)
-            return HttpResponseRedirect(reverse('hcc_gui'))
+    for result in progress:
+        pass
+    if result['status'] != HCCJC.SUCCESS:
+        messages.warning(request, result[HCCJC.MESSAGE])
+        return HttpResponseRedirect(reverse('hcc_gui'))
 
-    messages.success(request, 'Upload successful!')
+    messages.success(request, 'Upload successful! {} created, {} updated, {} skipped.'.format(
+        result['created'], result['updated'], result['skipped']))
     return HttpResponseRedirect(reverse('hcc_gui'))
 
 
+def _import_harvesters(importer, entries):
+    """
+    Run a HarvesterImport in one transaction. Yields a progress dict after
+    every chunk and a final one with status success or warning.
+    """
+    try:
+        with transaction.atomic():
+            for processed in importer.run(entries, settings.UPLOAD_CHUNK_SIZE):
+                LOGGER.info("harvester import: %d entries processed", processed)
+                yield {'status': 'progress', 'processed': processed}
+    except HarvesterImportError as _e:
+        yield {'status': HCCJC.WARNING, HCCJC.MESSAGE: str(_e)}
+        return
+    yield {'status': HCCJC.SUCCESS, 'created': importer.created,
+           'updated': importer.updated, 'skipped': importer.skipped}
+
+
 @login_required
 def upload_file_form(request):
     """
@@ -636,6 +900,31 @@ class HarvesterCreateView(generics.ListCreateAPIView):
     queryset = Harvester.objects.all()
     serializer_class = HarvesterSerializer
     permission_classes = (permissions.IsAuthenticated, IsOwner)
+    pagination_class = HarvesterCursorPagination
+    filter_backends = (HarvesterFilterBackend, )
+
+    def get_queryset(self):
+        """Load only the requested fields (?fields=), owner names are joined."""
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        fields = self._fields()
+        if fields is None:
+            return queryset.select_related('owner')
+        # the name is the cursor of the pagination
+        columns = {'name'} | (set(fields) - {'owner'})
+        if 'owner' in fields:
+            queryset = queryset.select_related('owner')
+            columns.add('owner__username')
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            kwargs['fields'] = self._fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def _fields(self):
+        return requested_fields(self.request, HarvesterSerializer.Meta.fields)
 
     def perform_create(self, serializer):
         """Save the post data when creating a new harvester."""
@@ -734,6 +1023,9 @@ class ConfigHarvesterView(LoginRequiredMixin, View,
     """
     This class handles GET, DELETE and POST requests
     to control the config of the harvesters.
+    The config fetched for the form is kept as snapshot, the form posts its
+    version token back, so saving only fetches the config if it changed or
+    expired in between.
     """
 
     @staticmethod
@@ -746,9 +1038,9 @@ class ConfigHarvesterView(LoginRequiredMixin, View,
         if response.status_code != status.HTTP_200_OK:
             data["message"] = response.data[harvester.name][HCCJC.HEALTH]
         else:
-            form = create_config_form(
-                response.data[harvester.name][HCCJC.HEALTH])
-            data["form"] = form
+            config_data = response.data[harvester.name][HCCJC.HEALTH]
+            data["form"] = create_config_form(config_data)
+            data["config_version"] = snapshots.config_token(config_data)
         data["hname"] = myname
         return render(request, "hcc/harvester_config_form.html", data)
 
@@ -756,13 +1048,16 @@ class ConfigHarvesterView(LoginRequiredMixin, View,
         myname = kwargs['name']
         harvester = get_object_or_404(Harvester, name=myname)
         api = InitHarvester(harvester).get_harvester_api()
-        response = api.get_harvester_config_data()
-        old_config_data = response.data[harvester.name][HCCJC.HEALTH]
-        (fields, old_data) = create_config_fields(old_config_data)
+        old_config_data = snapshots.get_config(
+            harvester.name, request.POST.get('config_version', ''))
+        if old_config_data is None:
+            response = api.get_harvester_config_data()
+            old_config_data = response.data[harvester.name][HCCJC.HEALTH]
+        old_data = config_values(old_config_data)
         data = {}
         changes = {}  # before-after data
         config_changes = {}  # only after data to send to api
-        for key in fields:
+        for key in old_data:
             # In the response all boolean fields are either set "on" if True
             # or None if false. -> convert it
             if self.request.POST.get(key) == "on":
@@ -808,9 +1103,11 @@ class ScheduleHarvesterView(
     def post(self, request, *args, **kwargs):
         myname = kwargs['name']
         harvester = get_object_or_404(Harvester, name=myname)
-        api = InitHarvester(harvester).get_harvester_api()
         crontab = request.POST.get(harvester.name + "-" + HCCJC.POSTCRONTAB,
                                    False)
+        if settings.HCC_SCHEDULER:
+            return JsonResponse(_save_schedule(harvester, crontab))
+        api = InitHarvester(harvester).get_harvester_api()
         if crontab:
             response = api.add_schedule(crontab)
         else:
@@ -820,10 +1117,34 @@ class ScheduleHarvesterView(
     def delete(self, request, *args, **kwargs):
         myname = kwargs['name']
         harvester = get_object_or_404(Harvester, name=myname)
-        api = InitHarvester(harvester).get_harvester_api()
         data = json.loads(request.body)
-        response = api.delete_schedule(data[HCCJC.POSTCRONTAB])
-        messages.add_message(
-            request, messages.INFO, harvester.name + ': '
-            + response.data[harvester.name][HCCJC.HEALTH])
+        if settings.HCC_SCHEDULER:
+            message = _save_schedule(harvester, False, data[HCCJC.POSTCRONTAB])[HCCJC.MESSAGE]
+        else:
+            api = InitHarvester(harvester).get_harvester_api()
+            response = api.delete_schedule(data[HCCJC.POSTCRONTAB])
+            message = response.data[harvester.name][HCCJC.HEALTH]
+        messages.add_message(request, messages.INFO, harvester.name + ': ' + message)
         return HttpResponseRedirect(reverse('hcc_gui'))
+
+
+def _save_schedule(harvester, crontab, delete=None):
+    """
+    Add a crontab of the HCC scheduler (settings.HCC_SCHEDULER), without
+    crontab delete the crontab given as delete or all crontabs of the harvester.
+    """
+    if crontab:
+        schedule = HarvesterSchedule(harvester=harvester, crontab=crontab.strip())
+        try:
+            schedule.full_clean()
+        except ValidationError as _e:
+            return {HCCJC.STATUS: 'failed', HCCJC.MESSAGE: ' '.join(_e.messages)}
+        schedule.save()
+        LOGGER.info("%s harvester schedule %s added by user.", harvester.name, crontab)
+        return {HCCJC.STATUS: 'Ok', HCCJC.MESSAGE: 'Crontab {} added.'.format(crontab)}
+    schedules = harvester.schedules.all()
+    if delete:
+        schedules = schedules.filter(crontab=delete)
+    deleted, _ = schedules.delete()
+    LOGGER.info("%s harvester schedules deleted by user.", harvester.name)
+    return {HCCJC.STATUS: 'Ok', HCCJC.MESSAGE: '{} crontabs deleted.'.format(deleted)}
@@ -0,0 +1,10 @@
+"""
+Tools to load-test the Harvester Control Center without real GeRDI harvesters.
+"""
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
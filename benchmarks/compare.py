@@ -0,0 +1,90 @@
+"""
+Compare two benchmark result files (see benchmarks.run).
+
+Usage: python -m benchmarks.compare result.json baseline.json --threshold 0.2
+
+Exits with status 1 if a scenario got slower (or its throughput lower)
+than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+# metric name -> True if higher is better
+METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "throughput_rps": True,
+}
+
+
+def _key(result):
+    return result["scenario"], result["size"]
+
+
+def compare(current, baseline, threshold=0.2):
+    """
+    Compare the results of two benchmark runs.
+    Returns a list of rows {scenario, size, metric, baseline, current,
+    change, regression}, change is relative (0.1 == 10% worse).
+    """
+    baseline_results = {_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = baseline_results.get(_key(result))
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old_value, new_value = old.get(metric), result.get(metric)
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value
+            if higher_is_better:
+                change = -change
+            rows.append({
+                "scenario": result["scenario"],
+                "size": result["size"],
+                "metric": metric,
+                "baseline": old_value,
+                "current": new_value,
+                "change": round(change, 4),
+                "regression": change > threshold,
+            })
+    return rows
+
+
+def format_rows(rows):
+    """render comparison rows as a text table"""
+    lines = ["{:<22} {:>6} {:<15} {:>12} {:>12} {:>9}".format(
+        "scenario", "size", "metric", "baseline", "current", "change")]
+    for row in rows:
+        lines.append("{:<22} {:>6} {:<15} {:>12.2f} {:>12.2f} {:>+8.1f}%{}".format(
+            row["scenario"], row["size"], row["metric"], row["baseline"],
+            row["current"], row["change"] * 100, " REGRESSION" if row["regression"] else ""))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("current", help="result file of the run to check")
+    parser.add_argument("baseline", help="result file of the baseline run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative slowdown before failing (default: 0.2)")
+    args = parser.parse_args()
+
+    with open(args.current) as current, open(args.baseline) as baseline:
+        rows = compare(json.load(current), json.load(baseline), args.threshold)
+    print(format_rows(rows))
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Launch a fleet of stub harvesters and register them in HCC.
+
+The fleet is spread over a few StubFleetServers (one thread pool each),
+the harvesters are registered as Harvester rows named <prefix>_<n> so that
+HCC talks to them like to real harvesters.
+
+Usage: python -m benchmarks.fleet --size 100 --register --owner admin
+"""
+import argparse
+import os
+import time
+
+from benchmarks.stub_harvester import (StubFleetServer, add_arguments,
+                                       build_harvesters, settings_from_args)
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+class Fleet:
+    """
+    A number of stub harvesters served in background threads.
+
+    with Fleet(100, version="mixed") as fleet:
+        fleet.register(owner)
+        ...
+    """
+
+    def __init__(self, size, servers=1, version=7, prefix="stub", settings=None,
+                 host="127.0.0.1", base_port=0):
+        self.prefix = prefix
+        self.harvesters = build_harvesters(size, version, prefix, settings)
+        self.servers = []
+        servers = max(1, min(servers, size or 1))
+        for i in range(servers):
+            port = base_port + i if base_port else 0
+            self.servers.append(StubFleetServer((host, port), self.harvesters[i::servers]))
+
+    def start(self):
+        """start serving all harvesters"""
+        for server in self.servers:
+            server.start()
+        return self
+
+    def stop(self):
+        """stop all servers"""
+        for server in self.servers:
+            server.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset(self):
+        """put every harvester back into the idle state"""
+        for harvester in self.harvesters:
+            harvester.reset()
+
+    def urls(self):
+        """{harvester name: url} of the whole fleet"""
+        return {name: server.url_for(name)
+                for server in self.servers for name in server.harvesters}
+
+    def register(self, owner, enabled=True):
+        """
+        Replace all Harvester rows of this prefix by the fleet.
+        Needs a configured Django (see setup_django).
+        """
+        from api.models import Harvester
+
+        self.unregister()
+        Harvester.objects.bulk_create(
+            Harvester(name=name, url=url, owner=owner, enabled=enabled,
+                      notes="stub harvester")
+            for name, url in self.urls().items())
+
+    def unregister(self):
+        """delete all Harvester rows of this prefix"""
+        from api.models import Harvester
+
+        Harvester.objects.filter(name__startswith=self.prefix + "_").delete()
+
+
+def setup_django():
+    """configure Django for use outside of manage.py"""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hcc_py.settings")
+    django.setup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10, help="number of harvesters")
+    parser.add_argument("--servers", type=int, default=4,
+                        help="number of HTTP servers to spread the fleet over")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=9000,
+                        help="port of the first server, 0 for random ports")
+    parser.add_argument("--prefix", default="stub", help="harvester name prefix")
+    parser.add_argument("--register", action="store_true",
+                        help="register the fleet as Harvester rows in the HCC database")
+    parser.add_argument("--owner", default="admin", help="owner of the registered harvesters")
+    parser.add_argument("--keep", action="store_true",
+                        help="keep the registered harvesters on exit")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    version = args.version if args.version == "mixed" else int(args.version)
+    fleet = Fleet(args.size, args.servers, version, args.prefix, settings_from_args(args),
+                  args.host, args.base_port)
+    with fleet:
+        for server in fleet.servers:
+            print("serving {} harvesters on {}".format(len(server.harvesters), server.base_url))
+        if args.register:
+            setup_django()
+            from django.contrib.auth.models import User
+
+            fleet.register(User.objects.get(username=args.owner))
+            print("registered {} harvesters".format(args.size))
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if args.register and not args.keep:
+                fleet.unregister()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Benchmark the hot HCC endpoints against a simulated harvester fleet.
+
+For every fleet size a stub fleet (see benchmarks.fleet) is started and
+registered in a throw-away test database, then each scenario is requested
+a number of times through the Django test client. The whole view and
+strategy layer, including the HTTP calls to the harvesters, is measured.
+
+Usage: python -m benchmarks.run --sizes 10,100,1000 --output result.json
+       python -m benchmarks.run --baseline benchmarks/baseline.json
+"""
+import argparse
+import datetime
+import io
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter, OrderedDict
+
+from benchmarks.compare import compare, format_rows
+from benchmarks.fleet import Fleet, setup_django
+from benchmarks.stub_harvester import add_arguments, settings_from_args
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+def _home(client, fleet, iteration):
+    return client.get("/hcc/")
+
+
+def _status(client, fleet, iteration):
+    return client.get("/v1/harvesters/status")
+
+
+def _progress(client, fleet, iteration):
+    harvester = fleet.harvesters[iteration % len(fleet.harvesters)]
+    return client.get("/hcc/{}/progress".format(harvester.name))
+
+
+def _startall(client, fleet, iteration):
+    fleet.reset()
+    return client.get("/hcc/startall")
+
+
+def _logs(client, fleet, iteration):
+    return client.get("/hcc/logs")
+
+
+def _saveharvesters(client, fleet, iteration):
+    return client.get("/hcc/saveharvesters")
+
+
+def _loadharvesters(client, fleet, iteration):
+    """upload the registered fleet (unchanged) plus as many new harvesters"""
+    content = [{"name": name, "notes": "", "url": url, "enabled": True}
+               for name, url in fleet.urls().items()]
+    content += [{"name": "upload_{}_{}".format(iteration, i), "notes": "",
+                 "url": "http://upload.example.org/{}/{}".format(iteration, i),
+                 "enabled": False}
+                for i in range(len(fleet.harvesters))]
+    upload = io.BytesIO(json.dumps(content).encode())
+    upload.name = "harvesters.json"
+    # the test client sends the content type of a file via mimetypes
+    return client.post("/hcc/loadharvesters", {"upload_file": upload})
+
+
+# loadharvesters adds harvesters, so it has to run last
+SCENARIOS = OrderedDict([
+    ("home", _home),
+    ("status", _status),
+    ("progress", _progress),
+    ("startall", _startall),
+    ("logs", _logs),
+    ("saveharvesters", _saveharvesters),
+    ("loadharvesters", _loadharvesters),
+])
+
+
+def percentile(values, fraction):
+    """linear interpolated percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(scenario, size, timings, queries, statuses, errors):
+    """build the result entry of one scenario and fleet size"""
+    total = sum(timings)
+    millis = [timing * 1000 for timing in timings]
+    return OrderedDict([
+        ("scenario", scenario),
+        ("size", size),
+        ("requests", len(timings)),
+        ("errors", errors),
+        ("status_codes", dict(Counter(str(code) for code in statuses))),
+        ("mean_ms", round(total * 1000 / len(timings), 3) if timings else None),
+        ("min_ms", round(min(millis), 3) if millis else None),
+        ("p50_ms", round(percentile(millis, 0.5), 3) if millis else None),
+        ("p90_ms", round(percentile(millis, 0.9), 3) if millis else None),
+        ("p95_ms", round(percentile(millis, 0.95), 3) if millis else None),
+        ("p99_ms", round(percentile(millis, 0.99), 3) if millis else None),
+        ("max_ms", round(max(millis), 3) if millis else None),
+        ("throughput_rps", round(len(timings) / total, 3) if total else None),
+        ("db_queries", round(sum(queries) / len(queries), 1) if queries else None),
+    ])
+
+
+def drop_messages(client):
+    """
+    forget the flash messages of the previous request; the test client does
+    not follow the redirect that would display them, so every later request
+    would store them again (startall leaves one per harvester)
+    """
+    from django.contrib.messages.storage.cookie import CookieStorage
+    from django.contrib.messages.storage.session import SessionStorage
+
+    client.cookies.pop(CookieStorage.cookie_name, None)
+    session = client.session
+    if session.pop(SessionStorage.session_key, None) is not None:
+        session.save()
+
+
+def run_scenario(client, fleet, name, iterations, warmup=1):
+    """request one scenario iterations times, returns a result entry"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    scenario = SCENARIOS[name]
+    timings, queries, statuses = [], [], []
+    errors = 0
+    for iteration in range(warmup + iterations):
+        drop_messages(client)
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            try:
+                response = scenario(client, fleet, iteration)
+            except Exception:  # pylint: disable=broad-except
+                response = None
+            elapsed = time.perf_counter() - start
+        if iteration < warmup:
+            continue
+        timings.append(elapsed)
+        queries.append(len(context.captured_queries))
+        if response is None:
+            errors += 1
+            statuses.append("exception")
+        else:
+            statuses.append(response.status_code)
+            if response.status_code >= 500:
+                errors += 1
+    return summarize(name, len(fleet.harvesters), timings, queries, statuses, errors)
+
+
+def run(sizes, scenarios, iterations, fleet_options):
+    """run all scenarios for all fleet sizes in a throw-away test database"""
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from api.models import Harvester
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    results = []
+    try:
+        user = User.objects.create_user("benchmark")
+        for size in sizes:
+            with Fleet(size, **fleet_options) as fleet:
+                Harvester.objects.all().delete()
+                fleet.register(user)
+                client = Client()
+                client.force_login(user)
+                for name in scenarios:
+                    result = run_scenario(client, fleet, name, iterations)
+                    print("{scenario:<16} size {size:>5}: p50 {p50_ms:>10.2f} ms  "
+                          "p95 {p95_ms:>10.2f} ms  {throughput_rps:>8.2f} req/s  "
+                          "errors {errors}".format(**result), file=sys.stderr)
+                    results.append(result)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000",
+                        help="comma separated fleet sizes (default: 10,100,1000)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="comma separated scenarios, one of " + ", ".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=5,
+                        help="measured requests per scenario and size")
+    parser.add_argument("--servers", type=int, default=4,
+                        help="number of HTTP servers to spread the fleet over")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--baseline", help="compare the result with this result file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative slowdown against the baseline")
+    parser.add_argument("--log", action="store_true",
+                        help="keep HCC logging enabled (off by default, it floods log/)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error("unknown scenarios: {}".format(", ".join(sorted(unknown))))
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    setup_django()
+    if not args.log:
+        logging.disable(logging.CRITICAL)
+
+    settings = settings_from_args(args)
+    version = args.version if args.version == "mixed" else int(args.version)
+    results = run(sizes, scenarios, args.iterations,
+                  {"servers": args.servers, "version": version, "settings": settings})
+
+    document = OrderedDict([
+        ("meta", OrderedDict([
+            ("date", datetime.datetime.now().isoformat(timespec="seconds")),
+            ("revision", _git_revision()),
+            ("python", platform.python_version()),
+            ("platform", platform.platform()),
+            ("iterations", args.iterations),
+            ("harvester_version", args.version),
+            ("stub", vars(settings)),
+        ])),
+        ("results", results),
+    ])
+    output = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            rows = compare(document, json.load(file), args.threshold)
+        print(format_rows(rows), file=sys.stderr)
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
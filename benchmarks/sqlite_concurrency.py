@@ -0,0 +1,135 @@
+"""
+Benchmark concurrent reads and writes on an SQLite database file, once with
+the SQLite defaults (rollback journal, full sync) and once with the pragmas
+HCC sets on its connections (settings.SQLITE_PRAGMAS, see api/db.py).
+
+Reader threads play gunicorn workers rendering the dashboard (select all
+harvesters), writer threads play a poller storing status snapshots (update
+one harvester per transaction). Every thread has its own connection.
+
+Usage: python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --duration 5
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from benchmarks.fleet import setup_django
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+# the sqlite3 module default, Django passes no other timeout either
+DEFAULT_TIMEOUT = 5.0
+
+
+def create_database(path, rows):
+    """a harvester like table with rows entries"""
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE harvester (id INTEGER PRIMARY KEY, name TEXT UNIQUE, "
+        "url TEXT, enabled BOOL, state TEXT, harvested INTEGER, modified REAL)")
+    connection.executemany(
+        "INSERT INTO harvester (name, url, enabled, state, harvested, modified) "
+        "VALUES (?, ?, 1, 'IDLE', 0, 0)",
+        [("harvester_{}".format(i), "http://localhost/{}".format(i)) for i in range(rows)])
+    connection.commit()
+    connection.close()
+
+
+def _worker(path, pragmas, stop, results, write, rows, index):
+    connection = sqlite3.connect(path, timeout=DEFAULT_TIMEOUT)
+    if pragmas:
+        from api.db import apply_pragmas
+        apply_pragmas(connection.cursor(), pragmas)
+    operations, locked, latencies = 0, 0, []
+    counter = index
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            if write:
+                counter += 1
+                with connection:
+                    connection.execute(
+                        "UPDATE harvester SET state = ?, harvested = ?, modified = ? "
+                        "WHERE id = ?",
+                        ("HARVESTING", counter, time.time(), counter % rows + 1))
+            else:
+                connection.execute(
+                    "SELECT name, url, enabled, state, harvested FROM harvester "
+                    "ORDER BY name").fetchall()
+        except sqlite3.OperationalError:
+            # database is locked
+            locked += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+        operations += 1
+    connection.close()
+    results.append((write, operations, locked, max(latencies, default=0)))
+
+
+def run(pragmas, readers, writers, duration, rows):
+    """run readers and writers for duration seconds on a fresh database"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.sqlite3")
+        create_database(path, rows)
+        if pragmas.get("journal_mode"):
+            # the journal mode is persistent, switch it before the threads start
+            connection = sqlite3.connect(path)
+            connection.execute("PRAGMA journal_mode = {}".format(pragmas["journal_mode"]))
+            connection.close()
+        stop = threading.Event()
+        results = []
+        threads = [threading.Thread(target=_worker,
+                                    args=(path, pragmas, stop, results, i < writers, rows, i))
+                   for i in range(readers + writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    def total(write, column):
+        return sum(result[column] for result in results if result[0] == write)
+
+    return OrderedDict([
+        ("reads_per_s", round(total(False, 1) / duration, 1)),
+        ("writes_per_s", round(total(True, 1) / duration, 1)),
+        ("locked_errors", total(False, 2) + total(True, 2)),
+        ("max_read_ms", round(max((r[3] for r in results if not r[0]), default=0) * 1000, 1)),
+        ("max_write_ms", round(max((r[3] for r in results if r[0]), default=0) * 1000, 1)),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8, help="reading threads")
+    parser.add_argument("--writers", type=int, default=2, help="writing threads")
+    parser.add_argument("--duration", type=float, default=5, help="seconds per run")
+    parser.add_argument("--rows", type=int, default=1000, help="harvesters in the table")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    document = OrderedDict()
+    for name, pragmas in (("default", {}), ("tuned", settings.SQLITE_PRAGMAS)):
+        document[name] = run(pragmas, args.readers, args.writers, args.duration, args.rows)
+        print("{:<8} {}".format(name, json.dumps(document[name])), file=sys.stderr)
+    document["pragmas"] = settings.SQLITE_PRAGMAS
+    print(json.dumps(document, indent=2))
+
+
+if __name__ == "__main__":
+    main()
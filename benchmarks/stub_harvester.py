@@ -0,0 +1,466 @@
+"""
+A stub harvester server which speaks the harvester library API v6 and v7
+(see api.constants) well enough for HCC to control it.
+
+One server hosts any number of simulated harvesters, each one lives under
+its own path prefix: http://127.0.0.1:<port>/<harvester name>.
+Latency, error rate, state transitions and log size are configurable.
+
+Usage: python -m benchmarks.stub_harvester --port 9000 --harvesters 10
+"""
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from api.constants import HarvesterApiConstants as HAC
+from api.constants import HarvesterApiConstantsV6 as V6
+from api.constants import HarvesterApiConstantsV7 as V7
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+IDLE = "IDLE"
+QUEUED = "QUEUED"
+HARVESTING = "HARVESTING"
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class StubSettings:
+    """
+    Behaviour of a simulated harvester.
+
+    latency:          mean response delay in seconds
+    jitter:           the delay is drawn uniformly from latency +/- jitter
+    error_rate:       probability (0..1) of answering a request with a 500
+    queue_time:       seconds a started harvest stays queued
+    harvest_time:     seconds a harvest runs until the harvester is idle again
+    max_docs:         number of documents a harvest produces
+    log_lines:        number of lines the log endpoint returns
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0,
+                 queue_time=1.0, harvest_time=30.0, max_docs=1000,
+                 log_lines=100):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.queue_time = queue_time
+        self.harvest_time = harvest_time
+        self.max_docs = max_docs
+        self.log_lines = log_lines
+
+    def delay(self):
+        """returns the simulated response delay in seconds"""
+        return max(0.0, random.uniform(self.latency - self.jitter,
+                                       self.latency + self.jitter))
+
+
+class StubHarvester:
+    """
+    The state of one simulated harvester.
+    A started harvest moves from QUEUED to HARVESTING to IDLE over time.
+    """
+
+    def __init__(self, name, version=7, settings=None):
+        self.name = name
+        self.version = version
+        self.settings = settings or StubSettings()
+        self.schedules = []
+        self.config = {
+            "ETL": {"parameters": [
+                {"key": "concurrentTasks", "type": "IntegerParameter", "value": 1},
+                {"key": "enabled", "type": "BooleanParameter", "value": True},
+            ]},
+            "Submission": {"parameters": [
+                {"key": "url", "type": "StringParameter",
+                 "value": "http://localhost:8080/submit"},
+                {"key": "size", "type": "IntegerParameter", "value": 1048576},
+                {"key": "password", "type": "PasswordParameter"},
+            ]},
+        }
+        self.harvested_count = 0
+        self.last_harvest_date = None
+        self._started = None
+        self._history = [{"timestamp": _now_ms(), "value": IDLE}]
+        self._lock = threading.Lock()
+
+    def _advance(self):
+        """move the simulated harvest forward to the current time"""
+        if self._started is None:
+            return
+        elapsed = time.time() - self._started
+        settings = self.settings
+        if elapsed < settings.queue_time:
+            self._transition(QUEUED)
+        elif elapsed < settings.queue_time + settings.harvest_time:
+            self._transition(HARVESTING)
+            fraction = (elapsed - settings.queue_time) / max(settings.harvest_time, 0.001)
+            self.harvested_count = int(settings.max_docs * fraction)
+        else:
+            self.harvested_count = settings.max_docs
+            self.last_harvest_date = self._started + settings.queue_time
+            self._started = None
+            self._transition(IDLE)
+
+    def _transition(self, state):
+        if self._history[-1]["value"] != state:
+            self._history.append({"timestamp": _now_ms(), "value": state})
+
+    @property
+    def state(self):
+        """the current state: IDLE, QUEUED or HARVESTING"""
+        with self._lock:
+            self._advance()
+            return self._history[-1]["value"]
+
+    def start(self):
+        """start a harvest, returns False if one is already running"""
+        with self._lock:
+            self._advance()
+            if self._started is not None:
+                return False
+            self._started = time.time()
+            self.harvested_count = 0
+            self._advance()
+            return True
+
+    def abort(self):
+        """abort a running harvest"""
+        with self._lock:
+            self._started = None
+            self._transition(IDLE)
+
+    def reset(self):
+        """reset the harvester to its initial state"""
+        with self._lock:
+            self._started = None
+            self.harvested_count = 0
+            self._transition(IDLE)
+
+    def remaining_ms(self):
+        """milliseconds until the running harvest is finished, or None"""
+        with self._lock:
+            self._advance()
+            if self._started is None:
+                return None
+            end = self._started + self.settings.queue_time + self.settings.harvest_time
+            return int((end - time.time()) * 1000)
+
+    def history(self):
+        """the state history as served by /etls"""
+        with self._lock:
+            self._advance()
+            return list(self._history)
+
+    def log(self, date):
+        """a log text of the configured size"""
+        return "\n".join(
+            "{} INFO {}: stub log line {}".format(date, self.name, i)
+            for i in range(self.settings.log_lines))
+
+    def status_v7(self):
+        """the JSON document of GET / in library v7"""
+        state = self.state
+        status = {
+            "state": state,
+            "health": "OK",
+            "harvestedCount": self.harvested_count,
+            "maxDocumentCount": self.settings.max_docs,
+            "repositoryName": "Stub Repository {}".format(self.name),
+        }
+        if self.last_harvest_date:
+            status["lastHarvestDate"] = datetime.datetime.fromtimestamp(
+                self.last_harvest_date).isoformat()
+        remaining = self.remaining_ms()
+        if state == HARVESTING and remaining is not None:
+            status["remainingHarvestTime"] = remaining
+        return status
+
+    def set_config(self, changes):
+        """apply a {"Section.key": value} change set, returns a message"""
+        done = []
+        for full_key, value in changes.items():
+            section, _sep, key = full_key.partition(".")
+            for parameter in self.config.get(section, {}).get("parameters", []):
+                if parameter["key"] == key:
+                    parameter["value"] = value
+                    done.append("Set parameter {} to {}".format(full_key, value))
+        return "; ".join(done) or "Nothing changed"
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Dispatches the requests of a StubFleetServer to its harvesters."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002
+        """keep the console quiet, the fleet may serve thousands of requests"""
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _send(self, status, body):
+        if isinstance(body, (dict, list)):
+            payload = json.dumps(body).encode()
+            content_type = "application/json"
+        else:
+            payload = str(body).encode()
+            content_type = "text/plain; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        parts = unquote(url.path).split("/", 2)
+        harvester = self.server.harvesters.get(parts[1] if len(parts) > 1 else "")
+        if harvester is None:
+            self._send(404, {"status": "error", "message": "unknown harvester"})
+            return
+        route = "/" + (parts[2] if len(parts) > 2 else "")
+        query = parse_qs(url.query)
+        body = self._body()
+
+        time.sleep(harvester.settings.delay())
+        if random.random() < harvester.settings.error_rate:
+            self._send(500, {"status": "error",
+                             "message": "simulated failure of {}".format(harvester.name)})
+            return
+
+        if route == HAC.G_VERSIONS and method == "GET":
+            self._send(200, {"value": [
+                "StubHarvester-Service-1.0.0",
+                "RestfulHarvester-Library-{}.1.0".format(harvester.version)]})
+        elif harvester.version >= 7:
+            self._dispatch_v7(harvester, method, route, query, body)
+        else:
+            self._dispatch_v6(harvester, method, route, query, body)
+
+    def _dispatch_v7(self, harvester, method, route, query, body):
+        name = harvester.name
+        if route == V7.PG_HARVEST and method == "GET":
+            self._send(200, harvester.status_v7())
+        elif route == V7.PG_HARVEST and method == "POST":
+            if harvester.start():
+                self._send(202, {"status": "OK", "message": "Harvest of {} started".format(name)})
+            else:
+                self._send(503, {"status": "busy", "message": "{} is busy".format(name)})
+        elif route == V7.P_HARVEST_ABORT and method == "POST":
+            harvester.abort()
+            self._send(200, {"status": "OK", "message": "Aborted {}".format(name)})
+        elif route == V7.P_HARVEST_RESET and method == "POST":
+            harvester.reset()
+            self._send(200, {"status": "OK", "message": "Reset {}".format(name)})
+        elif route == V7.G_HARVEST_ALLLOG and method == "GET":
+            date = query.get("date", [datetime.date.today().isoformat()])[0]
+            self._send(200, harvester.log(date))
+        elif route == V7.G_HARVEST_CRON and method == "GET":
+            self._send(200, {"scheduledHarvestTasks": list(harvester.schedules)})
+        elif route == V7.P_HARVEST_CRON and method == "POST":
+            harvester.schedules.append(body.get("cronTab", ""))
+            self._send(201, {"status": "OK", "message": "Added schedule"})
+        elif route == V7.D_HARVEST_CRON and method == "POST":
+            if body.get("cronTab") in harvester.schedules:
+                harvester.schedules.remove(body.get("cronTab"))
+            self._send(200, {"status": "OK", "message": "Deleted schedule"})
+        elif route == V7.DALL_HARVEST_CRON and method == "POST":
+            harvester.schedules.clear()
+            self._send(200, {"status": "OK", "message": "Deleted all schedules"})
+        elif route == V7.G_HEALTH and method == "GET":
+            self._send(200, "OK")
+        elif route == V7.G_BOOLEAN_OUTDATED and method == "GET":
+            self._send(200, "false")
+        elif route == V7.G_HARVEST_CONFIG and method == "GET":
+            self._send(200, harvester.config)
+        elif route == V7.P_HARVEST_CONFIG and method == "POST":
+            self._send(200, {"status": "OK", "message": harvester.set_config(body)})
+        elif route == V7.STATE_HISTORY and method == "GET":
+            self._send(200, {"overallInfo": {"stateHistory": harvester.history()}})
+        else:
+            self._send(404, {"status": "error", "message": "no route {} {}".format(method, route)})
+
+    def _dispatch_v6(self, harvester, method, route, query, body):
+        state = harvester.state
+        if route == V6.G_STATUS and method == "GET":
+            self._send(200, "idling" if state == IDLE else state.lower())
+        elif route == V6.G_HEALTH and method == "GET":
+            self._send(200, "OK")
+        elif route == V6.G_PROGRESS and method == "GET":
+            if state == IDLE:
+                self._send(200, "N/A")
+            else:
+                self._send(200, "{}/{}".format(harvester.harvested_count,
+                                               harvester.settings.max_docs))
+        elif route == V6.G_MAX_DOCS and method == "GET":
+            self._send(200, str(harvester.settings.max_docs))
+        elif route == V6.G_DATA_PROVIDER and method == "GET":
+            self._send(200, "Stub Repository {}".format(harvester.name))
+        elif route == V6.G_HARVESTED_DOCS and method == "GET":
+            self._send(200, str(harvester.harvested_count))
+        elif route == V6.P_HARVEST and method == "POST":
+            if harvester.start():
+                self._send(200, "Harvesting started")
+            else:
+                self._send(503, "Harvesting is already in progress")
+        elif route == V6.P_HARVEST_ABORT and method == "POST":
+            harvester.abort()
+            self._send(200, "Aborted harvest")
+        elif route == V6.P_HARVEST_RESET and method == "POST":
+            harvester.reset()
+            self._send(200, "Reset harvester")
+        elif route == V6.G_HARVEST_ALLLOG and method == "GET":
+            date = query.get("date", [datetime.date.today().isoformat()])[0]
+            self._send(200, harvester.log(date))
+        elif route == V6.GD_HARVEST_CRON and method == "GET":
+            self._send(200, "Schedules:\n" + ("\n".join(harvester.schedules) or "-"))
+        elif route == V6.GD_HARVEST_CRON and method == "POST" and "cron" in query:
+            harvester.schedules.append(query["cron"][0])
+            self._send(200, "Added schedule")
+        elif route == V6.GD_HARVEST_CRON and method == "DELETE":
+            if "cron" in query:
+                if query["cron"][0] in harvester.schedules:
+                    harvester.schedules.remove(query["cron"][0])
+            else:
+                harvester.schedules.clear()
+            self._send(200, "Deleted schedule")
+        elif route == V6.G_HARVEST_CONFIG and method == "GET":
+            self._send(200, harvester.config)
+        elif route == V6.P_HARVEST_CONFIG and method == "POST":
+            self._send(200, {"status": "OK", "message": harvester.set_config(body)})
+        else:
+            self._send(404, "no route {} {}".format(method, route))
+
+
+class StubFleetServer(ThreadingHTTPServer):
+    """An HTTP server hosting a number of StubHarvesters."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address=("127.0.0.1", 0), harvesters=()):
+        super().__init__(address, StubRequestHandler)
+        self.harvesters = {harvester.name: harvester for harvester in harvesters}
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """http://host:port of this server"""
+        host, port = self.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def url_for(self, name):
+        """the harvester url to register in HCC"""
+        return "{}/{}".format(self.base_url, name)
+
+    def start(self):
+        """serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+
+
+def build_harvesters(count, version=7, prefix="stub", settings=None):
+    """
+    Create count StubHarvesters named <prefix>_<n>.
+    version may be 6, 7 or "mixed" (alternating).
+    """
+    harvesters = []
+    for i in range(count):
+        if version == "mixed":
+            harvester_version = 7 if i % 2 == 0 else 6
+        else:
+            harvester_version = int(version)
+        harvesters.append(StubHarvester("{}_{}".format(prefix, i), harvester_version, settings))
+    return harvesters
+
+
+def add_arguments(parser):
+    """command line options shared with benchmarks.fleet"""
+    parser.add_argument("--version", default="7", choices=["6", "7", "mixed"],
+                        help="harvester library version to simulate")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="random delay variation in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="probability of an HTTP 500 answer (0..1)")
+    parser.add_argument("--queue-time", type=float, default=1.0,
+                        help="seconds a started harvest is queued")
+    parser.add_argument("--harvest-time", type=float, default=30.0,
+                        help="seconds a harvest takes")
+    parser.add_argument("--max-docs", type=int, default=1000,
+                        help="documents per harvest")
+    parser.add_argument("--log-lines", type=int, default=100,
+                        help="lines served by the log endpoint")
+
+
+def settings_from_args(args):
+    """build StubSettings from parsed command line options"""
+    return StubSettings(latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, queue_time=args.queue_time,
+                        harvest_time=args.harvest_time, max_docs=args.max_docs,
+                        log_lines=args.log_lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--harvesters", type=int, default=10,
+                        help="number of simulated harvesters")
+    parser.add_argument("--prefix", default="stub", help="harvester name prefix")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    version = args.version if args.version == "mixed" else int(args.version)
+    server = StubFleetServer(
+        (args.host, args.port),
+        build_harvesters(args.harvesters, version, args.prefix, settings_from_args(args)))
+    for name in server.harvesters:
+        print(server.url_for(name))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Compare the gunicorn worker classes under concurrent load.
+
+A stub fleet (see benchmarks.fleet) is registered in a throw-away SQLite
+database, then HCC is started with "gunicorn hcc_py.wsgi -c gunicorn.conf.py"
+once per GUNICORN_WORKER_CLASS. Concurrent clients request the status of
+one stub harvester each for a fixed time, so the harvester latency is what
+a worker waits on. Worker classes whose package is not installed (gevent)
+are skipped.
+
+Usage: python -m benchmarks.workers --latency 0.05 --clients 32 --duration 10
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import logging
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+
+from benchmarks.fleet import Fleet, setup_django
+from benchmarks.run import percentile
+from benchmarks.stub_harvester import add_arguments, settings_from_args
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+WORKER_CLASSES = ("sync", "gthread", "gevent")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def installed(worker_class):
+    """True if the package a worker class needs is importable"""
+    if worker_class == "gevent":
+        return importlib.util.find_spec("gevent") is not None
+    return True
+
+
+def free_port(host):
+    """a port nobody listens on right now"""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(path, fleet):
+    """migrate a new SQLite database, register the fleet, returns a token key"""
+    os.environ["DATABASE_URL"] = "sqlite:///" + path
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from rest_framework.authtoken.models import Token
+
+    call_command("migrate", verbosity=0)
+    user = User.objects.create_user("benchmark")
+    fleet.register(user)
+    return Token.objects.get_or_create(user=user)[0].key
+
+
+class Gunicorn:
+    """HCC served by gunicorn with one worker class, in a subprocess"""
+
+    def __init__(self, worker_class, host, workers, threads):
+        self.host = host
+        self.port = free_port(host)
+        self.environment = dict(
+            os.environ,
+            GUNICORN_WORKER_CLASS=worker_class,
+            GUNICORN_BIND="{}:{}".format(host, self.port),
+            GUNICORN_WORKERS=str(workers),
+            # gunicorn runs gthread instead of sync if threads are set
+            GUNICORN_THREADS=str(threads if worker_class == "gthread" else 1),
+            # no worker restarts in the middle of a measurement
+            GUNICORN_MAX_REQUESTS="0",
+            LOGLEVEL="WARNING")
+        self.process = None
+
+    @property
+    def base_url(self):
+        return "http://{}:{}".format(self.host, self.port)
+
+    def start(self, timeout=60):
+        """start gunicorn and wait until it accepts connections"""
+        self.process = subprocess.Popen(
+            ["gunicorn", "hcc_py.wsgi", "-c", "gunicorn.conf.py"],
+            cwd=BASE_DIR, env=self.environment,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("gunicorn exited with status {}".format(
+                    self.process.returncode))
+            try:
+                with socket.create_connection((self.host, self.port), timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError("gunicorn did not start within {}s".format(timeout))
+
+    def stop(self):
+        """terminate gunicorn (graceful shutdown of the workers)"""
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def load(base_url, token, names, clients, duration, warmup=1.0):
+    """
+    Let clients threads request harvester states for duration seconds,
+    returns the latencies in seconds and the number of failed requests.
+    """
+    timings, errors = [], []
+    lock = threading.Lock()
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def client(number):
+        count = 0
+        while True:
+            name = names[(number + count * clients) % len(names)]
+            count += 1
+            request = urllib.request.Request(
+                "{}/v1/harvesters/{}/status/".format(base_url, name),
+                headers={"Authorization": "Token " + token})
+            begin = time.monotonic()
+            if begin >= stop_at:
+                return
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                failed = False
+            except (urllib.error.URLError, OSError):
+                failed = True
+            if begin < measure_from:
+                continue
+            with lock:
+                timings.append(time.monotonic() - begin)
+                errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, sum(errors)
+
+
+def run(worker_classes, fleet, token, options):
+    """measure every installed worker class, returns the result entries"""
+    results = []
+    names = list(fleet.urls())
+    for worker_class in worker_classes:
+        if not installed(worker_class):
+            print("{:<8} skipped, not installed".format(worker_class), file=sys.stderr)
+            continue
+        with Gunicorn(worker_class, options["host"], options["workers"],
+                      options["threads"]) as server:
+            timings, errors = load(server.base_url, token, names,
+                                   options["clients"], options["duration"])
+        millis = [timing * 1000 for timing in timings]
+        result = OrderedDict([
+            ("worker_class", worker_class),
+            ("requests", len(timings)),
+            ("errors", errors),
+            ("throughput_rps", round(len(timings) / options["duration"], 1)),
+            ("p50_ms", round(percentile(millis, 0.5), 1) if millis else None),
+            ("p95_ms", round(percentile(millis, 0.95), 1) if millis else None),
+        ])
+        print("{worker_class:<8} {throughput_rps:>8.1f} req/s  p50 {p50_ms:>8.1f} ms  "
+              "p95 {p95_ms:>8.1f} ms  errors {errors}".format(**result), file=sys.stderr)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker-classes", default=",".join(WORKER_CLASSES),
+                        help="comma separated GUNICORN_WORKER_CLASS values to compare")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="GUNICORN_WORKERS of every run")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="GUNICORN_THREADS of the gthread run")
+    parser.add_argument("--clients", type=int, default=32,
+                        help="number of concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="measured seconds per worker class")
+    parser.add_argument("--size", type=int, default=100, help="number of stub harvesters")
+    parser.add_argument("--servers", type=int, default=4,
+                        help="number of HTTP servers to spread the fleet over")
+    parser.add_argument("--host", default="127.0.0.1", help="address gunicorn binds to")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    worker_classes = [name.strip() for name in args.worker_classes.split(",") if name.strip()]
+    logging.disable(logging.CRITICAL)
+    settings = settings_from_args(args)
+    version = args.version if args.version == "mixed" else int(args.version)
+    directory = tempfile.mkdtemp(prefix="hcc-workers-")
+    try:
+        with Fleet(args.size, args.servers, version, settings=settings) as fleet:
+            token = prepare_database(os.path.join(directory, "db.sqlite3"), fleet)
+            results = run(worker_classes, fleet, token, vars(args))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    document = OrderedDict([
+        ("meta", OrderedDict([
+            ("date", datetime.datetime.now().isoformat(timespec="seconds")),
+            ("python", platform.python_version()),
+            ("platform", platform.platform()),
+            ("cpus", os.cpu_count()),
+            ("workers", args.workers),
+            ("threads", args.threads),
+            ("clients", args.clients),
+            ("duration", args.duration),
+            ("size", args.size),
+            ("stub", vars(settings)),
+        ])),
+        ("results", results),
+    ])
+    output = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
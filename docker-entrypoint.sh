@@ -6,5 +6,13 @@ python3 manage.py makemigrations --noinput && python3 manage.py migrate
 #load initial auth data with user:gerdi pw:gerdigerdi
 python3 manage.py loaddata initial_superuser.json
 
+# start harvesters by the crontabs stored in HCC and from the admission queue
+# (see README, HCC scheduler and Limiting concurrent harvests)
+if [ "$HCC_SCHEDULER" = "True" ] || [ "${HARVEST_MAX_CONCURRENT:-0}" != "0" ] \
+        || [ "${HARVEST_MAX_CONCURRENT_PER_HOST:-0}" != "0" ]; then
+    python3 manage.py runscheduler &
+fi
+
 # service nginx start & Start Gunicorn processes
-nginx & gunicorn hcc_py.wsgi --bind 0.0.0.0:8000 --workers 3
+# (see gunicorn.conf.py for the worker/thread configuration)
+nginx & gunicorn hcc_py.wsgi -c gunicorn.conf.py
@@ -0,0 +1,75 @@
+"""
+Gunicorn configuration for the Harvester Control Center.
+
+HCC spends most of its request time waiting on harvester HTTP APIs
+(status, progress, start, ...), so the defaults favour a threaded worker
+class over the synchronous one. Every setting can be overridden via
+environment variables, see README.md#gunicorn-configuration.
+
+Usage: gunicorn hcc_py.wsgi -c gunicorn.conf.py
+"""
+import multiprocessing
+import os
+
+__author__ = "Jan Frömberg"
+__copyright__ = "Copyright 2019, GeRDI Project"
+__credits__ = ["Jan Frömberg"]
+__license__ = "Apache 2.0"
+__maintainer__ = "Jan Frömberg"
+__email__ = "jan.froemberg@tu-dresden.de"
+
+
+def _env_int(name, default):
+    """read an integer from the environment, fall back to default"""
+    value = os.environ.get(name, '')
+    return int(value) if value.strip() else default
+
+
+def _env_bool(name, default):
+    """read a boolean ('True'/'False') from the environment"""
+    value = os.environ.get(name, '')
+    return value == 'True' if value.strip() else default
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# gthread: a pool of threads per worker process, cheap for I/O-bound fan-out.
+# gevent: greenlets, needs the gevent package to be installed.
+# sync: gunicorns default, one request per worker at a time.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+workers = _env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+
+# only used by the gthread worker class
+threads = _env_int('GUNICORN_THREADS', 8)
+
+# only used by the gevent worker class
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+
+# a dashboard load waits on every enabled harvester, each call may take up
+# to 5-9 seconds (see harvester_api_strategy.py), so 30s is too short.
+timeout = _env_int('GUNICORN_TIMEOUT', 120)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# recycle workers to bound memory growth, jitter avoids restarting all at once
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# load Django once in the master and share it copy-on-write with the workers.
+# gevent has to monkey patch before the app is imported, so it is off there.
+preload_app = _env_bool('GUNICORN_PRELOAD', worker_class != 'gevent')
+
+loglevel = os.environ.get('LOGLEVEL', 'info').lower()
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = os.environ.get('GUNICORN_ERRORLOG', '-')
+
+
+def post_fork(server, worker):
+    """
+    Do not share database connections opened while preloading the app
+    between the forked workers.
+    """
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
@@ -79,6 +79,9 @@ urlpatterns = [
     path('hcc/abortall', views.abort_all_harvesters, name='abort-harvesters'),
     path('hcc/logs', views.get_all_harvester_log, name='harvesters-log'),
     path('hcc/hcclog', views.get_hcc_log, name='hcc-log'),
+    path('metrics', views.get_metrics, name='metrics'),
+    path('hcc/status', views.get_harvesters_status, name='harvesters-status'),
+    path('hcc/progress', views.get_harvesters_progress, name='harvesters-progress'),
     path(
         'hcc/<str:name>/progress',
         views.get_harvester_progress,